@@ -1,12 +1,32 @@
+import time
+_imports_started = time.perf_counter()
+
 import os
+import importlib
 from flask import Flask, app, request, session
 from flask_login import LoginManager, current_user
 from flask_babel import Babel 
 from config import Config
 from app.services.oauth_service import OAuthService
-from aclimate_v3_orm.database.base import create_tables
+from app.utils import instrumentation, schema, session_store, startup
+from app.utils.startup import StartupTimer
 import logging
 
+# Tiempo de los imports de este módulo (Flask, extensiones, ORM), reportado con el arranque
+_imports_duration = time.perf_counter() - _imports_started
+
+# Módulos de rutas (app.routes.*) en orden de registro; el de health va al final
+BLUEPRINT_MODULES = (
+    'main_routes', 'country_routes', 'adm1_routes', 'adm2_routes', 'source_routes',
+    'data_source_routes', 'location_routes', 'role_routes', 'user_routes', 'language_routes',
+    'crop_routes', 'stress_routes', 'phenological_stage_routes', 'indicators_routes',
+    'indicators_category_routes', 'climate_measure_routes', 'phenological_stage_stress_routes',
+    'setup_routes', 'soil_routes', 'cultivar_routes', 'season_routes', 'country_indicator_routes',
+    'country_climate_measure_routes', 'app_routes', 'indicator_features_routes',
+    # Health check endpoints (not exposed in Swagger/ReDoc)
+    'health'
+)
+
 login_manager = LoginManager()
 babel = Babel()
 oauth_service = OAuthService()
@@ -26,6 +46,9 @@ def get_locale():
 
 
 def create_app():
+    timer = StartupTimer(started=_imports_started)
+    timer.phases['imports'] = _imports_duration
+
     app = Flask(__name__)
     app.config.from_object(Config)
 
@@ -35,14 +58,20 @@ def create_app():
 
     print(f"App config DATABASE_URL: {app.config.get('SQLALCHEMY_DATABASE_URI')}")
 
-    create_tables()
-    
     logging.basicConfig(level=logging.INFO)
 
+    # Esquema de la BD: `flask init-db` lo crea; al arrancar solo se verifica su versión
+    with timer.phase('schema'):
+        schema.init_app(app)
+
     # Inicializar extensiones
-    login_manager.init_app(app)
-    oauth_service.init_app(app)
-    babel.init_app(app, locale_selector=get_locale)
+    with timer.phase('extensions'):
+        session_store.init_app(app)
+        login_manager.init_app(app)
+        oauth_service.init_app(app)
+        babel.init_app(app, locale_selector=get_locale)
+        # Primero entre los hooks de la app: mide toda la petición
+        instrumentation.init_app(app)
 
     # Store OAuth service in app extensions for access in routes
     app.extensions['oauth_service'] = oauth_service
@@ -100,6 +129,7 @@ def create_app():
     def inject_conf_vars():
         from app.config.permissions import Module
         from app.decorators.permissions import check_module_access
+        from app.utils.fragments import cached_fragment
         
         current_locale = get_locale()
         # Asegurar que el locale actual existe en LANGUAGES
@@ -110,64 +140,18 @@ def create_app():
             'get_locale': lambda: current_locale,
             'config': Config,
             'Module': Module,
-            'check_module_access': check_module_access
+            'check_module_access': check_module_access,
+            'cached_fragment': cached_fragment
         }
     
-    # Registrar rutas
-    from app.routes.main_routes import bp as main_bp
-    from app.routes.country_routes import bp as country_bp
-    from app.routes.adm1_routes import bp as adm1_bp
-    from app.routes.adm2_routes import bp as adm2_bp
-    from app.routes.source_routes import bp as source_bp
-    from app.routes.data_source_routes import bp as data_source_bp
-    from app.routes.location_routes import bp as location_bp
-    from app.routes.role_routes import bp as role_bp
-    from app.routes.user_routes import bp as user_bp
-    from app.routes.language_routes import bp as language_bp
-    from app.routes.crop_routes import bp as crop_bp
-    from app.routes.stress_routes import bp as stress_bp
-    from app.routes.phenological_stage_routes import bp as phenological_stage_bp
-    from app.routes.indicators_routes import bp as indicator_bp
-    from app.routes.indicators_category_routes import bp as indicators_category_bp
-    from app.routes.climate_measure_routes import bp as climate_measure_bp
-    from app.routes.phenological_stage_stress_routes import bp as phenological_stage_stress_bp
-    from app.routes.setup_routes import bp as setup_bp
-    from app.routes.soil_routes import bp as soil_bp
-    from app.routes.cultivar_routes import bp as cultivar_bp
-    from app.routes.season_routes import bp as season_bp
-    from app.routes.country_indicator_routes import bp as country_indicator_bp
-    from app.routes.country_climate_measure_routes import bp as country_climate_measure_bp
-    from app.routes.app_routes import bp as app_bp
-    from app.routes.indicator_features_routes import bp as indicator_features_bp
-    
-    app.register_blueprint(main_bp)
-    app.register_blueprint(country_bp)
-    app.register_blueprint(adm1_bp)
-    app.register_blueprint(adm2_bp)
-    app.register_blueprint(source_bp)
-    app.register_blueprint(data_source_bp)
-    app.register_blueprint(location_bp)
-    app.register_blueprint(role_bp)
-    app.register_blueprint(user_bp)
-    app.register_blueprint(language_bp)
-    app.register_blueprint(crop_bp)
-    app.register_blueprint(stress_bp)
-    app.register_blueprint(phenological_stage_bp)
-    app.register_blueprint(indicator_bp)
-    app.register_blueprint(indicators_category_bp)
-    app.register_blueprint(climate_measure_bp)
-    app.register_blueprint(phenological_stage_stress_bp)
-    app.register_blueprint(setup_bp)
-    app.register_blueprint(soil_bp)
-    app.register_blueprint(cultivar_bp)
-    app.register_blueprint(season_bp)
-    app.register_blueprint(country_indicator_bp)
-    app.register_blueprint(country_climate_measure_bp)
-    app.register_blueprint(app_bp)
-    app.register_blueprint(indicator_features_bp)
+    # Registrar rutas (los servicios de cada módulo se crean en su primer uso)
+    with timer.phase('blueprints'):
+        for name in BLUEPRINT_MODULES:
+            with timer.phase(f'import {name}'):
+                module = importlib.import_module(f'app.routes.{name}')
+            app.register_blueprint(module.bp)
 
-    # Health check endpoints (not exposed in Swagger/ReDoc)
-    from app.routes.health import bp as health_bp
-    app.register_blueprint(health_bp)
+    app.logger.info(timer.summary())
+    startup.publish(timer)
 
     return app
@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import List, Dict
+from typing import List, Dict, Optional
 import logging
 from flask_login import current_user
 
@@ -77,13 +77,14 @@ def get_module_info(module_value: str) -> Dict[str, str]:
     return MODULES_INFO.get(module_value, {"name": module_value, "description": ""})
 
 
-def user_has_module_access(module: Module, permission_type: str = 'read') -> bool:
+def user_has_module_access(module: Module, permission_type: str = 'read', country_id: Optional[int] = None) -> bool:
     """
     Verifica si el usuario actual tiene acceso a un módulo específico
     
     Args:
         module: Módulo a verificar
         permission_type: Tipo de permiso ('create', 'read', 'update', 'delete')
+        country_id: Verificar el permiso solo en este país (None: en cualquier país)
     
     Returns:
         True si el usuario tiene el permiso especificado para el módulo
@@ -91,7 +92,7 @@ def user_has_module_access(module: Module, permission_type: str = 'read') -> boo
     if not current_user.is_authenticated:
         return False
     
-    return current_user.has_module_access(module.value, permission_type)
+    return current_user.has_module_access(module.value, permission_type, country_id)
 
 
 def get_user_accessible_modules() -> List[str]:
@@ -107,15 +108,16 @@ def get_user_accessible_modules() -> List[str]:
     return current_user.get_accessible_modules()
 
 
-def check_module_permission(module: Module, permission_type: str = 'read') -> bool:
+def check_module_permission(module: Module, permission_type: str = 'read', country_id: Optional[int] = None) -> bool:
     """
     Función auxiliar para verificar permisos en templates y código
     
     Args:
         module: Módulo a verificar
         permission_type: Tipo de permiso
+        country_id: Verificar el permiso solo en este país (None: en cualquier país)
     
     Returns:
         True si tiene el permiso
     """
-    return user_has_module_access(module, permission_type)
+    return user_has_module_access(module, permission_type, country_id)
@@ -1,4 +1,5 @@
 from functools import wraps
+from typing import Optional
 from flask import abort, flash, redirect, url_for
 from flask_login import current_user
 from flask_babel import _
@@ -35,13 +36,14 @@ def require_module_access(module: Module, permission_type: str = 'read'):
     return decorator
 
 
-def check_module_access(module: Module, permission_type: str = 'read') -> bool:
+def check_module_access(module: Module, permission_type: str = 'read', country_id: Optional[int] = None) -> bool:
     """
     Función auxiliar para verificar acceso a módulos en templates
     
     Args:
         module: Módulo a verificar
         permission_type: Tipo de permiso ('create', 'read', 'update', 'delete')
+        country_id: Verificar el permiso solo en este país (None: en cualquier país)
     
     Returns:
         True si el usuario tiene acceso
@@ -49,4 +51,4 @@ def check_module_access(module: Module, permission_type: str = 'read') -> bool:
     if not current_user.is_authenticated:
         return False
     
-    return user_has_module_access(module, permission_type)
\ No newline at end of file
+    return user_has_module_access(module, permission_type, country_id)
\ No newline at end of file
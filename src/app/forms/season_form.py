@@ -8,7 +8,8 @@ class SeasonForm(FlaskForm):
         _l('Localidad'),
         coerce=int,
         validators=[DataRequired(message=_l('Debe seleccionar una localidad.'))],
-        choices=[]  # Llena dinámicamente en la vista
+        choices=[],  # Solo la opción seleccionada; el resto se busca con /api/locations/search
+        validate_choice=False  # La vista valida que la locación exista
     )
 
     crop_id = SelectField(
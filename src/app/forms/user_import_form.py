@@ -0,0 +1,22 @@
+from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from flask_babel import lazy_gettext as _l
+from wtforms import SubmitField, SelectField
+
+class UserImportForm(FlaskForm):
+    role_id = SelectField(
+        _l('Rol por defecto'),
+        coerce=int,
+        description=_l('Rol para las filas que no indican la columna role')
+    )
+    
+    csv_file = FileField(
+        _l('Archivo CSV'),
+        validators=[
+            FileRequired(message=_l('Debe seleccionar un archivo.')),
+            FileAllowed(['csv'], message=_l('Solo se permiten archivos CSV.'))
+        ],
+        description=_l('Formato: username, email, first_name, last_name, password, role, countries')
+    )
+    
+    submit = SubmitField(_l('Crear Usuarios'))
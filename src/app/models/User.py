@@ -1,14 +1,73 @@
 import logging
+from types import MappingProxyType
 from flask_login import UserMixin
-from flask import session
-from typing import List, Optional, Dict
+from flask import session, current_app
+from typing import FrozenSet, Iterable, List, Optional, Dict
 from aclimate_v3_orm.services.user_service import UserService as ORMUserService
 from aclimate_v3_orm.services.user_access_service import UserAccessService
 from aclimate_v3_orm.services.role_service import RoleService
 from aclimate_v3_orm.schemas import UserRead, UserAccessRead, RoleRead
+from app.utils.cache import TTLCache
+from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Principals already built, keyed by Keycloak ID (shared by the threads of a worker)
+_principal_cache = TTLCache(maxsize=Config.USER_CACHE_MAXSIZE, ttl=Config.USER_CACHE_TTL)
+
+PERMISSION_TYPES = ('create', 'read', 'update', 'delete')
+
+
+class PermissionIndex:
+    """
+    Immutable lookup table of a user's permissions, built once per principal
+    
+    Grants are indexed by (module, permission) across all countries and by
+    (country_id, module) for per-country checks, so every check is a single
+    hash lookup. Module keys are stored upper-case (the ORM enum values).
+    `signature` identifies the module-level grants, so users with the same
+    rights can share anything rendered from them (see app.utils.fragments).
+    """
+    __slots__ = ('_grants', '_country_grants', 'country_ids', 'readable_modules', 'signature')
+    
+    def __init__(self, accesses: Iterable[Dict] = ()):
+        grants = set()
+        country_grants = {}
+        for access in accesses:
+            module = (access.get('module') or '').upper()
+            if not module:
+                continue
+            allowed = frozenset(p for p in PERMISSION_TYPES if access.get(p))
+            key = (access.get('country_id'), module)
+            country_grants[key] = country_grants.get(key, frozenset()) | allowed
+            grants.update((module, p) for p in allowed)
+        self._grants = frozenset(grants)
+        self._country_grants = MappingProxyType(country_grants)
+        self.country_ids = frozenset(access.get('country_id') for access in accesses if access.get('country_id'))
+        self.readable_modules = tuple(sorted({module for module, p in grants if p == 'read'}))
+        self.signature = tuple(sorted(grants))
+    
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"PermissionIndex is immutable ({name})")
+        object.__setattr__(self, name, value)
+    
+    def allows(self, module: str, permission: str = 'read', country_id: Optional[int] = None) -> bool:
+        """True if `permission` is granted on `module` (in any country, or in `country_id`)"""
+        if country_id is None:
+            if (module, permission) in self._grants:
+                return True
+            return not module.isupper() and (module.upper(), permission) in self._grants
+        return permission in self.permissions(module, country_id)
+    
+    def permissions(self, module: str, country_id: Optional[int] = None) -> FrozenSet[str]:
+        """Permissions granted on `module` (in any country, or in `country_id`)"""
+        if not module.isupper():
+            module = module.upper()
+        if country_id is None:
+            return frozenset(p for p in PERMISSION_TYPES if (module, p) in self._grants)
+        return self._country_grants.get((country_id, module), frozenset())
+
 class User(UserMixin):
     """User model integrating Keycloak authentication with ORM database"""
     
@@ -38,6 +97,7 @@ class User(UserMixin):
         self.role_app = None
         self.user_accesses = []
         self.countries = []
+        self.permission_index = PermissionIndex()
         
         # Load from database if available
         if db_user:
@@ -88,6 +148,8 @@ class User(UserMixin):
                         }
                 self.countries = list(countries_dict.values())
             
+            self.permission_index = PermissionIndex(self.user_accesses)
+            
             logger.info(f"Loaded user from DB: ID={self.db_id}, Role={self.role_name}, Accesses={len(self.user_accesses)}")
             
         except Exception as e:
@@ -97,27 +159,24 @@ class User(UserMixin):
         """Return user ID for Flask-Login (use Keycloak ID)"""
         return str(self.keycloak_id)
     
-    def has_module_access(self, module_value: str, permission_type: str = 'read') -> bool:
+    def has_module_access(self, module_value: str, permission_type: str = 'read',
+                          country_id: Optional[int] = None) -> bool:
         """
         Check if user has access to a specific module with a specific permission
         
         Args:
             module_value: Module enum value (e.g., 'geographic', 'GEOGRAPHIC', 'crop_data', 'CROP_DATA')
             permission_type: Type of permission ('create', 'read', 'update', 'delete')
+            country_id: Only consider the accesses of this country (None: any country)
         
         Returns:
             True if user has the specified permission for the module
         """
-        # Convertir a mayúsculas para comparación case-insensitive
-        module_value_upper = module_value.upper()
-        for access in self.user_accesses:
-            if access.get('module', '').upper() == module_value_upper:
-                return access.get(permission_type, False)
-        return False
+        return self.permission_index.allows(module_value, permission_type, country_id)
     
     def has_country_access(self, country_id: int) -> bool:
         """Check if user has access to a specific country"""
-        return any(access['country_id'] == country_id for access in self.user_accesses)
+        return country_id in self.permission_index.country_ids
     
     def get_accessible_countries(self) -> List[Dict]:
         """Get list of countries user has access to"""
@@ -127,33 +186,23 @@ class User(UserMixin):
         """Get list of country IDs user has access to"""
         return [country['id'] for country in self.countries]
     
-    def get_permissions_for_module(self, module_value: str) -> Dict[str, bool]:
+    def get_permissions_for_module(self, module_value: str, country_id: Optional[int] = None) -> Dict[str, bool]:
         """
         Get all permissions for a specific module
         
+        Args:
+            module_value: Module enum value
+            country_id: Only consider the accesses of this country (None: any country)
+        
         Returns:
             Dict with 'create', 'read', 'update', 'delete' permissions
         """
-        # Convertir a mayúsculas para comparación case-insensitive
-        module_value_upper = module_value.upper()
-        for access in self.user_accesses:
-            if access.get('module', '').upper() == module_value_upper:
-                return {
-                    'create': access.get('create', False),
-                    'read': access.get('read', False),
-                    'update': access.get('update', False),
-                    'delete': access.get('delete', False)
-                }
-        return {'create': False, 'read': False, 'update': False, 'delete': False}
+        granted = self.permission_index.permissions(module_value, country_id)
+        return {permission: permission in granted for permission in PERMISSION_TYPES}
     
     def get_accessible_modules(self) -> List[str]:
         """Get list of modules user has at least read access to"""
-        modules = set()
-        for access in self.user_accesses:
-            module = access.get('module')
-            if module and access.get('read', False):
-                modules.add(module)
-        return list(modules)
+        return list(self.permission_index.readable_modules)
     
     def is_admin(self) -> bool:
         """Check if user has admin role"""
@@ -312,12 +361,19 @@ class User(UserMixin):
         if user_data:
             keycloak_id = (user_data.get('sub') or user_data.get('id'))
             if str(keycloak_id) == str(user_id):
+                cached_user = _principal_cache.get(str(keycloak_id))
+                if cached_user is not None:
+                    return cached_user
+                
                 # Reload from database to get fresh data
                 try:
                     orm_user_service = ORMUserService()
                     db_users = orm_user_service.get_by_keycloak_ext_id(keycloak_id)
                     db_user = db_users[0] if db_users else None
-                    return User(user_data, db_user)
+                    user = User(user_data, db_user)
+                    if db_user is not None:
+                        _principal_cache.set(str(keycloak_id), user)
+                    return user
                 except Exception as e:
                     logger.error(f"Error loading user from database: {e}")
                     # Return user with Keycloak data only
@@ -355,10 +411,26 @@ class User(UserMixin):
             
             # Create user object
             user = User(user_info, db_user)
+            # Only cache principals backed by a database record (no empty-permission users)
+            if db_user is not None:
+                _principal_cache.set(str(keycloak_id), user)
             
             return user
         return None
     
+    @staticmethod
+    def invalidate_cache(keycloak_id: Optional[str] = None):
+        """
+        Drop cached principals so the next request reloads them from the database
+        
+        Args:
+            keycloak_id: Keycloak ID of the user to drop (None clears every entry)
+        """
+        if keycloak_id is None:
+            _principal_cache.clear()
+        else:
+            _principal_cache.pop(str(keycloak_id))
+    
     def validate_token(self):
         """Validate that the user's token is still valid"""
         access_token = session.get('access_token')
@@ -366,8 +438,11 @@ class User(UserMixin):
             logger.warning("No access token found in session")
             return False
         
-        from app.services.oauth_service import OAuthService
-        oauth_service = OAuthService()
+        # Reuse the app's OAuth service (and its JWKS cache) instead of building one per request
+        oauth_service = current_app.extensions.get('oauth_service')
+        if oauth_service is None:
+            from app.services.oauth_service import OAuthService
+            oauth_service = OAuthService()
         is_valid = oauth_service.validate_token(access_token)
         
         if not is_valid:
@@ -377,6 +452,7 @@ class User(UserMixin):
     
     def reload_from_db(self):
         """Reload user data from database"""
+        User.invalidate_cache(self.keycloak_id)
         try:
             orm_user_service = ORMUserService()
             db_users = orm_user_service.get_by_keycloak_ext_id(self.keycloak_id)
@@ -1,15 +1,31 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngAdmin1Service, MngCountryService
+from aclimate_v3_orm.services import MngAdmin1Service
 from aclimate_v3_orm.schemas import Admin1Create, Admin1Update
 from app.forms.adm1_form import Adm1Form
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, ADMIN1
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('adm1', __name__)
-adm1_service = MngAdmin1Service()
-country_service = MngCountryService()
+adm1_service = LazyService(MngAdmin1Service)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, ADMIN1)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+adm1_list_query = ListQuery(
+    adm1_service,
+    search=['name', 'ext_id', 'country.name'],
+    sort={'name': 'name', 'ext_id': 'ext_id', 'country': 'country.name'},
+    filters={'country': 'country.name', 'status': ('enable', STATUS_VALUES)},
+    load=['country']
+)
 
 @bp.route('/adm1', methods=['GET', 'POST'])
 @login_required
@@ -21,7 +37,7 @@ def list_adm1():
     can_create = current_user.has_module_access(Module.GEOGRAPHIC.value, 'create')
     
     if can_create:
-        form.country_id.choices = [(c.id, c.name) for c in country_service.get_all_enable()]
+        form.country_id.choices = reference_data_service.countries(enabled_only=True)
 
     if form.validate_on_submit():
         # Verify create permission before creating
@@ -39,8 +55,9 @@ def list_adm1():
         flash(_('División administrativa agregada correctamente.'), 'success')
         return redirect(url_for('adm1.list_adm1'))
 
-    adm1_list = adm1_service.get_all()
-    return render_template('adm1/list.html', adm1=adm1_list, form=form, can_create=can_create)
+    return render_list('adm1/list.html', 'adm1/_rows.html',
+                       adm1_list_query, 'adm1',
+                       form=form, can_create=can_create)
 
 
 @bp.route('/adm1/edit/<int:id>', methods=['GET', 'POST'])
@@ -53,7 +70,7 @@ def edit_adm1(id):
         return redirect(url_for('adm1.list_adm1'))
 
     form = Adm1Form(obj=adm)
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all_enable()]
+    form.country_id.choices = reference_data_service.countries(enabled_only=True)
     
     if request.method == 'GET':
         form.country_id.data = adm.country_id
@@ -107,23 +124,13 @@ def bulk_action():
         flash('No se seleccionaron adm1.', 'warning')
         return redirect(url_for('adm1.list_adm1'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if adm1_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                adm1_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(adm1_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} adm1(s) deshabilitado(s).', 'warning')
+        flash(f'{result.count} adm1(s) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} adm1(s) recuperado(s).', 'success')
+        flash(f'{result.count} adm1(s) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('adm1.list_adm1'))
\ No newline at end of file
@@ -1,15 +1,28 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngAdmin2Service, MngAdmin1Service
+from aclimate_v3_orm.services import MngAdmin2Service
 from aclimate_v3_orm.schemas import Admin2Create, Admin2Update
 from app.forms.adm2_form import Adm2Form
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('adm2', __name__)
-adm2_service = MngAdmin2Service()
-adm1_service = MngAdmin1Service()
+adm2_service = LazyService(MngAdmin2Service)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+adm2_list_query = ListQuery(
+    adm2_service,
+    search=['name', 'ext_id', 'admin_1.name'],
+    sort={'name': 'name', 'ext_id': 'ext_id', 'adm1': 'admin_1.name'},
+    filters={'adm1': 'admin_1.name', 'status': ('enable', STATUS_VALUES)},
+    load=['admin_1']
+)
 
 # Ruta: Listar y agregar con modal
 @bp.route('/adm2', methods=['GET', 'POST'])
@@ -22,7 +35,7 @@ def list_adm2():
     can_create = current_user.has_module_access(Module.GEOGRAPHIC.value, 'create')
     
     if can_create:
-        form.admin_1_id.choices = [(a.id, a.name) for a in adm1_service.get_all()]
+        form.admin_1_id.choices = reference_data_service.admin1()
 
     if form.validate_on_submit():
         # Verify create permission before creating
@@ -41,8 +54,9 @@ def list_adm2():
         flash(_('División administrativa agregada correctamente.'), 'success')
         return redirect(url_for('adm2.list_adm2'))
 
-    adm2_list = adm2_service.get_all()
-    return render_template('adm2/list.html', adm2=adm2_list, form=form, can_create=can_create)
+    return render_list('adm2/list.html', 'adm2/_rows.html',
+                       adm2_list_query, 'adm2',
+                       form=form, can_create=can_create)
 
 # Ruta: Agregar como pantalla independiente
 @bp.route('/adm2/add', methods=['GET', 'POST'])
@@ -50,7 +64,7 @@ def list_adm2():
 @require_module_access(Module.GEOGRAPHIC, permission_type='create')
 def add_adm2():
     form = Adm2Form()
-    form.admin_1_id.choices = [(a.id, a.name) for a in adm1_service.get_all()]
+    form.admin_1_id.choices = reference_data_service.admin1()
 
     if form.validate_on_submit():
         new_adm2 = Admin2Create(
@@ -76,7 +90,7 @@ def edit_adm2(id):
         return redirect(url_for('adm2.list_adm2'))
 
     form = Adm2Form(obj=adm)
-    form.admin_1_id.choices = [(a.id, a.name) for a in adm1_service.get_all(filters={"enable": True})]
+    form.admin_1_id.choices = reference_data_service.admin1(enabled_only=True)
 
     if request.method == 'GET':
         form.admin_1_id.data = adm.admin_1_id
@@ -130,23 +144,13 @@ def bulk_action():
         flash('No se seleccionaron adm2.', 'warning')
         return redirect(url_for('adm2.list_adm2'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if adm2_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                adm2_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(adm2_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} adm2(s) deshabilitado(s).', 'warning')
+        flash(f'{result.count} adm2(s) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} adm2(s) recuperado(s).', 'success')
+        flash(f'{result.count} adm2(s) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('adm2.list_adm2'))
\ No newline at end of file
@@ -6,9 +6,11 @@ from aclimate_v3_orm_frontend.schemas import AppCreate, AppUpdate
 from app.forms.app_form import AppForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.utils.bulk_actions import run_bulk_action_each, flash_bulk_failures
+from app.utils.lazy import LazyService
 
 bp = Blueprint('app', __name__)
-app_service = AppService()
+app_service = LazyService(AppService)
 
 @bp.route('/app', methods=['GET', 'POST'])
 @login_required
@@ -109,23 +111,17 @@ def bulk_action():
         flash(_('No se seleccionaron aplicaciones.'), 'warning')
         return redirect(url_for('app.list_app'))
 
-    count = 0
-    for app_id in ids:
-        try:
-            app_id_int = int(app_id)
-            if action == 'disable':
-                if app_service.delete(app_id_int):
-                    count += 1
-            elif action == 'recover':
-                app_service.update(id=app_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    # Las aplicaciones viven en la base del frontend: se procesan por ID con su servicio
+    result = run_bulk_action_each(action, ids, {
+        'disable': app_service.delete,
+        'recover': lambda app_id: app_service.update(id=app_id, obj_in={"enable": True}) is not None
+    })
 
     if action == 'disable':
-        flash(_(f'{count} aplicación(es) deshabilitada(s).'), 'warning')
+        flash(_(f'{result.count} aplicación(es) deshabilitada(s).'), 'warning')
     elif action == 'recover':
-        flash(_(f'{count} aplicación(es) recuperada(s).'), 'success')
+        flash(_(f'{result.count} aplicación(es) recuperada(s).'), 'success')
     else:
         flash(_('Acción no reconocida.'), 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('app.list_app'))
@@ -6,9 +6,25 @@ from aclimate_v3_orm.schemas import ClimateMeasureCreate, ClimateMeasureUpdate
 from app.forms.climate_measure_form import ClimateMeasureForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, CLIMATE_MEASURE
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('climate_measure', __name__)
-measure_service = MngClimateMeasureService()
+measure_service = LazyService(MngClimateMeasureService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, CLIMATE_MEASURE)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+climate_measure_list_query = ListQuery(
+    measure_service,
+    search=['name', 'short_name', 'unit', 'description'],
+    sort={'name': 'name', 'short_name': 'short_name', 'unit': 'unit'},
+    filters={'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 
 
 @bp.route('/climate_measure', methods=['GET', 'POST'])
@@ -32,8 +48,9 @@ def list_climate_measure():
         flash(_('Variable climática agregada correctamente.'), 'success')
         return redirect(url_for('climate_measure.list_climate_measure'))
 
-    measures = measure_service.get_all()
-    return render_template('climate_measure/list.html', measures=measures, form=form, can_create=can_create)
+    return render_list('climate_measure/list.html', 'climate_measure/_rows.html',
+                       climate_measure_list_query, 'measures',
+                       form=form, can_create=can_create)
 
 
 @bp.route('/climate_measure/edit/<int:id>', methods=['GET', 'POST'])
@@ -96,23 +113,13 @@ def bulk_action():
         flash('No se seleccionaron variables climáticas.', 'warning')
         return redirect(url_for('climate_measure.list_climate_measure'))
 
-    count = 0
-    for mid in ids:
-        try:
-            mid_int = int(mid)
-            if action == 'disable':
-                if measure_service.delete(mid_int):
-                    count += 1
-            elif action == 'recover':
-                measure_service.update(id=mid_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(measure_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} variable(s) climática(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} variable(s) climática(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} variable(s) climática(s) recuperada(s).', 'success')
+        flash(f'{result.count} variable(s) climática(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('climate_measure.list_climate_measure'))
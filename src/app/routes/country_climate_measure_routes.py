@@ -1,16 +1,35 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngCountryClimateMeasureService, MngCountryService, MngClimateMeasureService
+from aclimate_v3_orm.services import MngCountryClimateMeasureService
 from aclimate_v3_orm.schemas import CountryClimateMeasureCreate, CountryClimateMeasureUpdate
 from app.forms.country_climate_measure_form import CountryClimateMeasureForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, YES_NO_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('country_climate_measure', __name__)
-country_climate_measure_service = MngCountryClimateMeasureService()
-country_service = MngCountryService()
-measure_service = MngClimateMeasureService()
+country_climate_measure_service = LazyService(MngCountryClimateMeasureService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+country_climate_measure_list_query = ListQuery(
+    country_climate_measure_service,
+    search=['country.name', 'measure.name', 'description', 'store', 'workspace'],
+    sort={'country': 'country.name', 'measure': 'measure.name'},
+    filters={
+        'country': 'country.name',
+        'measure': 'measure.name',
+        'spatial_forecast': ('spatial_forecast', YES_NO_VALUES),
+        'spatial_climate': ('spatial_climate', YES_NO_VALUES),
+        'location_forecast': ('location_forecast', YES_NO_VALUES),
+        'location_climate': ('location_climate', YES_NO_VALUES)
+    },
+    load=['country', 'measure']
+)
 
 
 @bp.route('/country_climate_measure', methods=['GET', 'POST'])
@@ -20,10 +39,8 @@ def list_country_climate_measure():
     can_create = current_user.has_module_access(Module.CLIMATE_DATA.value, 'create')
 
     form = CountryClimateMeasureForm()
-    countries = country_service.get_all()
-    measures = measure_service.get_all()
-    form.country_id.choices = [(c.id, c.name) for c in countries]
-    form.measure_id.choices = [(m.id, f"{m.name} ({m.short_name})") for m in measures]
+    form.country_id.choices = reference_data_service.countries()
+    form.measure_id.choices = reference_data_service.climate_measures()
 
     if form.validate_on_submit():
         if not can_create:
@@ -47,11 +64,13 @@ def list_country_climate_measure():
             return redirect(url_for('country_climate_measure.list_country_climate_measure'))
         except Exception as e:
             flash(_('Error al crear la relación: ') + str(e), 'danger')
-            cm_list = country_climate_measure_service.get_all()
-            return render_template('country_climate_measure/list.html', country_climate_measures=cm_list, form=form, can_create=can_create)
+            return render_list('country_climate_measure/list.html', 'country_climate_measure/_rows.html',
+                               country_climate_measure_list_query, 'country_climate_measures',
+                               form=form, can_create=can_create)
 
-    cm_list = country_climate_measure_service.get_all()
-    return render_template('country_climate_measure/list.html', country_climate_measures=cm_list, form=form, can_create=can_create)
+    return render_list('country_climate_measure/list.html', 'country_climate_measure/_rows.html',
+                       country_climate_measure_list_query, 'country_climate_measures',
+                       form=form, can_create=can_create)
 
 
 @bp.route('/country_climate_measure/edit/<int:id>', methods=['GET', 'POST'])
@@ -64,10 +83,8 @@ def edit_country_climate_measure(id):
         return redirect(url_for('country_climate_measure.list_country_climate_measure'))
 
     form = CountryClimateMeasureForm(obj=cm)
-    countries = country_service.get_all()
-    measures = measure_service.get_all()
-    form.country_id.choices = [(c.id, c.name) for c in countries]
-    form.measure_id.choices = [(m.id, f"{m.name} ({m.short_name})") for m in measures]
+    form.country_id.choices = reference_data_service.countries()
+    form.measure_id.choices = reference_data_service.climate_measures()
 
     if request.method == 'GET':
         form.country_id.data = str(cm.country_id)
@@ -117,18 +134,11 @@ def bulk_action():
         flash('No se seleccionaron relaciones.', 'warning')
         return redirect(url_for('country_climate_measure.list_country_climate_measure'))
 
-    count = 0
-    for cm_id in ids:
-        try:
-            cm_id_int = int(cm_id)
-            if action == 'delete':
-                if country_climate_measure_service.delete(cm_id_int):
-                    count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(country_climate_measure_service, action, ids, actions=('delete',))
 
     if action == 'delete':
-        flash(f'{count} relación(es) eliminada(s).', 'warning')
+        flash(f'{result.count} relación(es) eliminada(s).', 'warning')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('country_climate_measure.list_country_climate_measure'))
\ No newline at end of file
@@ -1,17 +1,39 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngCountryIndicatorService, MngCountryService, MngIndicatorService
+from aclimate_v3_orm.services import MngCountryIndicatorService
 from aclimate_v3_orm.schemas import CountryIndicatorCreate, CountryIndicatorUpdate
 from app.forms.country_indicator_form import CountryIndicatorForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, COUNTRY_INDICATOR
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, YES_NO_VALUES
 import json
+from app.utils.lazy import LazyService
 
 bp = Blueprint('country_indicator', __name__)
-country_indicator_service = MngCountryIndicatorService()
-country_service = MngCountryService()
-indicator_service = MngIndicatorService()
+country_indicator_service = LazyService(MngCountryIndicatorService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, COUNTRY_INDICATOR)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+country_indicator_list_query = ListQuery(
+    country_indicator_service,
+    search=['country.name', 'indicator.name', 'description', 'store', 'workspace'],
+    sort={'country': 'country.name', 'indicator': 'indicator.name'},
+    filters={
+        'country': 'country.name',
+        'indicator': 'indicator.name',
+        'spatial_forecast': ('spatial_forecast', YES_NO_VALUES),
+        'spatial_climate': ('spatial_climate', YES_NO_VALUES),
+        'location_forecast': ('location_forecast', YES_NO_VALUES),
+        'location_climate': ('location_climate', YES_NO_VALUES)
+    },
+    load=['country', 'indicator']
+)
 
 @bp.route('/country_indicator', methods=['GET', 'POST'])
 @login_required
@@ -20,10 +42,8 @@ def list_country_indicator():
     can_create = current_user.has_module_access(Module.INDICATORS_DATA.value, 'create')
     
     form = CountryIndicatorForm()
-    countries = country_service.get_all()
-    indicators = indicator_service.get_all()
-    form.country_id.choices = [(c.id, c.name) for c in countries]
-    form.indicator_id.choices = [(i.id, i.name) for i in indicators]
+    form.country_id.choices = reference_data_service.countries()
+    form.indicator_id.choices = reference_data_service.indicators()
 
     if form.validate_on_submit():
         if not can_create:
@@ -37,12 +57,14 @@ def list_country_indicator():
                 criteria_data = json.loads(form.criteria.data)
                 if not isinstance(criteria_data, dict):
                     flash(_('El campo Criterios debe ser un objeto JSON válido (diccionario).'), 'danger')
-                    ci_list = country_indicator_service.get_all()
-                    return render_template('country_indicator/list.html', country_indicators=ci_list, form=form, can_create=can_create)
+                    return render_list('country_indicator/list.html', 'country_indicator/_rows.html',
+                                       country_indicator_list_query, 'country_indicators',
+                                       form=form, can_create=can_create)
             except json.JSONDecodeError as e:
                 flash(_('El campo Criterios contiene un JSON inválido. Por favor, verifica el formato.'), 'danger')
-                ci_list = country_indicator_service.get_all()
-                return render_template('country_indicator/list.html', country_indicators=ci_list, form=form, can_create=can_create)
+                return render_list('country_indicator/list.html', 'country_indicator/_rows.html',
+                                   country_indicator_list_query, 'country_indicators',
+                                   form=form, can_create=can_create)
 
         try:
             new_ci = CountryIndicatorCreate(
@@ -62,11 +84,13 @@ def list_country_indicator():
             return redirect(url_for('country_indicator.list_country_indicator'))
         except Exception as e:
             flash(_('Error al crear la relación: ') + str(e), 'danger')
-            ci_list = country_indicator_service.get_all()
-            return render_template('country_indicator/list.html', country_indicators=ci_list, form=form, can_create=can_create)
+            return render_list('country_indicator/list.html', 'country_indicator/_rows.html',
+                               country_indicator_list_query, 'country_indicators',
+                               form=form, can_create=can_create)
 
-    ci_list = country_indicator_service.get_all()
-    return render_template('country_indicator/list.html', country_indicators=ci_list, form=form, can_create=can_create)
+    return render_list('country_indicator/list.html', 'country_indicator/_rows.html',
+                       country_indicator_list_query, 'country_indicators',
+                       form=form, can_create=can_create)
 
 @bp.route('/country_indicator/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -78,10 +102,8 @@ def edit_country_indicator(id):
         return redirect(url_for('country_indicator.list_country_indicator'))
 
     form = CountryIndicatorForm(obj=ci)
-    countries = country_service.get_all()
-    indicators = indicator_service.get_all()
-    form.country_id.choices = [(c.id, c.name) for c in countries]
-    form.indicator_id.choices = [(i.id, i.name) for i in indicators]
+    form.country_id.choices = reference_data_service.countries()
+    form.indicator_id.choices = reference_data_service.indicators()
 
     if request.method == 'GET':
         form.country_id.data = str(ci.country_id)
@@ -155,23 +177,13 @@ def bulk_action():
         flash('No se seleccionaron relaciones.', 'warning')
         return redirect(url_for('country_indicator.list_country_indicator'))
 
-    count = 0
-    for ci_id in ids:
-        try:
-            ci_id_int = int(ci_id)
-            if action == 'disable':
-                if country_indicator_service.delete(ci_id_int):
-                    count += 1
-            elif action == 'recover':
-                country_indicator_service.update(id=ci_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(country_indicator_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} relación(es) deshabilitada(s).', 'warning')
+        flash(f'{result.count} relación(es) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} relación(es) recuperada(s).', 'success')
+        flash(f'{result.count} relación(es) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('country_indicator.list_country_indicator'))
\ No newline at end of file
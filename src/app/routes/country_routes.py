@@ -6,9 +6,25 @@ from aclimate_v3_orm.schemas import CountryCreate, CountryUpdate
 from app.forms.country_form import CountryForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, COUNTRY, COUNTRY_INDICATOR
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('country', __name__)
-country_service = MngCountryService()
+country_service = LazyService(MngCountryService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, COUNTRY, COUNTRY_INDICATOR)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+country_list_query = ListQuery(
+    country_service,
+    search=['name', 'iso2'],
+    sort={'name': 'name', 'iso2': 'iso2'},
+    filters={'iso2': 'iso2', 'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 
 # Ruta: Lista de países
 @bp.route('/country', methods=['GET', 'POST'])
@@ -32,8 +48,9 @@ def list_country():
         flash(_('País agregado exitosamente.'), 'success')
         return redirect(url_for('country.list_country'))
 
-    countries = country_service.get_all()
-    return render_template('country/list.html', countries=countries, form=form, can_create=can_create)
+    return render_list('country/list.html', 'country/_rows.html',
+                       country_list_query, 'countries',
+                       form=form, can_create=can_create)
 
 # Ruta: Agregar país
 @bp.route('/country/add', methods=['GET', 'POST'])
@@ -113,23 +130,13 @@ def bulk_action():
         flash('No se seleccionaron países.', 'warning')
         return redirect(url_for('country.list_country'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if country_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                country_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(country_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} país(es) deshabilitado(s).', 'warning')
+        flash(f'{result.count} país(es) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} país(es) recuperado(s).', 'success')
+        flash(f'{result.count} país(es) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('country.list_country'))
\ No newline at end of file
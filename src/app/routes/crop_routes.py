@@ -6,9 +6,25 @@ from aclimate_v3_orm.schemas import CropCreate, CropUpdate
 from app.forms.crop_form import CropForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, CROP
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('crop', __name__)
-crop_service = MngCropService()
+crop_service = LazyService(MngCropService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, CROP)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+crop_list_query = ListQuery(
+    crop_service,
+    search=['name'],
+    sort={'name': 'name'},
+    filters={'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 
 @bp.route('/crop', methods=['GET', 'POST'])
 @login_required
@@ -31,8 +47,9 @@ def list_crop():
         flash(_('Cultivo agregado correctamente.'), 'success')
         return redirect(url_for('crop.list_crop'))
 
-    crop_list = crop_service.get_all()
-    return render_template('crop/list.html', crops=crop_list, form=form, can_create=can_create)
+    return render_list('crop/list.html', 'crop/_rows.html',
+                       crop_list_query, 'crops',
+                       form=form, can_create=can_create)
 
 @bp.route('/crop/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -89,23 +106,13 @@ def bulk_action():
         flash('No se seleccionaron cultivos.', 'warning')
         return redirect(url_for('crop.list_crop'))
 
-    count = 0
-    for crop_id in ids:
-        try:
-            crop_id_int = int(crop_id)
-            if action == 'disable':
-                if crop_service.delete(crop_id_int):
-                    count += 1
-            elif action == 'recover':
-                crop_service.update(id=crop_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(crop_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} cultivo(s) deshabilitado(s).', 'warning')
+        flash(f'{result.count} cultivo(s) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} cultivo(s) recuperado(s).', 'success')
+        flash(f'{result.count} cultivo(s) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('crop.list_crop'))
\ No newline at end of file
@@ -1,16 +1,37 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngCultivarService, MngCountryService, MngCropService
+from aclimate_v3_orm.services import MngCultivarService
 from aclimate_v3_orm.schemas import CultivarCreate, CultivarUpdate
 from app.forms.cultivar_form import CultivarForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, CULTIVAR
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES, YES_NO_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('cultivar', __name__)
-cultivar_service = MngCultivarService()
-country_service = MngCountryService()
-crop_service = MngCropService()
+cultivar_service = LazyService(MngCultivarService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, CULTIVAR)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+cultivar_list_query = ListQuery(
+    cultivar_service,
+    search=['name', 'country.name', 'crop.name'],
+    sort={'name': 'name', 'country': 'country.name', 'crop': 'crop.name', 'sort_order': 'sort_order'},
+    filters={
+        'country': 'country.name',
+        'crop': 'crop.name',
+        'sort_order': 'sort_order',
+        'rainfed': ('rainfed', YES_NO_VALUES),
+        'status': ('enable', STATUS_VALUES)
+    },
+    load=['country', 'crop']
+)
 
 @bp.route('/cultivar', methods=['GET', 'POST'])
 @login_required
@@ -20,8 +41,8 @@ def list_cultivar():
     
     form = CultivarForm()
     # Llenar dinámicamente las opciones de país y cultivo
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all()]
-    form.crop_id.choices = [(cr.id, cr.name) for cr in crop_service.get_all()]
+    form.country_id.choices = reference_data_service.countries()
+    form.crop_id.choices = reference_data_service.crops()
 
     if form.validate_on_submit():
         if not can_create:
@@ -40,8 +61,9 @@ def list_cultivar():
         flash(_('Cultivar agregado correctamente.'), 'success')
         return redirect(url_for('cultivar.list_cultivar'))
 
-    cultivar_list = cultivar_service.get_all()
-    return render_template('cultivar/list.html', cultivars=cultivar_list, form=form, can_create=can_create)
+    return render_list('cultivar/list.html', 'cultivar/_rows.html',
+                       cultivar_list_query, 'cultivars',
+                       form=form, can_create=can_create)
 
 @bp.route('/cultivar/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -53,8 +75,8 @@ def edit_cultivar(id):
         return redirect(url_for('cultivar.list_cultivar'))
 
     form = CultivarForm(obj=cultivar)
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all()]
-    form.crop_id.choices = [(cr.id, cr.name) for cr in crop_service.get_all()]
+    form.country_id.choices = reference_data_service.countries()
+    form.crop_id.choices = reference_data_service.crops()
 
     if request.method == 'GET':
         form.country_id.data = cultivar.country_id
@@ -108,23 +130,13 @@ def bulk_action():
         flash('No se seleccionaron cultivares.', 'warning')
         return redirect(url_for('cultivar.list_cultivar'))
 
-    count = 0
-    for cultivar_id in ids:
-        try:
-            cultivar_id_int = int(cultivar_id)
-            if action == 'disable':
-                if cultivar_service.delete(cultivar_id_int):
-                    count += 1
-            elif action == 'recover':
-                cultivar_service.update(id=cultivar_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(cultivar_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} cultivar(es) deshabilitado(s).', 'warning')
+        flash(f'{result.count} cultivar(es) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} cultivar(es) recuperado(s).', 'success')
+        flash(f'{result.count} cultivar(es) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('cultivar.list_cultivar'))
\ No newline at end of file
@@ -1,15 +1,28 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngDataSourceService, MngCountryService
+from aclimate_v3_orm.services import MngDataSourceService
 from aclimate_v3_orm.schemas import DataSourceCreate, DataSourceUpdate
 from app.forms.data_source_form import DataSourceForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('data_source', __name__)
-data_source_service = MngDataSourceService()
-country_service = MngCountryService()
+data_source_service = LazyService(MngDataSourceService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+data_source_list_query = ListQuery(
+    data_source_service,
+    search=['name', 'type', 'country.name'],
+    sort={'name': 'name', 'type': 'type', 'country': 'country.name'},
+    filters={'country': 'country.name', 'status': ('enable', STATUS_VALUES)},
+    load=['country']
+)
 
 @bp.route('/data_source', methods=['GET', 'POST'])
 @login_required
@@ -19,7 +32,7 @@ def list_data_source():
     
     form = DataSourceForm()
     # Aquí deberías llenar dinámicamente los países
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all_enable()]
+    form.country_id.choices = reference_data_service.countries(enabled_only=True)
 
     if form.validate_on_submit():
         if not can_create:
@@ -44,8 +57,9 @@ def list_data_source():
         except Exception as e:
             flash(_('Error al crear la fuente de datos: %(error)s') % {'error': str(e)}, 'danger')
 
-    data_source_list = data_source_service.get_all()
-    return render_template('data_source/list.html', data_sources=data_source_list, form=form, can_create=can_create)
+    return render_list('data_source/list.html', 'data_source/_rows.html',
+                       data_source_list_query, 'data_sources',
+                       form=form, can_create=can_create)
 
 
 @bp.route('/data_source/edit/<int:id>', methods=['GET', 'POST'])
@@ -58,7 +72,7 @@ def edit_data_source(id):
         return redirect(url_for('data_source.list_source'))
 
     form = DataSourceForm(obj=data_source)
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all_enable()]
+    form.country_id.choices = reference_data_service.countries(enabled_only=True)
     form.template.data = ''
 
     if request.method == 'GET':
@@ -120,23 +134,13 @@ def bulk_action():
         flash('No se seleccionaron fuentes.', 'warning')
         return redirect(url_for('data_source.list_data_source'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if data_source_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                data_source_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(data_source_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} fuente(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} fuente(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} fuente(s) recuperada(s).', 'success')
+        flash(f'{result.count} fuente(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('data_source.list_data_source'))
\ No newline at end of file
@@ -1,8 +1,23 @@
-from flask import Blueprint, jsonify, request
+import threading
+from concurrent.futures import Future
+
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy import text
+from aclimate_v3_orm.database import get_db
 from config import Config
+from app.utils import http_client, metrics
+from app.utils.cache import TTLCache
+from app.utils.fork import after_fork
 
 bp = Blueprint("health", __name__)
 
+# Results of the readiness checks, reused for READINESS_CACHE_TTL seconds per worker
+_check_cache = TTLCache(maxsize=8, ttl=Config.READINESS_CACHE_TTL)
+
+# Database probe in flight (shared by concurrent /ready calls while it runs)
+_db_probe = None
+_db_probe_lock = threading.Lock()
+
 
 def _validate_token():
     """Validate optional X-Health-Token header against configured HEALTH_TOKEN."""
@@ -11,6 +26,94 @@ def _validate_token():
     return request.headers.get("X-Health-Token") == Config.HEALTH_TOKEN
 
 
+def _cached(name, check):
+    """Run `check` at most once per READINESS_CACHE_TTL and return its result."""
+    result = _check_cache.get(name)
+    if result is None:
+        result = check()
+        _check_cache.set(name, result)
+    return result
+
+
+def _select_one():
+    """SELECT 1 through the application's engine pool (no dedicated connection)."""
+    try:
+        with get_db() as db:
+            db.execute(text("SELECT 1"))
+        return "connected"
+    except Exception:
+        return "disconnected"
+
+
+def _start_db_probe():
+    future = Future()
+    thread = threading.Thread(target=lambda: future.set_result(_select_one()), name="readiness-db", daemon=True)
+    thread.start()
+    return future
+
+
+def _check_database():
+    """
+    Database check bounded by READINESS_DB_TIMEOUT.
+
+    The engine has no connect or pool timeout of its own here, so the probe runs
+    in a daemon thread: an unreachable server or an exhausted pool reports
+    "disconnected" in time instead of hanging past the probe timeout. A probe
+    that is still stuck is reused instead of starting another one.
+    """
+    global _db_probe
+    with _db_probe_lock:
+        if _db_probe is None or _db_probe.done():
+            _db_probe = _start_db_probe()
+        probe = _db_probe
+    try:
+        return probe.result(timeout=Config.READINESS_DB_TIMEOUT)
+    except Exception:
+        return "disconnected"
+
+
+@after_fork
+def _reset_db_probe():
+    """The probe thread is not inherited by the worker."""
+    global _db_probe, _db_probe_lock
+    _db_probe = None
+    _db_probe_lock = threading.Lock()
+
+
+def _pool_stats():
+    """Size, checked-out and overflow connections of the engine pool."""
+    try:
+        with get_db() as db:
+            pool = db.get_bind().pool
+    except Exception:
+        return None
+    stats = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    return stats
+
+
+def _check_url(url):
+    """An HTTP service is reachable if it answers without a 5xx error (single attempt, no retries)."""
+    try:
+        response = http_client.get(url, retry=False, timeout=Config.READINESS_HTTP_TIMEOUT)
+        return "reachable" if response.status_code < 500 else "unreachable"
+    except Exception:
+        return "unreachable"
+
+
+def _check_keycloak():
+    return _check_url(
+        f"{Config.KEYCLOAK_SERVER_URL}/realms/{Config.KEYCLOAK_REALM}/.well-known/openid-configuration"
+    )
+
+
+def _check_api():
+    return _check_url(Config.API_BASE_URL)
+
+
 @bp.route("/health", methods=["GET"])
 def health_check():
     """Liveness probe - no external dependencies, immediate response."""
@@ -21,21 +124,25 @@ def health_check():
 
 @bp.route("/ready", methods=["GET"])
 def readiness_check():
-    """Readiness probe - verifies database connectivity."""
+    """Readiness probe - verifies database connectivity and, optionally, Keycloak and the API."""
     if not _validate_token():
         return jsonify(None), 404
 
-    checks = {"database": "disconnected"}
-    try:
-        import psycopg2
+    checks = {"database": _cached("database", _check_database)}
+    if Config.READINESS_CHECK_KEYCLOAK:
+        checks["keycloak"] = _cached("keycloak", _check_keycloak)
+    if Config.READINESS_CHECK_API:
+        checks["api"] = _cached("api", _check_api)
+
+    all_healthy = all(v in ("connected", "reachable") for v in checks.values())
+    # Pool statistics are informational and always current
+    checks["pool"] = _pool_stats()
+    return jsonify(checks), 200 if all_healthy else 503
 
-        dsn = Config.SQLALCHEMY_DATABASE_URI
-        if dsn:
-            conn = psycopg2.connect(dsn, connect_timeout=3)
-            conn.close()
-            checks["database"] = "connected"
-    except Exception:
-        checks["database"] = "disconnected"
 
-    all_healthy = all(v == "connected" for v in checks.values())
-    return jsonify(checks), 200 if all_healthy else 503
\ No newline at end of file
+@bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Request metrics in Prometheus text format, summed across workers when METRICS_DIR is set."""
+    if not _validate_token():
+        return jsonify(None), 404
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
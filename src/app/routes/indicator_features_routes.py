@@ -1,16 +1,28 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngCountryIndicatorService, MngIndicatorsFeaturesService
+from aclimate_v3_orm.services import MngIndicatorsFeaturesService
 from aclimate_v3_orm.schemas import IndicatorFeatureCreate, IndicatorFeatureUpdate
 from aclimate_v3_orm.enums import IndicatorFeatureType
 from app.forms.indicator_features_form import IndicatorFeaturesForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list
+from app.utils.lazy import LazyService
 
 bp = Blueprint('indicator_features', __name__)
-country_indicator_service = MngCountryIndicatorService()
-indicator_features_service = MngIndicatorsFeaturesService()
+indicator_features_service = LazyService(MngIndicatorsFeaturesService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+indicator_features_list_query = ListQuery(
+    indicator_features_service,
+    search=['country_indicator.country.name', 'country_indicator.indicator.name', 'title', 'description'],
+    sort={'country_indicator': 'country_indicator.country.name', 'title': 'title'},
+    load=['country_indicator.country', 'country_indicator.indicator']
+)
 
 @bp.route('/indicator_features', methods=['GET', 'POST'])
 @login_required
@@ -20,11 +32,7 @@ def list_indicator_features():
     
     form = IndicatorFeaturesForm()
     # Obtener todas las relaciones país-indicador
-    country_indicators = country_indicator_service.get_all()
-    form.country_indicator_id.choices = [
-        (ci.id, f"{ci.country.name} - {ci.indicator.name}")
-        for ci in country_indicators
-    ]
+    form.country_indicator_id.choices = reference_data_service.country_indicators()
     form.type.choices = [(t.value, _(t.value.capitalize())) for t in IndicatorFeatureType]
 
     if form.validate_on_submit():
@@ -44,36 +52,13 @@ def list_indicator_features():
             return redirect(url_for('indicator_features.list_indicator_features'))
         except Exception as e:
             flash(_('Error al crear la característica: ') + str(e), 'danger')
-            features_list = _get_features_with_relations()
-            return render_template('indicator_features/list.html', 
-                                 indicator_features=features_list, 
-                                 form=form, 
-                                 can_create=can_create)
+            return render_list('indicator_features/list.html', 'indicator_features/_rows.html',
+                               indicator_features_list_query, 'indicator_features',
+                               form=form, can_create=can_create)
 
-    features_list = _get_features_with_relations()
-    
-    return render_template('indicator_features/list.html', 
-                         indicator_features=features_list, 
-                         form=form, 
-                         can_create=can_create)
-
-def _get_features_with_relations():
-    """Helper function to get features with their country_indicator relations"""
-    from aclimate_v3_orm.database import get_db
-    from aclimate_v3_orm.models import MngIndicatorsFeatures, MngCountryIndicator, MngCountry, MngIndicator
-    from sqlalchemy.orm import joinedload
-    
-    with get_db() as session:
-        features = session.query(MngIndicatorsFeatures)\
-            .options(joinedload(MngIndicatorsFeatures.country_indicator)
-                    .joinedload(MngCountryIndicator.country))\
-            .options(joinedload(MngIndicatorsFeatures.country_indicator)
-                    .joinedload(MngCountryIndicator.indicator))\
-            .all()
-        
-        # Detach objects from session to use them outside
-        session.expunge_all()
-        return features
+    return render_list('indicator_features/list.html', 'indicator_features/_rows.html',
+                       indicator_features_list_query, 'indicator_features',
+                       form=form, can_create=can_create)
 
 @bp.route('/indicator_features/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -101,11 +86,7 @@ def edit_indicator_features(id):
         session.expunge_all()
 
     form = IndicatorFeaturesForm(obj=if_item)
-    country_indicators = country_indicator_service.get_all()
-    form.country_indicator_id.choices = [
-        (ci.id, f"{ci.country.name} - {ci.indicator.name}")
-        for ci in country_indicators
-    ]
+    form.country_indicator_id.choices = reference_data_service.country_indicators()
     form.type.choices = [(t.value, _(t.value.capitalize())) for t in IndicatorFeatureType]
 
     if request.method == 'GET':
@@ -151,19 +132,12 @@ def bulk_action():
         flash(_('No se seleccionaron características.'), 'warning')
         return redirect(url_for('indicator_features.list_indicator_features'))
 
-    count = 0
-    for feature_id in ids:
-        try:
-            feature_id_int = int(feature_id)
-            if action == 'disable':
-                if indicator_features_service.delete(feature_id_int):
-                    count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(indicator_features_service, action, ids, actions={'disable': 'delete'})
 
     if action == 'disable':
-        flash(f'{count} característica(s) eliminada(s).', 'warning')
+        flash(f'{result.count} característica(s) eliminada(s).', 'warning')
     else:
         flash('Acción no reconocida.', 'danger')
     
+    flash_bulk_failures(result)
     return redirect(url_for('indicator_features.list_indicator_features'))
@@ -6,9 +6,25 @@ from aclimate_v3_orm.schemas import IndicatorCategoryCreate, IndicatorCategoryUp
 from app.forms.indicator_category_form import IndicatorCategoryForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, INDICATOR_CATEGORY
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('indicator_category', __name__)
-category_service = MngIndicatorCategoryService()
+category_service = LazyService(MngIndicatorCategoryService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, INDICATOR_CATEGORY)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+indicator_category_list_query = ListQuery(
+    category_service,
+    search=['name', 'description'],
+    sort={'name': 'name'},
+    filters={'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 
 @bp.route('/indicator_category', methods=['GET', 'POST'])
 @login_required
@@ -31,8 +47,9 @@ def list_indicator_category():
         flash(_('Categoría agregada correctamente.'), 'success')
         return redirect(url_for('indicator_category.list_indicator_category'))
 
-    category_list = category_service.get_all()
-    return render_template('indicator_category/list.html', categories=category_list, form=form, can_create=can_create)
+    return render_list('indicator_category/list.html', 'indicator_category/_rows.html',
+                       indicator_category_list_query, 'categories',
+                       form=form, can_create=can_create)
 
 @bp.route('/indicator_category/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -89,23 +106,13 @@ def bulk_action():
         flash('No se seleccionaron categorías.', 'warning')
         return redirect(url_for('indicator_category.list_indicator_category'))
 
-    count = 0
-    for category_id in ids:
-        try:
-            category_id_int = int(category_id)
-            if action == 'disable':
-                if category_service.delete(category_id_int):
-                    count += 1
-            elif action == 'recover':
-                category_service.update(id=category_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(category_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} categoría(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} categoría(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} categoría(s) recuperada(s).', 'success')
+        flash(f'{result.count} categoría(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('indicator_category.list_indicator_category'))
\ No newline at end of file
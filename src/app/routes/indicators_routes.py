@@ -1,16 +1,32 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngIndicatorService, MngIndicatorCategoryService
+from aclimate_v3_orm.services import MngIndicatorService
 from aclimate_v3_orm.schemas import IndicatorCreate, IndicatorUpdate
 from aclimate_v3_orm.enums import IndicatorsType, Period
 from app.forms.indicator_form import IndicatorForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, INDICATOR, COUNTRY_INDICATOR
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('indicator', __name__)
-indicator_service = MngIndicatorService()
-category_service = MngIndicatorCategoryService()
+indicator_service = LazyService(MngIndicatorService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, INDICATOR, COUNTRY_INDICATOR)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+indicator_list_query = ListQuery(
+    indicator_service,
+    search=['name', 'short_name', 'type', 'temporality', 'category.name', 'description'],
+    sort={'name': 'name', 'short_name': 'short_name', 'unit': 'unit', 'category': 'category.name'},
+    filters={'status': ('enable', STATUS_VALUES)},
+    load=['category']
+)
 
 @bp.route('/indicator', methods=['GET', 'POST'])
 @login_required
@@ -24,8 +40,7 @@ def list_indicator():
     # Llenar dinámicamente las temporalidades desde el Enum
     form.temporality.choices = [(p.value, _(p.value)) for p in Period]
     # Llenar dinámicamente las categorías
-    categories = category_service.get_all()
-    form.indicator_category_id.choices = [(cat.id, cat.name) for cat in categories]
+    form.indicator_category_id.choices = reference_data_service.indicator_categories()
 
     if form.validate_on_submit():
         if not can_create:
@@ -46,8 +61,9 @@ def list_indicator():
         flash(_('Indicador agregado correctamente.'), 'success')
         return redirect(url_for('indicator.list_indicator'))
 
-    indicator_list = indicator_service.get_all()
-    return render_template('indicator/list.html', indicators=indicator_list, form=form, can_create=can_create)
+    return render_list('indicator/list.html', 'indicator/_rows.html',
+                       indicator_list_query, 'indicators',
+                       form=form, can_create=can_create)
 
 @bp.route('/indicator/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -64,8 +80,7 @@ def edit_indicator(id):
     # Llenar dinámicamente las temporalidades desde el Enum
     form.temporality.choices = [(p.value, _(p.value)) for p in Period]
     # Llenar dinámicamente las categorías
-    categories = category_service.get_all()
-    form.indicator_category_id.choices = [(cat.id, cat.name) for cat in categories]
+    form.indicator_category_id.choices = reference_data_service.indicator_categories()
 
     # Preseleccionar los valores actuales cuando es GET
     if request.method == 'GET':
@@ -124,23 +139,13 @@ def bulk_action():
         flash('No se seleccionaron indicadores.', 'warning')
         return redirect(url_for('indicator.list_indicator'))
 
-    count = 0
-    for indicator_id in ids:
-        try:
-            indicator_id_int = int(indicator_id)
-            if action == 'disable':
-                if indicator_service.delete(indicator_id_int):
-                    count += 1
-            elif action == 'recover':
-                indicator_service.update(id=indicator_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(indicator_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} indicador(es) deshabilitado(s).', 'warning')
+        flash(f'{result.count} indicador(es) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} indicador(es) recuperado(s).', 'success')
+        flash(f'{result.count} indicador(es) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('indicator.list_indicator'))
\ No newline at end of file
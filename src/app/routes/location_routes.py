@@ -1,19 +1,47 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from aclimate_v3_orm.services import MngAdmin2Service, MngAdmin1Service, MngLocationService, MngCountryService, MngSourceService
+from aclimate_v3_orm.services import MngAdmin2Service, MngAdmin1Service, MngLocationService
 from aclimate_v3_orm.schemas import LocationCreate, LocationUpdate
 from app.forms.location_form import LocationForm
 from app.forms.location_import_form import LocationImportForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
-from app.services.location_import_service import LocationImportService
+from app.services.import_job_service import ImportJobService, STATUS_COMPLETED
+from app.services.location_lookup_service import LocationLookupService
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('location', __name__)
-country_service = MngCountryService()
-location_service = MngLocationService()
-adm2_service = MngAdmin2Service()
-adm1_service = MngAdmin1Service()
-source_service = MngSourceService()
+location_service = LazyService(MngLocationService)
+adm2_service = LazyService(MngAdmin2Service)
+adm1_service = LazyService(MngAdmin1Service)
+import_job_service = LazyService(ImportJobService)
+reference_data_service = LazyService(ReferenceDataService)
+location_lookup_service = LazyService(LocationLookupService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+location_list_query = ListQuery(
+    location_service,
+    search=['name', 'ext_id', 'source.name', 'admin_2.name', 'admin_2.admin_1.name', 'admin_2.admin_1.country.name'],
+    sort={
+        'name': 'name',
+        'ext_id': 'ext_id',
+        'source': 'source.name',
+        'admin1': 'admin_2.admin_1.name',
+        'admin2': 'admin_2.name',
+        'country': 'admin_2.admin_1.country.name'
+    },
+    filters={
+        'country': 'admin_2.admin_1.country.name',
+        'source': 'source.name',
+        'admin1': 'admin_2.admin_1.name',
+        'admin2': 'admin_2.name',
+        'status': ('enable', STATUS_VALUES)
+    },
+    load=['admin_2.admin_1.country', 'source']
+)
 
 
 # Ruta: Listar y agregar con modal
@@ -24,11 +52,11 @@ def list_location():
     can_create = current_user.has_module_access(Module.GEOGRAPHIC.value, 'create')
     
     form = LocationForm()
-    form.country.choices = [(0, '---------')] + [(a.id, a.name) for a in country_service.get_all()]
+    form.country.choices = [(0, '---------')] + reference_data_service.countries()
     # Solo la opción vacía para selects dependientes
     form.admin_1_id.choices = [(0, '---------')]
     form.admin_2_id.choices = [(0, '---------')]
-    form.source_id.choices = [(0, '---------')] + [(s.id, s.name) for s in source_service.get_all()]
+    form.source_id.choices = [(0, '---------')] + reference_data_service.sources()
 
     # Si es POST, se poblan los choices según lo enviado (para que WTForms valide correctamente)
     if form.country.data:
@@ -56,15 +84,16 @@ def list_location():
         flash('Locación agregada correctamente.', 'success')
         return redirect(url_for('location.list_location'))
 
-    location_list = location_service.get_all()
-    return render_template('location/list.html', location=location_list, form=form, can_create=can_create)
+    return render_list('location/list.html', 'location/_rows.html',
+                       location_list_query, 'location',
+                       form=form, can_create=can_create)
 
 # Ruta: Agregar como pantalla independiente
 @bp.route('/location/add', methods=['GET', 'POST'])
 @login_required
 def add_location():
     form = LocationForm()
-    form.country.choices = [(a.id, a.name) for a in country_service.get_all()]
+    form.country.choices = reference_data_service.countries()
 
     if form.validate_on_submit():
         new_location = LocationCreate(
@@ -94,8 +123,8 @@ def edit_location(id):
         return redirect(url_for('location.list_location'))
 
     form = LocationForm(obj=loc)
-    form.country.choices = [(0, '---------')] + [(a.id, a.name) for a in country_service.get_all()]
-    form.source_id.choices = [(0, '---------')] + [(s.id, s.name) for s in source_service.get_all()]
+    form.country.choices = [(0, '---------')] + reference_data_service.countries()
+    form.source_id.choices = [(0, '---------')] + reference_data_service.sources()
     
     # Obtener el ADM2 actual de la locación
     adm2 = adm2_service.get_by_id(loc.admin_2_id)
@@ -193,6 +222,18 @@ def get_admin2_by_admin1(admin1_id):
     adm2_list = adm2_service.get_all(filters={"admin_1_id": admin1_id, "enable": True})
     return jsonify([{"id": a.id, "name": a.name} for a in adm2_list])
 
+@bp.route('/api/locations/search')
+@login_required
+def search_locations():
+    """Autocompletado de locaciones: ?q=texto&country_id=&admin1_id=&limit="""
+    results = location_lookup_service.search(
+        query=request.args.get('q', ''),
+        country_id=request.args.get('country_id', type=int),
+        admin1_id=request.args.get('admin1_id', type=int),
+        limit=request.args.get('limit', type=int)
+    )
+    return jsonify(results)
+
 @bp.route('/location/bulk_action', methods=['POST'])
 @login_required
 @require_module_access(Module.GEOGRAPHIC, permission_type='delete')
@@ -203,25 +244,15 @@ def bulk_action():
         flash('No se seleccionaron locaciones.', 'warning')
         return redirect(url_for('location.list_location'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if location_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                location_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(location_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} locación(es) deshabilitada(s).', 'warning')
+        flash(f'{result.count} locación(es) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} locación(es) recuperada(s).', 'success')
+        flash(f'{result.count} locación(es) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('location.list_location'))
 
 
@@ -233,44 +264,30 @@ def import_location():
     form = LocationImportForm()
     
     # Obtener lista de países para el select
-    countries = country_service.get_all()
-    form.country_id.choices = [(c.id, c.name) for c in countries]
+    form.country_id.choices = reference_data_service.countries()
     
     if form.validate_on_submit():
-        # Leer el archivo
-        file = form.csv_file.data
-        file_content = file.read()
-        
-        # Importar usando el servicio
-        import_service = LocationImportService()
-        stats = import_service.import_from_csv(
-            file_content=file_content,
-            country_id=form.country_id.data
+        # Encolar la importación; el progreso se consulta desde la página
+        job_id = import_job_service.submit(
+            file_storage=form.csv_file.data,
+            country_id=form.country_id.data,
+            username=current_user.username
         )
-        
-        # Mostrar resultados
-        if stats['locations_created'] > 0:
-            flash(f"✓ {stats['locations_created']} locación(es) creada(s)", 'success')
-        
-        if stats['adm1_created'] > 0:
-            flash(f"✓ {stats['adm1_created']} división(es) administrativa(s) nivel 1 creada(s)", 'info')
-            
-        if stats['adm2_created'] > 0:
-            flash(f"✓ {stats['adm2_created']} división(es) administrativa(s) nivel 2 creada(s)", 'info')
-        
-        if stats['sources_created'] > 0:
-            flash(f"✓ {stats['sources_created']} fuente(s) de datos creada(s)", 'info')
-        
-        if stats['locations_skipped'] > 0:
-            flash(f"⚠ {stats['locations_skipped']} locación(es) omitida(s)", 'warning')
-        
-        if stats['errors']:
-            flash(f"✗ {len(stats['errors'])} error(es) encontrado(s)", 'danger')
-            for error in stats['errors'][:10]:  # Mostrar solo los primeros 10 errores
-                flash(error, 'danger')
-            if len(stats['errors']) > 10:
-                flash(f"... y {len(stats['errors']) - 10} error(es) más", 'danger')
-        
-        return render_template('location/import.html', form=form, stats=stats)
+        flash('Importación iniciada. Puedes seguir usando la aplicación mientras se procesa el archivo.', 'info')
+        return redirect(url_for('location.import_location', job=job_id))
+    
+    job = import_job_service.get(request.args.get('job'))
+    stats = job['stats'] if job and job['status'] == STATUS_COMPLETED else None
     
-    return render_template('location/import.html', form=form, stats=None)
+    return render_template('location/import.html', form=form, stats=stats, job=job)
+
+
+# Ruta: Progreso de una importación (JSON)
+@bp.route('/location/import/jobs/<job_id>')
+@login_required
+@require_module_access(Module.GEOGRAPHIC, permission_type='create')
+def import_location_status(job_id):
+    job = import_job_service.get(job_id)
+    if not job:
+        return jsonify({'error': 'Importación no encontrada'}), 404
+    return jsonify(job)
@@ -5,6 +5,7 @@ from app.models.User import User
 from app.services.oauth_service import OAuthService
 from app import login_manager
 from app.decorators import token_required
+from app.utils.session_store import regenerate_session
 import logging
 
 logger = logging.getLogger(__name__)
@@ -86,6 +87,8 @@ def auth_callback():
         
         # Autenticar usuario con información de Keycloak
         # Nota: El usuario debe existir en BD ya que se crea desde el panel admin
+        # ID de sesión nuevo al iniciar sesión (sin efecto con sesiones de cookie)
+        regenerate_session()
         user = User.authenticate_oauth(token_data, user_info)
         
         if user:
@@ -115,6 +118,7 @@ def logout():
         id_token = session.get('id_token')
         
         # Limpiar sesión local
+        User.invalidate_cache(current_user.keycloak_id)
         session.clear()
         logout_user()
         
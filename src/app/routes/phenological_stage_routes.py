@@ -1,15 +1,42 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngPhenologicalStageService, MngCropService
+from aclimate_v3_orm.services import MngPhenologicalStageService
 from aclimate_v3_orm.schemas import PhenologicalStageCreate, PhenologicalStageUpdate
 from app.forms.phenological_stage_form import PhenologicalStageForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, PHENOLOGICAL_STAGE
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('phenological_stage', __name__)
-stage_service = MngPhenologicalStageService()
-crop_service = MngCropService()
+stage_service = LazyService(MngPhenologicalStageService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, PHENOLOGICAL_STAGE)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+phenological_stage_list_query = ListQuery(
+    stage_service,
+    search=['name', 'short_name', 'crop.name'],
+    sort={
+        'name': 'name',
+        'short_name': 'short_name',
+        'crop': 'crop.name',
+        'order': 'order_stage',
+        'duration': 'duration_avg_day'
+    },
+    filters={
+        'crop': 'crop.name',
+        'order': 'order_stage',
+        'duration': 'duration_avg_day',
+        'status': ('enable', STATUS_VALUES)
+    },
+    load=['crop']
+)
 
 @bp.route('/phenological_stage', methods=['GET', 'POST'])
 @login_required
@@ -19,7 +46,7 @@ def list_phenological_stages():
     
     form = PhenologicalStageForm()
     # Llenar dinámicamente las opciones de cultivos
-    form.crop.choices = [(crop.id, crop.name) for crop in crop_service.get_all()]
+    form.crop.choices = reference_data_service.crops()
 
     if form.validate_on_submit():
         if not can_create:
@@ -39,8 +66,9 @@ def list_phenological_stages():
         flash(_('Etapa fenológica agregada correctamente.'), 'success')
         return redirect(url_for('phenological_stage.list_phenological_stages'))
 
-    stages = stage_service.get_all()
-    return render_template('phenological_stage/list.html', stages=stages, form=form, can_create=can_create)
+    return render_list('phenological_stage/list.html', 'phenological_stage/_rows.html',
+                       phenological_stage_list_query, 'stages',
+                       form=form, can_create=can_create)
 
 @bp.route('/phenological_stage/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -53,7 +81,7 @@ def edit_phenological_stage(id):
 
     form = PhenologicalStageForm(obj=stage)
     # Llenar opciones de cultivos
-    form.crop.choices = [(crop.id, crop.name) for crop in crop_service.get_all()]
+    form.crop.choices = reference_data_service.crops()
 
     if request.method == 'GET':
         form.crop.data = stage.crop_id
@@ -107,23 +135,13 @@ def bulk_action():
         flash('No se seleccionaron etapas.', 'warning')
         return redirect(url_for('phenological_stage.list_phenological_stages'))
 
-    count = 0
-    for stage_id in ids:
-        try:
-            stage_id_int = int(stage_id)
-            if action == 'disable':
-                if stage_service.delete(stage_id_int):
-                    count += 1
-            elif action == 'recover':
-                stage_service.update(id=stage_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(stage_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} etapa(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} etapa(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} etapa(s) recuperada(s).', 'success')
+        flash(f'{result.count} etapa(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('phenological_stage.list_phenological_stages'))
\ No newline at end of file
@@ -1,16 +1,28 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import PhenologicalStageStressService, MngPhenologicalStageService, MngStressService
+from aclimate_v3_orm.services import PhenologicalStageStressService
 from aclimate_v3_orm.schemas import PhenologicalStageStressCreate, PhenologicalStageStressUpdate
 from app.forms.phenological_stage_stress_form import PhenologicalStageStressForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('phenological_stage_stress', __name__)
-pss_service = PhenologicalStageStressService()
-stage_service = MngPhenologicalStageService()
-stress_service = MngStressService()
+pss_service = LazyService(PhenologicalStageStressService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+phenological_stage_stress_list_query = ListQuery(
+    pss_service,
+    search=['stress.name', 'phenological_stage.name', 'min', 'max'],
+    sort={'stress': 'stress.name', 'stage': 'phenological_stage.name', 'min': 'min', 'max': 'max'},
+    filters={'stress': 'stress.name', 'stage': 'phenological_stage.name', 'status': ('enable', STATUS_VALUES)},
+    load=['stress', 'phenological_stage']
+)
 
 @bp.route('/phenological_stage_stress', methods=['GET', 'POST'])
 @login_required
@@ -18,8 +30,8 @@ stress_service = MngStressService()
 def list_phenological_stage_stress():
     form = PhenologicalStageStressForm()
     # Llenar dinámicamente las opciones de estrés y etapa fenológica
-    form.stress_id.choices = [(s.id, s.name) for s in stress_service.get_all_enable()]
-    form.phenological_stage_id.choices = [(ps.id, ps.name) for ps in stage_service.get_all_enable()]
+    form.stress_id.choices = reference_data_service.stresses(enabled_only=True)
+    form.phenological_stage_id.choices = reference_data_service.phenological_stages(enabled_only=True)
 
     if form.validate_on_submit():
         new_pss = PhenologicalStageStressCreate(
@@ -33,9 +45,10 @@ def list_phenological_stage_stress():
         flash(_('Parámetro de estrés por etapa agregado correctamente.'), 'success')
         return redirect(url_for('phenological_stage_stress.list_phenological_stage_stress'))
 
-    pss_list = pss_service.get_all()
     can_create = current_user.has_module_access(Module.CROP_DATA.value, 'create')
-    return render_template('phenological_stage_stress/list.html', pss_list=pss_list, form=form, can_create=can_create)
+    return render_list('phenological_stage_stress/list.html', 'phenological_stage_stress/_rows.html',
+                       phenological_stage_stress_list_query, 'pss_list',
+                       form=form, can_create=can_create)
 
 @bp.route('/phenological_stage_stress/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -47,8 +60,8 @@ def edit_phenological_stage_stress(id):
         return redirect(url_for('phenological_stage_stress.list_phenological_stage_stress'))
 
     form = PhenologicalStageStressForm(obj=pss)
-    form.stress_id.choices = [(s.id, s.name) for s in stress_service.get_all()]
-    form.phenological_stage_id.choices = [(ps.id, ps.name) for ps in stage_service.get_all()]
+    form.stress_id.choices = reference_data_service.stresses()
+    form.phenological_stage_id.choices = reference_data_service.phenological_stages()
 
     if request.method == 'GET':
         form.stress_id.data = pss.stress_id
@@ -101,23 +114,13 @@ def bulk_action():
         flash('No se seleccionaron parámetros.', 'warning')
         return redirect(url_for('phenological_stage_stress.list_phenological_stage_stress'))
 
-    count = 0
-    for pss_id in ids:
-        try:
-            pss_id_int = int(pss_id)
-            if action == 'disable':
-                if pss_service.delete(pss_id_int):
-                    count += 1
-            elif action == 'recover':
-                pss_service.update(id=pss_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(pss_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} parámetro(s) deshabilitado(s).', 'warning')
+        flash(f'{result.count} parámetro(s) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} parámetro(s) recuperado(s).', 'success')
+        flash(f'{result.count} parámetro(s) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('phenological_stage_stress.list_phenological_stage_stress'))
\ No newline at end of file
@@ -5,9 +5,11 @@ from app.services.role_service import RoleService
 from app.decorators import token_required
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.utils.bulk_actions import run_bulk_action_each, flash_bulk_failures
+from app.utils.lazy import LazyService
 
 bp = Blueprint('role', __name__)
-role_service = RoleService()
+role_service = LazyService(RoleService)
 
 # Ruta: Lista de roles
 @bp.route('/role', methods=['GET'])
@@ -140,17 +142,11 @@ def bulk_action():
         flash('No se seleccionaron roles.', 'warning')
         return redirect(url_for('role.list_role'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            if action == 'disable':
-                if role_service.delete(loc_id):
-                    count += 1
-        except Exception:
-            continue
+    result = run_bulk_action_each(action, ids, {'disable': role_service.delete})
 
     if action == 'disable':
-        flash(f'{count} roles deshabilitados.', 'warning')
+        flash(f'{result.count} roles deshabilitados.', 'warning')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('role.list_role'))
\ No newline at end of file
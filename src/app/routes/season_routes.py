@@ -1,16 +1,55 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngSeasonService, MngLocationService, MngCropService
+from aclimate_v3_orm.services import MngSeasonService
 from aclimate_v3_orm.schemas import SeasonCreate, SeasonUpdate
 from app.forms.season_form import SeasonForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.location_lookup_service import LocationLookupService
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, SEASON
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('season', __name__)
-season_service = MngSeasonService()
-location_service = MngLocationService()
-crop_service = MngCropService()
+season_service = LazyService(MngSeasonService)
+reference_data_service = LazyService(ReferenceDataService)
+location_lookup_service = LazyService(LocationLookupService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, SEASON)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+season_list_query = ListQuery(
+    season_service,
+    search=['location.name', 'crop.name'],
+    sort={
+        'location': 'location.name',
+        'crop': 'crop.name',
+        'planting_start': 'planting_start',
+        'planting_end': 'planting_end',
+        'season_start': 'season_start',
+        'season_end': 'season_end'
+    },
+    filters={'location': 'location.name', 'crop': 'crop.name', 'status': ('enable', STATUS_VALUES)},
+    load=['location', 'crop']
+)
+
+def _set_location_choice(form) -> bool:
+    """
+    Dejar como única opción del select la locación seleccionada (el resto se
+    busca con /api/locations/search) y devolver si esa locación existe
+    """
+    option = location_lookup_service.get_option(form.location_id.data)
+    form.location_id.choices = [option] if option else []
+    return option is not None
+
+def _check_location(form, location_exists: bool) -> bool:
+    """Validar la locación enviada con la consulta de una fila de `_set_location_choice`"""
+    if not location_exists:
+        form.location_id.errors.append(_('La localidad seleccionada no existe.'))
+    return location_exists
 
 @bp.route('/season', methods=['GET', 'POST'])
 @login_required
@@ -20,10 +59,10 @@ def list_season():
     
     form = SeasonForm()
     # Llenar dinámicamente las opciones de localidad y cultivo
-    form.location_id.choices = [(l.id, l.name) for l in location_service.get_all()]
-    form.crop_id.choices = [(c.id, c.name) for c in crop_service.get_all()]
+    location_exists = _set_location_choice(form)
+    form.crop_id.choices = reference_data_service.crops()
 
-    if form.validate_on_submit():
+    if form.validate_on_submit() and _check_location(form, location_exists):
         if not can_create:
             flash(_('No tienes permiso para crear temporadas.'), 'danger')
             return redirect(url_for('season.list_season'))
@@ -46,8 +85,10 @@ def list_season():
         except Exception as e:
             flash(_('Error al crear la temporada: %(error)s') % {'error': str(e)}, 'error')
 
-    season_list = season_service.get_all()
-    return render_template('season/list.html', seasons=season_list, form=form, can_create=can_create)
+    return render_list('season/list.html', 'season/_rows.html',
+                       season_list_query, 'seasons',
+                       form=form, can_create=can_create,
+                       location_countries=reference_data_service.countries())
 
 @bp.route('/season/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -59,14 +100,14 @@ def edit_season(id):
         return redirect(url_for('season.list_season'))
 
     form = SeasonForm(obj=season)
-    form.location_id.choices = [(l.id, l.name) for l in location_service.get_all()]
-    form.crop_id.choices = [(c.id, c.name) for c in crop_service.get_all()]
-
     if request.method == 'GET':
         form.location_id.data = season.location_id
         form.crop_id.data = season.crop_id
 
-    if form.validate_on_submit():
+    location_exists = _set_location_choice(form)
+    form.crop_id.choices = reference_data_service.crops()
+
+    if form.validate_on_submit() and _check_location(form, location_exists):
         try:
             update_data = SeasonUpdate(
                 location_id=form.location_id.data,
@@ -85,7 +126,8 @@ def edit_season(id):
         except Exception as e:
             flash(_('Error al actualizar la temporada: %(error)s') % {'error': str(e)}, 'error')
 
-    return render_template('season/edit.html', form=form, season=season)
+    return render_template('season/edit.html', form=form, season=season,
+                           location_countries=reference_data_service.countries())
 
 @bp.route('/season/delete/<int:id>')
 @login_required
@@ -120,23 +162,13 @@ def bulk_action():
         flash('No se seleccionaron temporadas.', 'warning')
         return redirect(url_for('season.list_season'))
 
-    count = 0
-    for season_id in ids:
-        try:
-            season_id_int = int(season_id)
-            if action == 'disable':
-                if season_service.delete(season_id_int):
-                    count += 1
-            elif action == 'recover':
-                season_service.update(id=season_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(season_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} temporada(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} temporada(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} temporada(s) recuperada(s).', 'success')
+        flash(f'{result.count} temporada(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('season.list_season'))
\ No newline at end of file
@@ -4,19 +4,30 @@ from flask_login import login_required, current_user
 from flask_babel import _
 from werkzeug.utils import secure_filename
 from flask import current_app
-from aclimate_v3_orm.services import MngSetupService, MngCultivarService, MngSoilService, MngSeasonService, MngConfigurationFileService
+from aclimate_v3_orm.services import MngSetupService, MngConfigurationFileService
 from aclimate_v3_orm.schemas import SetupCreate, SetupUpdate, ConfigurationFileCreate  
 from app.forms.setup_form import SetupForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
 from config import Config
+from app.utils.lazy import LazyService
 
 
 bp = Blueprint('setup', __name__)
-setup_service = MngSetupService()
-cultivar_service = MngCultivarService()
-soil_service = MngSoilService()
-season_service = MngSeasonService()
+setup_service = LazyService(MngSetupService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+setup_list_query = ListQuery(
+    setup_service,
+    search=['cultivar.name', 'soil.name'],
+    sort={'cultivar': 'cultivar.name', 'soil': 'soil.name', 'season': 'season.id', 'frequency': 'frequency'},
+    filters={'cultivar': 'cultivar.name', 'soil': 'soil.name', 'status': ('enable', STATUS_VALUES)},
+    load=['cultivar', 'soil', 'season', 'configuration_files']
+)
 
 @bp.route('/setup', methods=['GET', 'POST'])
 @login_required
@@ -26,9 +37,9 @@ def list_setup():
     
     form = SetupForm()
     # Llenar dinámicamente las opciones de los select
-    form.cultivar_id.choices = [(c.id, c.name) for c in cultivar_service.get_all_enable()]
-    form.soil_id.choices = [(s.id, s.name) for s in soil_service.get_all_enable()]
-    form.season_id.choices = [(se.id) for se in season_service.get_all_enable()]
+    form.cultivar_id.choices = reference_data_service.cultivars(enabled_only=True)
+    form.soil_id.choices = reference_data_service.soils(enabled_only=True)
+    form.season_id.choices = reference_data_service.season_ids()
 
     if form.validate_on_submit():
         if not can_create:
@@ -53,8 +64,9 @@ def list_setup():
         flash(_('Configuración agregada correctamente.'), 'success')
         return redirect(url_for('setup.list_setup'))
 
-    setup_list = setup_service.get_all()
-    return render_template('setup/list.html', setup_list=setup_list, form=form, can_create=can_create)
+    return render_list('setup/list.html', 'setup/_rows.html',
+                       setup_list_query, 'setup_list',
+                       form=form, can_create=can_create)
 
 @bp.route('/setup/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -66,9 +78,9 @@ def edit_setup(id):
         return redirect(url_for('setup.list_setup'))
 
     form = SetupForm(obj=setup)
-    form.cultivar_id.choices = [(c.id, c.name) for c in cultivar_service.get_all()]
-    form.soil_id.choices = [(s.id, s.name) for s in soil_service.get_all()]
-    form.season_id.choices = [(se.id) for se in season_service.get_all_enable()]
+    form.cultivar_id.choices = reference_data_service.cultivars()
+    form.soil_id.choices = reference_data_service.soils()
+    form.season_id.choices = reference_data_service.season_ids()
 
     if request.method == 'GET':
         form.cultivar_id.data = setup.cultivar_id
@@ -183,23 +195,13 @@ def bulk_action():
         flash('No se seleccionaron configuraciones.', 'warning')
         return redirect(url_for('setup.list_setup'))
 
-    count = 0
-    for setup_id in ids:
-        try:
-            setup_id_int = int(setup_id)
-            if action == 'disable':
-                if setup_service.delete(setup_id_int):
-                    count += 1
-            elif action == 'recover':
-                setup_service.update(id=setup_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(setup_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} configuración(es) deshabilitada(s).', 'warning')
+        flash(f'{result.count} configuración(es) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} configuración(es) recuperada(s).', 'success')
+        flash(f'{result.count} configuración(es) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('setup.list_setup'))
\ No newline at end of file
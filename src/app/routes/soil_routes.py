@@ -1,16 +1,31 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from flask_babel import _
-from aclimate_v3_orm.services import MngSoilService, MngCountryService, MngCropService
+from aclimate_v3_orm.services import MngSoilService
 from aclimate_v3_orm.schemas import SoilCreate, SoilUpdate
 from app.forms.soil_form import SoilForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import ReferenceDataService, invalidate_on_write, SOIL
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('soil', __name__)
-soil_service = MngSoilService()
-country_service = MngCountryService()
-crop_service = MngCropService()
+soil_service = LazyService(MngSoilService)
+reference_data_service = LazyService(ReferenceDataService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, SOIL)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+soil_list_query = ListQuery(
+    soil_service,
+    search=['name', 'country.name', 'crop.name'],
+    sort={'name': 'name', 'country': 'country.name', 'crop': 'crop.name', 'sort_order': 'sort_order'},
+    filters={'country': 'country.name', 'crop': 'crop.name', 'sort_order': 'sort_order', 'status': ('enable', STATUS_VALUES)},
+    load=['country', 'crop']
+)
 
 @bp.route('/soil', methods=['GET', 'POST'])
 @login_required
@@ -20,8 +35,8 @@ def list_soil():
     
     form = SoilForm()
     # Llenar dinámicamente las opciones de país y cultivo
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all()]
-    form.crop_id.choices = [(cr.id, cr.name) for cr in crop_service.get_all()]
+    form.country_id.choices = reference_data_service.countries()
+    form.crop_id.choices = reference_data_service.crops()
 
     if form.validate_on_submit():
         if not can_create:
@@ -39,8 +54,9 @@ def list_soil():
         flash(_('Suelo agregado correctamente.'), 'success')
         return redirect(url_for('soil.list_soil'))
 
-    soil_list = soil_service.get_all()
-    return render_template('soil/list.html', soils=soil_list, form=form, can_create=can_create)
+    return render_list('soil/list.html', 'soil/_rows.html',
+                       soil_list_query, 'soils',
+                       form=form, can_create=can_create)
 
 @bp.route('/soil/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -52,8 +68,8 @@ def edit_soil(id):
         return redirect(url_for('soil.list_soil'))
 
     form = SoilForm(obj=soil)
-    form.country_id.choices = [(c.id, c.name) for c in country_service.get_all()]
-    form.crop_id.choices = [(cr.id, cr.name) for cr in crop_service.get_all()]
+    form.country_id.choices = reference_data_service.countries()
+    form.crop_id.choices = reference_data_service.crops()
 
     if request.method == 'GET':
         form.country_id.data = soil.country_id
@@ -106,23 +122,13 @@ def bulk_action():
         flash('No se seleccionaron suelos.', 'warning')
         return redirect(url_for('soil.list_soil'))
 
-    count = 0
-    for soil_id in ids:
-        try:
-            soil_id_int = int(soil_id)
-            if action == 'disable':
-                if soil_service.delete(soil_id_int):
-                    count += 1
-            elif action == 'recover':
-                soil_service.update(id=soil_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(soil_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} suelo(s) deshabilitado(s).', 'warning')
+        flash(f'{result.count} suelo(s) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} suelo(s) recuperado(s).', 'success')
+        flash(f'{result.count} suelo(s) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('soil.list_soil'))
\ No newline at end of file
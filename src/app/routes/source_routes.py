@@ -7,9 +7,25 @@ from aclimate_v3_orm.schemas import SourceCreate, SourceUpdate
 from app.forms.source_form import SourceForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, SOURCE
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('source', __name__)
-source_service = MngSourceService()
+source_service = LazyService(MngSourceService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, SOURCE)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+source_list_query = ListQuery(
+    source_service,
+    search=['name', 'source_type'],
+    sort={'name': 'name', 'type': 'source_type'},
+    filters={'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 SOURCE_TYPE_CHOICES = [
     (SourceType.MANUAL.value, _("Manual")),
     (SourceType.AUTOMATIC.value, _("Automático")),
@@ -41,8 +57,9 @@ def list_source():
         flash(_('Fuente agregada correctamente.'), 'success')
         return redirect(url_for('source.list_source'))
 
-    source_list = source_service.get_all()
-    return render_template('source/list.html', sources=source_list, form=form, can_create=can_create)
+    return render_list('source/list.html', 'source/_rows.html',
+                       source_list_query, 'sources',
+                       form=form, can_create=can_create)
 
 
 @bp.route('/source/edit/<int:id>', methods=['GET', 'POST'])
@@ -109,23 +126,13 @@ def bulk_action():
         flash('No se seleccionaron fuentes.', 'warning')
         return redirect(url_for('source.list_source'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            loc_id_int = int(loc_id)
-            if action == 'disable':
-                if source_service.delete(loc_id_int):
-                    count += 1
-            elif action == 'recover':
-                source_service.update(id=loc_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(source_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} fuente(s) deshabilitada(s).', 'warning')
+        flash(f'{result.count} fuente(s) deshabilitada(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} fuente(s) recuperada(s).', 'success')
+        flash(f'{result.count} fuente(s) recuperada(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('source.list_source'))
\ No newline at end of file
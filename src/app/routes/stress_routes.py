@@ -7,9 +7,25 @@ from aclimate_v3_orm.enums import StressCategory
 from app.forms.stress_form import StressForm
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.services.reference_data_service import invalidate_on_write, STRESS
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.pagination import ListQuery, render_list, STATUS_VALUES
+from app.utils.lazy import LazyService
 
 bp = Blueprint('stress', __name__)
-stress_service = MngStressService()
+stress_service = LazyService(MngStressService)
+
+# Las escrituras invalidan las listas de opciones que dependen de esta entidad
+invalidate_on_write(bp, STRESS)
+
+# Listado paginado: búsqueda, filtros y orden resueltos en SQL
+stress_list_query = ListQuery(
+    stress_service,
+    search=['name', 'short_name', 'category', 'description'],
+    sort={'name': 'name', 'short_name': 'short_name', 'category': 'category'},
+    filters={'short_name': 'short_name', 'status': ('enable', STATUS_VALUES)},
+    load=[]
+)
 
 @bp.route('/stress', methods=['GET', 'POST'])
 @login_required
@@ -37,8 +53,9 @@ def list_stress():
         flash(_('Estrés agregado correctamente.'), 'success')
         return redirect(url_for('stress.list_stress'))
 
-    stress_list = stress_service.get_all()
-    return render_template('stress/list.html', stresses=stress_list, form=form, can_create=can_create)
+    return render_list('stress/list.html', 'stress/_rows.html',
+                       stress_list_query, 'stresses',
+                       form=form, can_create=can_create)
 
 @bp.route('/stress/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
@@ -102,23 +119,13 @@ def bulk_action():
         flash('No se seleccionaron estreses.', 'warning')
         return redirect(url_for('stress.list_stress'))
 
-    count = 0
-    for stress_id in ids:
-        try:
-            stress_id_int = int(stress_id)
-            if action == 'disable':
-                if stress_service.delete(stress_id_int):
-                    count += 1
-            elif action == 'recover':
-                stress_service.update(id=stress_id_int, obj_in={"enable": True})
-                count += 1
-        except Exception:
-            continue
+    result = run_bulk_action(stress_service, action, ids)
 
     if action == 'disable':
-        flash(f'{count} estrés(es) deshabilitado(s).', 'warning')
+        flash(f'{result.count} estrés(es) deshabilitado(s).', 'warning')
     elif action == 'recover':
-        flash(f'{count} estrés(es) recuperado(s).', 'success')
+        flash(f'{result.count} estrés(es) recuperado(s).', 'success')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('stress.list_stress'))
\ No newline at end of file
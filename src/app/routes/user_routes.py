@@ -2,20 +2,28 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import current_user
 from app.services.user_service import UserService
 from app.services.role_service import RoleService
+from app.services.permission_sync_service import PermissionSyncService, PERMISSION_FIELDS
+from app.services.user_provisioning_service import UserProvisioningService, CSV_FIELDS, STATUS_COMPLETED
 from app.forms.user_form import UserForm, UserEditForm
+from app.forms.user_import_form import UserImportForm
 from app.decorators import token_required
 from app.decorators.permissions import require_module_access
 from app.config.permissions import Module
+from app.models.User import User
 from aclimate_v3_orm.services import MngCountryService
 from aclimate_v3_orm.services.user_access_service import UserAccessService
 from aclimate_v3_orm.schemas import UserAccessCreate
 from aclimate_v3_orm.enums import Modules
+from app.utils.bulk_actions import run_bulk_action, flash_bulk_failures
+from app.utils.lazy import LazyService
 
 bp = Blueprint('user', __name__)
-user_service = UserService()
-role_service = RoleService()
-country_service = MngCountryService()
-user_access_service = UserAccessService()
+user_service = LazyService(UserService)
+role_service = LazyService(RoleService)
+country_service = LazyService(MngCountryService)
+user_access_service = LazyService(UserAccessService)
+permission_sync_service = LazyService(PermissionSyncService)
+user_provisioning_service = LazyService(UserProvisioningService)
 
 # Ruta: Listar usuarios
 @bp.route('/user', methods=['GET'])
@@ -28,6 +36,11 @@ def list_user():
     form = UserForm()
     users = user_service.get_all()
     
+    # Informar los usuarios cuyos datos no se pudieron obtener de Keycloak
+    failed_users = [u for u in users if u.get('keycloak_error')]
+    if failed_users:
+        flash(f'No se pudieron obtener los datos de Keycloak de {len(failed_users)} usuario(s).', 'warning')
+    
     # Obtener países desde el servicio del ORM
     countries_objs = country_service.get_all_enable(enabled=True)
     # Convertir a diccionarios para compatibilidad con el template
@@ -103,6 +116,64 @@ def create_user():
     
     return redirect(url_for('user.list_user'))
 
+# Ruta: Alta masiva de usuarios desde CSV
+@bp.route('/user/import', methods=['GET', 'POST'])
+@token_required
+@require_module_access(Module.USER_MANAGEMENT, permission_type='create')
+def import_users():
+    """Crear usuarios en Keycloak y en la base de datos local desde un CSV, en segundo plano"""
+    roles = role_service.get_all()
+    
+    form = UserImportForm()
+    form.role_id.choices = [(0, 'Sin rol por defecto')] + [(role['id'], role['name']) for role in roles]
+    
+    if form.validate_on_submit():
+        countries = [
+            {'id': c.id, 'name': c.name}
+            for c in country_service.get_all_enable(enabled=True)
+        ]
+        try:
+            rows = user_provisioning_service.parse_csv(
+                stream=form.csv_file.data.stream,
+                roles=roles,
+                countries=countries,
+                default_role_id=form.role_id.data or None
+            )
+        except (ValueError, UnicodeDecodeError) as e:
+            flash(f'Error leyendo el archivo: {str(e)}', 'danger')
+            rows = None
+        
+        if rows == []:
+            flash('El archivo no contiene usuarios.', 'warning')
+        elif rows:
+            # El alta continúa en segundo plano; el progreso se consulta desde la página
+            job_id = user_provisioning_service.submit(
+                rows=rows,
+                filename=form.csv_file.data.filename,
+                username=current_user.username
+            )
+            flash('Alta de usuarios iniciada. Puedes seguir usando la aplicación mientras se procesa el archivo.', 'info')
+            return redirect(url_for('user.import_users', job=job_id))
+    
+    job = user_provisioning_service.get(request.args.get('job'))
+    return render_template(
+        'user/import.html',
+        form=form,
+        job=job,
+        completed=job is not None and job['status'] == STATUS_COMPLETED,
+        csv_fields=CSV_FIELDS
+    )
+
+# Ruta: Progreso de un alta masiva (JSON)
+@bp.route('/user/import/jobs/<job_id>')
+@token_required
+@require_module_access(Module.USER_MANAGEMENT, permission_type='create')
+def import_users_status(job_id):
+    job = user_provisioning_service.get(job_id)
+    if not job:
+        return jsonify({'error': 'Alta de usuarios no encontrada'}), 404
+    return jsonify(job)
+
 # Ruta: Eliminar usuario
 @bp.route('/user/delete/<int:user_id>', methods=['POST'])
 @token_required
@@ -137,6 +208,8 @@ def delete_user(user_id):
             keycloak_user_id=keycloak_id
         )
         
+        User.invalidate_cache(keycloak_id)
+        
         if success:
             flash('Usuario eliminado de Keycloak y deshabilitado en base de datos.', 'success')
         else:
@@ -353,6 +426,9 @@ def edit_user(user_id):
                         flash(f'Error al actualizar países: {str(e)}', 'warning')
                         has_errors = True
                 
+                # Los accesos del usuario pudieron cambiar: descartar su sesión cacheada
+                User.invalidate_cache(keycloak_id)
+                
                 # Mostrar mensajes finales
                 if success_messages and not has_errors:
                     message = 'Usuario actualizado exitosamente: ' + ', '.join(success_messages)
@@ -403,19 +479,17 @@ def bulk_action():
         flash('No se seleccionaron usuarios.', 'warning')
         return redirect(url_for('user.list_user'))
 
-    count = 0
-    for loc_id in ids:
-        try:
-            if action == 'disable':
-                if user_service.delete(loc_id):
-                    count += 1
-        except Exception:
-            continue
+    # Deshabilitar usuarios es un cambio de `enable` en la base local (Keycloak no se modifica)
+    result = run_bulk_action(user_service.orm_service, action, ids, actions=('disable',))
 
+    if result.count:
+        User.invalidate_cache()
+    
     if action == 'disable':
-        flash(f'{count} usuarios deshabilitado(s).', 'warning')
+        flash(f'{result.count} usuarios deshabilitado(s).', 'warning')
     else:
         flash('Acción no reconocida.', 'danger')
+    flash_bulk_failures(result)
     return redirect(url_for('user.list_user'))
 
 # Ruta: Gestionar permisos de usuario
@@ -475,48 +549,37 @@ def manage_permissions(user_id):
             try:
                 # Procesar los permisos enviados desde el formulario
                 # El formulario envía: country_{country_id}_module_{module_value}_permission
-                
-                # Primero, eliminar todos los permisos existentes del usuario
-                # (luego crearemos los nuevos)
-                for country in countries:
-                    user_access_service.delete_by_user_and_country(user_id, country['id'])
-                
-                # Crear nuevos permisos según el formulario
-                created_count = 0
+                permissions = {}
                 for country in countries:
                     country_id = country['id']
                     
                     for module in available_modules:
                         module_value = module['value']
+                        prefix = f"country_{country_id}_module_{module_value}"
                         
                         # Verificar si este módulo está seleccionado para este país
-                        checkbox_name = f"country_{country_id}_module_{module_value}"
-                        if checkbox_name in request.form:
-                            # Obtener permisos CRUD
-                            create_perm = f"country_{country_id}_module_{module_value}_create" in request.form
-                            read_perm = f"country_{country_id}_module_{module_value}_read" in request.form
-                            update_perm = f"country_{country_id}_module_{module_value}_update" in request.form
-                            delete_perm = f"country_{country_id}_module_{module_value}_delete" in request.form
-                            
-                            # Crear el acceso
-                            try:
-                                module_enum = Modules(module_value)
-                                access_data = UserAccessCreate(
-                                    user_id=user_id,
-                                    country_id=country_id,
-                                    role_id=user['role_id'],
-                                    module=module_enum,
-                                    create=create_perm,
-                                    read=read_perm,
-                                    update=update_perm,
-                                    delete=delete_perm
-                                )
-                                user_access_service.create(access_data)
-                                created_count += 1
-                            except Exception as e:
-                                print(f"Error creando permiso: {e}")
+                        if prefix in request.form:
+                            permissions[(country_id, module_value)] = {
+                                field: f"{prefix}_{field}" in request.form
+                                for field in PERMISSION_FIELDS
+                            }
+                
+                # Aplicar solo las diferencias con los permisos actuales, en una transacción
+                result = permission_sync_service.sync(
+                    user_id=user_id,
+                    role_id=user['role_id'],
+                    country_ids=[country['id'] for country in countries],
+                    permissions=permissions
+                )
+                
+                if result.changed:
+                    User.invalidate_cache(user.get('keycloak_id'))
                 
-                flash(f'Permisos actualizados exitosamente. {created_count} permisos configurados.', 'success')
+                flash(
+                    f'Permisos actualizados exitosamente. {result.configured} permisos configurados '
+                    f'({result.created} nuevos, {result.updated} modificados, {result.deleted} eliminados).',
+                    'success'
+                )
                 return redirect(url_for('user.manage_permissions', user_id=user_id))
                 
             except Exception as e:
@@ -2,6 +2,7 @@ from typing import Optional, Dict
 import requests
 from flask import current_app, session
 from config import Config
+from app.utils import http_client
 
 class AuthService:
     """Servicio para manejar autenticación"""
@@ -10,7 +11,7 @@ class AuthService:
     def authenticate(username: str, password: str) -> Optional[Dict]:
         """Autentica al usuario contra la API de Keycloak"""
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{Config.API_BASE_URL}/auth/login",
                 json={
                     'username': username,
@@ -55,7 +56,7 @@ class AuthService:
             if not token:
                 return False
             
-            response = requests.get(
+            response = http_client.get(
                 f"{Config.API_BASE_URL}/auth/token/validate",
                 headers={'Authorization': f'Bearer {token}'},
                 timeout=10
@@ -70,7 +71,7 @@ class AuthService:
     def logout(token: str) -> bool:
         """Realizar logout en la API"""
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{Config.API_BASE_URL}/auth/logout",
                 headers={'Authorization': f'Bearer {token}'},
                 timeout=10
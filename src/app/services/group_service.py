@@ -2,6 +2,7 @@ from typing import List, Dict
 import requests
 from flask import current_app, session
 from config import Config
+from app.utils import http_client
 
 class GroupService:
     """Servicio para manejar grupos/países desde la API de Keycloak"""
@@ -41,7 +42,7 @@ class GroupService:
     def get_all(self) -> List[Dict]:
         """Obtener todos los grupos/países desde la API"""
         try:
-            response = requests.get(
+            response = http_client.get(
                 f"{Config.API_BASE_URL}/groups/list",
                 headers=self._get_auth_headers(),
                 timeout=10
@@ -97,7 +98,7 @@ class GroupService:
             headers = self._get_auth_headers()
             headers['Content-Type'] = 'application/json'
             
-            response = requests.post(
+            response = http_client.post(
                 f"{Config.API_BASE_URL}/groups/create",
                 headers=headers,
                 json=data,
@@ -131,7 +132,7 @@ class GroupService:
             headers = self._get_auth_headers()
             headers['Content-Type'] = 'application/json'
             
-            response = requests.post(
+            response = http_client.post(
                 f"{Config.API_BASE_URL}/users/assign-groups",
                 headers=headers,
                 json=data,
@@ -165,7 +166,7 @@ class GroupService:
             headers = self._get_auth_headers()
             headers['Content-Type'] = 'application/json'
             
-            response = requests.post(
+            response = http_client.post(
                 f"{Config.API_BASE_URL}/users/remove-groups",
                 headers=headers,
                 json=data,
@@ -0,0 +1,128 @@
+"""
+Servicio para ejecutar importaciones de locaciones en segundo plano
+"""
+import os
+import time
+from typing import Dict, Optional
+from flask import current_app
+from config import Config
+from app.utils.jobs import (
+    JobExecutor, JobStore, STATUS_QUEUED, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+)
+from app.services.location_import_service import LocationImportService
+from app.services.reference_data_service import ReferenceDataService, ADMIN1, SOURCE
+
+_executor = JobExecutor(Config.IMPORT_JOB_WORKERS, 'location-import')
+
+
+class ImportJobService:
+    """
+    Servicio para encolar importaciones de locaciones y consultar su progreso
+
+    Cada trabajo se persiste como un archivo JSON en la carpeta de subidas, de
+    modo que cualquier worker de gunicorn puede responder a las consultas de
+    progreso aunque el trabajo se ejecute en otro.
+    """
+
+    def __init__(self, jobs_folder: Optional[str] = None):
+        self.jobs = JobStore(
+            folder=jobs_folder or os.path.join(Config.UPLOAD_FOLDER, 'import_jobs'),
+            stale_after=Config.IMPORT_JOB_STALE_AFTER,
+            queued_expire=Config.IMPORT_JOB_QUEUED_EXPIRE,
+            retention=Config.IMPORT_JOB_RETENTION,
+            stale_error='La importación se interrumpió antes de terminar.'
+        )
+
+    def submit(self, file_storage, country_id: int, username: Optional[str] = None) -> str:
+        """
+        Guardar el CSV subido y encolar su importación
+
+        Args:
+            file_storage: Archivo recibido en el formulario (werkzeug FileStorage)
+            country_id: ID del país para las locaciones
+            username: Usuario que solicita la importación
+
+        Returns:
+            ID del trabajo creado
+        """
+        job_id = self.jobs.new_id()
+
+        # Se copia por bloques al disco: la petición no retiene el archivo en memoria
+        csv_path = self.jobs.path(job_id, 'csv')
+        file_storage.save(csv_path)
+
+        job = {
+            'id': job_id,
+            'status': STATUS_QUEUED,
+            'country_id': country_id,
+            'filename': file_storage.filename,
+            'username': username,
+            'rows_total': self._count_rows(csv_path),
+            'rows_processed': 0,
+            'stats': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        self.jobs.save(job)
+
+        app = current_app._get_current_object()
+        _executor.submit(self._run, app, job_id)
+        current_app.logger.info(f"Importación de locaciones encolada: {job_id} ({job['filename']})")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Obtener el registro de un trabajo o None si no existe"""
+        return self.jobs.get(job_id)
+
+    def _count_rows(self, csv_path: str) -> int:
+        """Estimar el número de filas de datos (líneas sin contar la cabecera)"""
+        lines = 0
+        with open(csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                lines += block.count(b'\n')
+        return max(lines - 1, 0)
+
+    def _run(self, app, job_id: str) -> None:
+        """Ejecutar la importación en un hilo del pool"""
+        with app.app_context():
+            job = self.jobs.load(job_id)
+
+            job['status'] = STATUS_RUNNING
+            job['started_at'] = time.time()
+            self.jobs.save(job)
+
+            def on_progress(rows_processed: int) -> None:
+                job['rows_processed'] = rows_processed
+                self.jobs.save(job)
+
+            csv_path = self.jobs.path(job_id, 'csv')
+            try:
+                with open(csv_path, 'rb') as f:
+                    stats = LocationImportService().import_from_stream(
+                        stream=f,
+                        country_id=job['country_id'],
+                        on_progress=on_progress
+                    )
+                job['stats'] = stats
+                job['status'] = STATUS_COMPLETED
+            except Exception as e:
+                # La transacción no se confirmó: no quedó guardada ninguna fila
+                app.logger.error(f"Error en la importación {job_id}: {e}")
+                job['error'] = f"No se guardó ninguna fila: {e}"
+                job['stats'] = None
+                job['status'] = STATUS_FAILED
+            finally:
+                job['finished_at'] = time.time()
+                self.jobs.save(job)
+                # La importación se confirma en una sola transacción al final: solo si terminó bien
+                # pudo crear ADM1 y fuentes
+                if job['status'] == STATUS_COMPLETED:
+                    ReferenceDataService().bump(ADMIN1, SOURCE)
+                try:
+                    os.remove(csv_path)
+                except OSError:
+                    pass
+
+            app.logger.info(f"Importación de locaciones {job_id} finalizada: {job['status']}")
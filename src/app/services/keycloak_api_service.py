@@ -2,20 +2,25 @@
 Servicio para interactuar con la API de Keycloak vía endpoints externos
 """
 import requests
-from typing import Dict, List, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
 from flask import current_app
+from app.utils import http_client
+from app.services.service_token_manager import service_token_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Error de una consulta a la API Admin cuyo token de servicio Keycloak rechazó
+UNAUTHORIZED_ERROR = "Keycloak rechazó el token de servicio (401)"
+
 
 class KeycloakAPIService:
     """Servicio para llamar a los endpoints de la API de Keycloak"""
     
     def __init__(self):
         self.api_base_url = None
-        self._service_token = None
-        self._service_token_expires_at = 0
     
     def _get_api_url(self) -> str:
         """Obtener la URL base de la API desde la configuración"""
@@ -33,54 +38,17 @@ class KeycloakAPIService:
     def _get_service_token(self) -> Optional[str]:
         """
         Obtener token de servicio usando client credentials
-        Cachea el token hasta que expire
-        """
-        import time
         
-        # Si hay token cacheado y no ha expirado, usarlo
-        if self._service_token and time.time() < self._service_token_expires_at:
-            return self._service_token
-        
-        try:
-            # Obtener credenciales del cliente
-            keycloak_server = current_app.config.get('KEYCLOAK_SERVER_URL')
-            realm = current_app.config.get('KEYCLOAK_REALM')
-            client_id = current_app.config.get('KEYCLOAK_CLIENT_ID')
-            client_secret = current_app.config.get('KEYCLOAK_CLIENT_SECRET')
-            
-            logger.info(f"Requesting service token - Server: {keycloak_server}, Realm: {realm}, Client: {client_id}")
-            
-            token_url = f"{keycloak_server}/realms/{realm}/protocol/openid-connect/token"
-            
-            # Solicitar token usando client credentials
-            data = {
-                'grant_type': 'client_credentials',
-                'client_id': client_id,
-                'client_secret': client_secret
-            }
-            
-            response = requests.post(token_url, data=data, timeout=30)
-            
-            logger.info(f"Service token response: {response.status_code}")
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self._service_token = token_data['access_token']
-                # Guardar tiempo de expiración (con 60 segundos de margen)
-                expires_in = token_data.get('expires_in', 300)
-                self._service_token_expires_at = time.time() + expires_in - 60
-                
-                logger.info("Service token obtained successfully")
-                return self._service_token
-            else:
-                logger.error(f"Failed to get service token: {response.status_code} - {response.text}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error getting service token: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        El token es del proceso (ver ServiceTokenManager): todas las instancias
+        lo comparten, se renueva antes de vencer y un solo hilo lo pide a la vez.
+        """
+        return service_token_manager.get_token()
+    
+    def _renew_service_token(self, rejected: str) -> Optional[str]:
+        """Descartar un token de servicio que Keycloak rechazó (401) y obtener uno nuevo"""
+        logger.warning("Keycloak rejected the service token (401), requesting a new one")
+        service_token_manager.invalidate(rejected)
+        return service_token_manager.get_token()
     
     # ==================== USUARIOS ====================
     
@@ -132,7 +100,7 @@ class KeycloakAPIService:
             
             logger.info(f"Creating user in Keycloak: {username}")
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 json=payload,
                 headers=self._get_headers(token),
@@ -198,7 +166,7 @@ class KeycloakAPIService:
             
             logger.info(f"Updating user in Keycloak: {user_id}")
             
-            response = requests.patch(
+            response = http_client.patch(
                 url,
                 json=payload,
                 headers=self._get_headers(token),
@@ -236,7 +204,7 @@ class KeycloakAPIService:
             
             logger.info(f"Deleting user from Keycloak: {user_id}")
             
-            response = requests.delete(
+            response = http_client.delete(
                 url,
                 json=payload,
                 headers=self._get_headers(token),
@@ -254,6 +222,74 @@ class KeycloakAPIService:
             logger.error(f"Error deleting user from Keycloak: {e}")
             return False
     
+    def _get_admin_users_url(self) -> str:
+        """URL base de usuarios en la API Admin de Keycloak"""
+        keycloak_server = current_app.config.get('KEYCLOAK_SERVER_URL')
+        realm = current_app.config.get('KEYCLOAK_REALM')
+        return f"{keycloak_server}/admin/realms/{realm}/users"
+    
+    def _fetch_admin_user(self, users_url: str, service_token: str, user_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Consultar un usuario en la API Admin de Keycloak
+        No depende del contexto de Flask, por lo que puede ejecutarse en hilos auxiliares
+        
+        Returns:
+            Tupla (usuario, error) - error es None si la consulta fue exitosa
+        """
+        try:
+            response = http_client.get(
+                f"{users_url}/{user_id}",
+                headers=self._get_headers(service_token),
+                timeout=30
+            )
+        except requests.exceptions.RequestException as e:
+            return None, f"Error de conexión con Keycloak: {e}"
+        
+        if response.status_code == 200:
+            return response.json(), None
+        if response.status_code == 404:
+            return None, "Usuario no encontrado en Keycloak"
+        if response.status_code == 401:
+            return None, UNAUTHORIZED_ERROR
+        return None, f"Keycloak respondió {response.status_code}"
+    
+    def find_user_by_username(self, username: str) -> Optional[Dict]:
+        """
+        Buscar un usuario de Keycloak por nombre de usuario exacto (API Admin)
+
+        Returns:
+            Dict del usuario, o None si no existe
+
+        Raises:
+            RuntimeError: Si no se pudo consultar Keycloak (no se sabe si existe)
+        """
+        service_token = self._get_service_token()
+        for attempt in range(2):
+            if not service_token:
+                raise RuntimeError("Token de servicio de Keycloak no disponible")
+
+            try:
+                response = http_client.get(
+                    self._get_admin_users_url(),
+                    params={'username': username, 'exact': 'true'},
+                    headers=self._get_headers(service_token),
+                    timeout=30
+                )
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"Error de conexión con Keycloak: {e}")
+
+            # Token rechazado antes de su vencimiento (ej. sesión revocada): reintentar una vez con otro
+            if response.status_code != 401 or attempt:
+                break
+            service_token = self._renew_service_token(service_token)
+
+        if response.status_code != 200:
+            raise RuntimeError(f"Keycloak respondió {response.status_code}")
+        for user in response.json():
+            if user.get('username', '').lower() == username.lower():
+                return user
+        return None
+
     def get_user_by_id(self, user_id: str) -> Optional[Dict]:
         """
         Obtener información de un usuario de Keycloak por su ID
@@ -273,25 +309,20 @@ class KeycloakAPIService:
                 logger.warning("No service token available to get user from Keycloak")
                 return None
             
-            # Llamar directamente a la API Admin de Keycloak
-            keycloak_server = current_app.config.get('KEYCLOAK_SERVER_URL')
-            realm = current_app.config.get('KEYCLOAK_REALM')
-            url = f"{keycloak_server}/admin/realms/{realm}/users/{user_id}"
-            
             logger.debug(f"Getting user from Keycloak Admin API: {user_id}")
             
-            response = requests.get(
-                url,
-                headers=self._get_headers(service_token),
-                timeout=30
-            )
+            users_url = self._get_admin_users_url()
+            user, error = self._fetch_admin_user(users_url, service_token, user_id)
+            if error == UNAUTHORIZED_ERROR:
+                service_token = self._renew_service_token(service_token)
+                if service_token:
+                    user, error = self._fetch_admin_user(users_url, service_token, user_id)
             
-            if response.status_code == 200:
-                user = response.json()
+            if user:
                 logger.debug(f"User retrieved from Keycloak: {user_id}")
                 return user
             else:
-                logger.warning(f"Could not retrieve user {user_id}: {response.status_code} - {response.text}")
+                logger.warning(f"Could not retrieve user {user_id}: {error}")
                 return None
                 
         except Exception as e:
@@ -300,6 +331,58 @@ class KeycloakAPIService:
             traceback.print_exc()
             return None
     
+    def get_users_by_ids(self, user_ids: Iterable[str]) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Obtener varios usuarios de Keycloak en paralelo con un pool de hilos acotado
+        
+        Args:
+            user_ids: IDs de los usuarios en Keycloak
+        
+        Returns:
+            Tupla (usuarios, errores): usuarios encontrados por ID y mensaje de
+            error por cada ID que no se pudo obtener
+        """
+        user_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+        if not user_ids:
+            return {}, {}
+        
+        service_token = self._get_service_token()
+        if not service_token:
+            logger.warning("No service token available to get users from Keycloak")
+            return {}, {uid: "Token de servicio de Keycloak no disponible" for uid in user_ids}
+        
+        users_url = self._get_admin_users_url()
+        max_workers = min(current_app.config.get('KEYCLOAK_MAX_WORKERS', 8), len(user_ids))
+        
+        users = {}
+        errors = {}
+        # Cada hilo corre en una copia del contexto de la petición (instrumentación de llamadas HTTP)
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='keycloak-users') as executor:
+            def fetch(token: str, ids: List[str]) -> None:
+                results = executor.map(
+                    lambda uid: context.copy().run(self._fetch_admin_user, users_url, token, uid),
+                    ids
+                )
+                for user_id, (user, error) in zip(ids, results):
+                    if user:
+                        users[user_id] = user
+                        errors.pop(user_id, None)
+                    else:
+                        errors[user_id] = error
+
+            fetch(service_token, user_ids)
+            # Token rechazado: reintentar una vez los usuarios afectados con un token nuevo
+            rejected = [uid for uid, error in errors.items() if error == UNAUTHORIZED_ERROR]
+            if rejected:
+                service_token = self._renew_service_token(service_token)
+                if service_token:
+                    fetch(service_token, rejected)
+        
+        if errors:
+            logger.warning(f"Could not retrieve {len(errors)} of {len(user_ids)} users from Keycloak")
+        return users, errors
+    
     def assign_role_to_user(self, token: str, user_id: str, role_id: str) -> bool:
         """
         Asignar un rol a un usuario en Keycloak
@@ -322,7 +405,7 @@ class KeycloakAPIService:
             
             logger.info(f"Assigning role {role_id} to user {user_id}")
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 json=payload,
                 headers=self._get_headers(token),
@@ -372,7 +455,7 @@ class KeycloakAPIService:
             
             logger.info(f"Creating role in Keycloak: {name}")
             
-            response = requests.post(
+            response = http_client.post(
                 url,
                 json=payload,
                 headers=self._get_headers(token),
@@ -406,7 +489,7 @@ class KeycloakAPIService:
             
             logger.info(f"Deleting role from Keycloak: {role_id}")
             
-            response = requests.delete(
+            response = http_client.delete(
                 url,
                 headers=self._get_headers(token),
                 timeout=30
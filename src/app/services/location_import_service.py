@@ -3,28 +3,101 @@ Servicio para importar locaciones desde un archivo CSV
 """
 import csv
 import io
-from typing import Dict, List, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
 from flask import current_app
-from aclimate_v3_orm.services import (
-    MngLocationService,
-    MngAdmin1Service,
-    MngAdmin2Service,
-    MngSourceService,
-    MngCountryService
-)
-from aclimate_v3_orm.schemas import LocationCreate, Admin1Create, Admin2Create, SourceCreate
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from aclimate_v3_orm.database import get_db
+from aclimate_v3_orm.models import MngLocation, MngAdmin1, MngAdmin2, MngSource
 from aclimate_v3_orm.enums import SourceType
 
 
-class LocationImportService:
-    """Servicio para importar locaciones desde CSV"""
-    
+class SourceIndex:
+    """
+    Índice nombre→ID de fuentes, insensible a mayúsculas y espacios
+
+    Se construye una vez por importación y se actualiza al crear fuentes, de
+    modo que resolver una fuente es O(1) y no requiere consultas adicionales.
+    """
+
     def __init__(self):
-        self.location_service = MngLocationService()
-        self.adm1_service = MngAdmin1Service()
-        self.adm2_service = MngAdmin2Service()
-        self.source_service = MngSourceService()
-        self.country_service = MngCountryService()
+        self._ids = {}
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Clave de búsqueda: sin espacios sobrantes (incluye NBSP) y en minúsculas"""
+        return ' '.join(str(name or '').replace('\u00a0', ' ').split()).casefold()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> 'SourceIndex':
+        """Construir el índice desde filas (id, name); ante nombres repetidos gana el ID menor"""
+        index = cls()
+        for row in sorted(rows, key=lambda r: -r.id):
+            index.add(row.name, row.id)
+        return index
+
+    def get(self, name: str, default=None):
+        return self._ids.get(self.normalize(name), default)
+
+    def add(self, name: str, ref) -> None:
+        """Registrar (o reemplazar) la referencia de una fuente"""
+        self._ids[self.normalize(name)] = ref
+
+    def replace_refs(self, ids: Dict) -> None:
+        """Sustituir referencias pendientes por los IDs reales tras insertarlas"""
+        for key, value in self._ids.items():
+            if value in ids:
+                self._ids[key] = ids[value]
+
+    def copy(self) -> 'SourceIndex':
+        other = SourceIndex()
+        other._ids = dict(self._ids)
+        return other
+
+    def __contains__(self, name: str) -> bool:
+        return self.normalize(name) in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class LocationImportService:
+    """
+    Servicio para importar locaciones desde CSV
+
+    La importación es por conjuntos: los ADM1/ADM2 del país y las fuentes se
+    cargan una sola vez en índices en memoria, las filas se validan por lotes y
+    las inserciones (fuentes, ADM1, ADM2 y locaciones) se hacen con INSERT de
+    múltiples filas dentro de una única transacción.
+
+    Cada lote se escribe en un SAVEPOINT: si la base de datos rechaza el lote,
+    se deshace solo ese lote y se reintenta fila por fila, de modo que una fila
+    inválida se reporta como error sin descartar las demás. Si la transacción
+    completa falla, la excepción se propaga y no se guarda nada.
+    """
+
+    # Columnas requeridas y sus alias aceptados
+    REQUIRED_FIELDS = [
+        ('ext_id', ['ext_id']),
+        ('name', ['name']),
+        ('machine_name', ['machine_name']),
+        ('latitude', ['latitude']),
+        ('longitude', ['longitude']),
+        ('altitude', ['altitude']),
+        ('admin_level_1', ['admin_level_1', 'admin1', 'adm1']),
+        ('admin_level_2', ['admin_level_2', 'admin2', 'adm2']),
+        ('source_name', ['source_name'])
+    ]
+
+    # Tamaño máximo de las listas usadas en cláusulas IN
+    LOOKUP_CHUNK_SIZE = 1000
+
+    def __init__(self, batch_size: Optional[int] = None):
+        """
+        Args:
+            batch_size: Filas procesadas por lote (por defecto LOCATION_IMPORT_BATCH_SIZE)
+        """
+        self.batch_size = batch_size
 
     def _normalize_key(self, key: str) -> str:
         if key is None:
@@ -49,15 +122,41 @@ class LocationImportService:
             raise ValueError(f"Campo {keys[0]} vacío")
         cleaned = raw_value.replace(' ', '').replace(',', '.')
         return float(cleaned)
-    
-    def import_from_csv(self, file_content: bytes, country_id: int) -> Dict:
+
+    def import_from_csv(self, file_content: bytes, country_id: int,
+                        on_progress: Optional[Callable[[int], None]] = None) -> Dict:
         """
-        Importa locaciones desde un archivo CSV
-        
+        Importa locaciones desde el contenido de un archivo CSV en memoria
+
+        Para archivos grandes usar `import_from_stream`, que no carga el archivo completo.
+
         Args:
             file_content: Contenido del archivo CSV en bytes
             country_id: ID del país para las locaciones
-            
+            on_progress: Función opcional llamada con el número de filas procesadas tras cada lote
+
+        Returns:
+            Dict con estadísticas de la importación (ver `import_from_stream`)
+        """
+        return self.import_from_stream(io.BytesIO(file_content), country_id, on_progress)
+
+    def import_from_stream(self, stream: BinaryIO, country_id: int,
+                           on_progress: Optional[Callable[[int], None]] = None) -> Dict:
+        """
+        Importa locaciones leyendo un CSV desde un flujo binario
+
+        El flujo se decodifica de forma incremental (UTF-8 con o sin BOM) y las
+        filas se procesan por lotes de tamaño fijo, por lo que la memoria usada
+        no depende del tamaño del archivo.
+
+        Args:
+            stream: Archivo binario abierto (archivo en disco, FileStorage.stream, etc.)
+            country_id: ID del país para las locaciones
+            on_progress: Función opcional llamada con el número de filas procesadas tras cada lote
+
+        Raises:
+            Exception: Si la importación no se pudo confirmar (no se guardó ninguna fila)
+
         Returns:
             Dict con estadísticas de la importación:
             {
@@ -65,6 +164,7 @@ class LocationImportService:
                 'locations_skipped': int,
                 'adm1_created': int,
                 'adm2_created': int,
+                'sources_created': int,
                 'errors': List[str]
             }
         """
@@ -76,347 +176,385 @@ class LocationImportService:
             'sources_created': 0,
             'errors': []
         }
-        
-        # Cache para evitar consultas repetidas
-        adm1_cache = {}  # {(name, ext_id): adm1_id}
-        adm2_cache = {}  # {(name, ext_id, adm1_id): adm2_id}
-        source_cache = {}  # {name: source_id}
-        
+
+        # utf-8-sig para manejar BOM; newline='' como requiere el módulo csv
+        text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
         try:
-            # Decodificar el contenido
-            text_content = file_content.decode('utf-8-sig')  # utf-8-sig para manejar BOM
-            csv_reader = csv.DictReader(io.StringIO(text_content))
-            
-            row_number = 1
-            for row in csv_reader:
-                row_number += 1
-                try:
-                    normalized_row = {
-                        self._normalize_key(k): v for k, v in row.items()
-                    }
-
-                    # Validar campos requeridos
-                    required_fields = [
-                        ('ext_id', ['ext_id']),
-                        ('name', ['name']),
-                        ('machine_name', ['machine_name']),
-                        ('latitude', ['latitude']),
-                        ('longitude', ['longitude']),
-                        ('altitude', ['altitude']),
-                        ('admin_level_1', ['admin_level_1', 'admin1', 'adm1']),
-                        ('admin_level_2', ['admin_level_2', 'admin2', 'adm2']),
-                        ('source_name', ['source_name'])
-                    ]
-                    
-                    missing_fields = [
-                        field for field, keys in required_fields
-                        if not self._get_row_value(normalized_row, *keys)
-                    ]
-                    if missing_fields:
-                        stats['errors'].append(f"Fila {row_number}: Campos faltantes: {', '.join(missing_fields)}")
-                        stats['locations_skipped'] += 1
-                        continue
-
-                    ext_id = self._get_row_value(normalized_row, 'ext_id')
-                    name = self._get_row_value(normalized_row, 'name')
-                    machine_name = self._get_row_value(normalized_row, 'machine_name')
-                    
-                    # Verificar si la locación ya existe
-                    existing_locations = self.location_service.get_by_ext_id(
-                        ext_id=ext_id,
-                        enabled=True
-                    )
-                    
-                    if not existing_locations:
-                        # Buscar deshabilitadas
-                        existing_locations = self.location_service.get_by_ext_id(
-                            ext_id=ext_id,
-                            enabled=False
-                        )
-                    
-                    if existing_locations and len(existing_locations) > 0:
-                        stats['errors'].append(
-                            f"Fila {row_number}: Locación ya existe (ext_id: {ext_id})"
-                        )
-                        current_app.logger.info(f"Locación {name} ya existe (ext_id: {ext_id})")
-                        stats['locations_skipped'] += 1
-                        continue
-                    
-                    # Procesar/crear ADM1
-                    adm1_name = self._get_row_value(
-                        normalized_row,
-                        'admin_level_1',
-                        'admin1',
-                        'adm1'
-                    )
-                    adm1_ext_id = self._get_row_value(
-                        normalized_row,
-                        'ext_id_level_1',
-                        'ext_id_admin_level_1'
-                    )
-                    adm1_id = self._get_or_create_adm1(
-                        name=adm1_name,
-                        ext_id=adm1_ext_id,
-                        country_id=country_id,
-                        cache=adm1_cache,
-                        stats=stats
-                    )
-                    
-                    if not adm1_id:
-                        stats['errors'].append(f"Fila {row_number}: No se pudo obtener/crear ADM1 '{adm1_name}'")
-                        stats['locations_skipped'] += 1
-                        continue
-                    
-                    # Procesar/crear ADM2
-                    adm2_name = self._get_row_value(
-                        normalized_row,
-                        'admin_level_2',
-                        'admin2',
-                        'adm2'
-                    )
-                    adm2_ext_id = self._get_row_value(
-                        normalized_row,
-                        'ext_id_level_2',
-                        'ext_id_admin_level_2'
-                    )
-                    adm2_id = self._get_or_create_adm2(
-                        name=adm2_name,
-                        ext_id=adm2_ext_id,
-                        adm1_id=adm1_id,
-                        cache=adm2_cache,
-                        stats=stats
-                    )
-                    
-                    if not adm2_id:
-                        stats['errors'].append(f"Fila {row_number}: No se pudo obtener/crear ADM2 '{adm2_name}'")
-                        stats['locations_skipped'] += 1
-                        continue
-                    
-                    # Obtener o crear source
-                    source_name = self._get_row_value(normalized_row, 'source_name')
-                    source_type = self._get_row_value(
-                        normalized_row,
-                        'type_of_source',
-                        'source_type'
-                    )
-                    source_id, error = self._get_or_create_source(
-                        name=source_name,
-                        source_type=source_type,
-                        cache=source_cache,
-                        stats=stats
-                    )
-                    
-                    # Si hay error con la fuente, omitir esta locación
-                    if error:
-                        stats['errors'].append(f"Fila {row_number}: {error}")
-                        stats['locations_skipped'] += 1
-                        continue
-                    
-                    if not source_id:
-                        stats['errors'].append(f"Fila {row_number}: No se pudo obtener/crear fuente '{source_name}'")
-                        stats['locations_skipped'] += 1
-                        continue
-                    
-                    # Crear la locación
-                    location_data = LocationCreate(
-                        admin_2_id=adm2_id,
-                        source_id=source_id,
-                        name=name,
-                        machine_name=machine_name,
-                        ext_id=ext_id,
-                        latitude=self._parse_float(normalized_row, 'latitude'),
-                        longitude=self._parse_float(normalized_row, 'longitude'),
-                        altitude=self._parse_float(normalized_row, 'altitude'),
-                        enable=True,
-                        visible=True
-                    )
-                    
-                    self.location_service.create(location_data)
-                    stats['locations_created'] += 1
-                    current_app.logger.info(f"Locación creada: {name}")
-                    
-                except ValueError as e:
-                    stats['errors'].append(f"Fila {row_number}: Error de formato - {str(e)}")
-                    stats['locations_skipped'] += 1
-                except Exception as e:
-                    current_app.logger.error(f"Error procesando fila {row_number}: {e}")
-                    stats['errors'].append(f"Fila {row_number}: {str(e)}")
-                    stats['locations_skipped'] += 1
-                    
-        except Exception as e:
-            current_app.logger.error(f"Error general al importar CSV: {e}")
-            stats['errors'].append(f"Error general: {str(e)}")
-        
+            csv_reader = csv.DictReader(text_stream)
+            self._run_import(csv_reader, country_id, stats, on_progress)
+        finally:
+            # Devolver el flujo al llamador sin cerrarlo
+            text_stream.detach()
+
         return stats
-    
-    def _get_or_create_adm1(self, name: str, ext_id: str, country_id: int, 
-                           cache: Dict, stats: Dict) -> int:
-        """Obtiene o crea un ADM1"""
-        cache_key = (name, ext_id)
-        
-        # Verificar cache
-        if cache_key in cache:
-            return cache[cache_key]
-        
-        # Buscar por ext_id si está disponible
-        if ext_id:
-            # Buscar habilitados
-            existing = self.adm1_service.get_by_ext_id(ext_id, enabled=True)
-            if existing:
-                cache[cache_key] = existing.id
-                return existing.id
-            # Buscar deshabilitados
-            existing = self.adm1_service.get_by_ext_id(ext_id, enabled=False)
-            if existing:
-                cache[cache_key] = existing.id
-                return existing.id
-        
-        # Buscar por nombre
-        existing_by_name = self.adm1_service.get_by_name(name, enabled=True)
-        if existing_by_name and len(existing_by_name) > 0:
-            adm1_id = existing_by_name[0].id
-            cache[cache_key] = adm1_id
-            return adm1_id
-        
-        # Buscar deshabilitados por nombre
-        existing_by_name = self.adm1_service.get_by_name(name, enabled=False)
-        if existing_by_name and len(existing_by_name) > 0:
-            adm1_id = existing_by_name[0].id
-            cache[cache_key] = adm1_id
-            return adm1_id
-        
-        # Crear nuevo ADM1
+
+    def _run_import(self, rows: Iterable[Dict], country_id: int, stats: Dict,
+                    on_progress: Optional[Callable[[int], None]] = None) -> None:
+        """Procesar todas las filas por lotes dentro de una única transacción"""
+        batch_size = self.batch_size or current_app.config.get('LOCATION_IMPORT_BATCH_SIZE', 1000)
+        created = {key: 0 for key in ('locations_created', 'adm1_created', 'adm2_created', 'sources_created')}
+
+        with get_db() as db:
+            try:
+                index = self._load_indexes(db, country_id)
+
+                batch = []
+                row_number = 1
+                for row in rows:
+                    row_number += 1
+                    batch.append((row_number, row))
+                    if len(batch) >= batch_size:
+                        self._process_batch(db, batch, index, country_id, stats, created)
+                        batch = []
+                        if on_progress:
+                            on_progress(row_number - 1)
+                if batch:
+                    self._process_batch(db, batch, index, country_id, stats, created)
+                    if on_progress:
+                        on_progress(row_number - 1)
+
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        # Solo contabilizar lo creado una vez confirmada la transacción
+        stats.update(created)
+        current_app.logger.info(
+            f"Importación de locaciones finalizada: {created['locations_created']} creadas, "
+            f"{stats['locations_skipped']} omitidas"
+        )
+
+    # ==================== ÍNDICES ====================
+
+    def _load_indexes(self, db, country_id: int) -> Dict:
+        """
+        Cargar en memoria los ADM1/ADM2 del país y las fuentes existentes
+
+        Los registros habilitados tienen prioridad sobre los deshabilitados,
+        igual que en las búsquedas por ext_id y por nombre.
+        """
+        index = {
+            'adm1_by_ext_id': {},
+            'adm1_by_name': {},
+            'adm2_by_ext_id': {},
+            'adm2_by_name': {},  # {(name, adm1_ref): adm2_ref}
+            'sources': None,     # SourceIndex
+            'seen_ext_ids': set()
+        }
+
+        adm1_rows = db.execute(
+            select(MngAdmin1.id, MngAdmin1.name, MngAdmin1.ext_id, MngAdmin1.enable)
+            .where(MngAdmin1.country_id == country_id)
+        ).all()
+        for adm1 in sorted(adm1_rows, key=lambda r: (bool(r.enable), -r.id)):
+            if adm1.ext_id:
+                index['adm1_by_ext_id'][adm1.ext_id] = adm1.id
+            index['adm1_by_name'][adm1.name] = adm1.id
+
+        adm2_rows = db.execute(
+            select(MngAdmin2.id, MngAdmin2.name, MngAdmin2.ext_id, MngAdmin2.admin_1_id, MngAdmin2.enable)
+            .join(MngAdmin1, MngAdmin2.admin_1_id == MngAdmin1.id)
+            .where(MngAdmin1.country_id == country_id)
+        ).all()
+        for adm2 in sorted(adm2_rows, key=lambda r: (bool(r.enable), -r.id)):
+            if adm2.ext_id:
+                index['adm2_by_ext_id'][adm2.ext_id] = adm2.id
+            index['adm2_by_name'][(adm2.name, adm2.admin_1_id)] = adm2.id
+
+        index['sources'] = SourceIndex.from_rows(
+            db.execute(select(MngSource.id, MngSource.name)).all()
+        )
+
+        return index
+
+    def _existing_location_ext_ids(self, db, ext_ids: List[str]) -> set:
+        """Obtener cuáles de los ext_id ya existen como locación (habilitada o no)"""
+        existing = set()
+        for i in range(0, len(ext_ids), self.LOOKUP_CHUNK_SIZE):
+            chunk = ext_ids[i:i + self.LOOKUP_CHUNK_SIZE]
+            existing.update(db.execute(
+                select(MngLocation.ext_id).where(MngLocation.ext_id.in_(chunk))
+            ).scalars())
+        return existing
+
+    # ==================== LOTES ====================
+
+    def _parse_row(self, row_number: int, row: Dict, errors: List[Tuple[int, str]]) -> Optional[Dict]:
+        """Validar una fila y extraer sus valores; registra el error y devuelve None si es inválida"""
         try:
-            new_adm1 = Admin1Create(
-                name=name,
-                ext_id=ext_id,
-                country_id=country_id,
-                enable=True
-            )
-            created = self.adm1_service.create(new_adm1)
-            stats['adm1_created'] += 1
-            cache[cache_key] = created.id
-            current_app.logger.info(f"ADM1 creado: {name} (ext_id: {ext_id})")
-            return created.id
+            normalized_row = {
+                self._normalize_key(k): v for k, v in row.items()
+            }
+
+            missing_fields = [
+                field for field, keys in self.REQUIRED_FIELDS
+                if not self._get_row_value(normalized_row, *keys)
+            ]
+            if missing_fields:
+                errors.append((row_number, f"Fila {row_number}: Campos faltantes: {', '.join(missing_fields)}"))
+                return None
+
+            return {
+                'row_number': row_number,
+                'ext_id': self._get_row_value(normalized_row, 'ext_id'),
+                'name': self._get_row_value(normalized_row, 'name'),
+                'machine_name': self._get_row_value(normalized_row, 'machine_name'),
+                'latitude': self._parse_float(normalized_row, 'latitude'),
+                'longitude': self._parse_float(normalized_row, 'longitude'),
+                'altitude': self._parse_float(normalized_row, 'altitude'),
+                'adm1_name': self._get_row_value(normalized_row, 'admin_level_1', 'admin1', 'adm1'),
+                'adm1_ext_id': self._get_row_value(normalized_row, 'ext_id_level_1', 'ext_id_admin_level_1'),
+                'adm2_name': self._get_row_value(normalized_row, 'admin_level_2', 'admin2', 'adm2'),
+                'adm2_ext_id': self._get_row_value(normalized_row, 'ext_id_level_2', 'ext_id_admin_level_2'),
+                'source_name': self._get_row_value(normalized_row, 'source_name'),
+                'source_type': self._get_row_value(normalized_row, 'type_of_source', 'source_type'),
+            }
+        except ValueError as e:
+            errors.append((row_number, f"Fila {row_number}: Error de formato - {str(e)}"))
         except Exception as e:
-            current_app.logger.error(f"Error creando ADM1 '{name}': {e}")
-            return None
-    
-    def _get_or_create_adm2(self, name: str, ext_id: str, adm1_id: int,
-                           cache: Dict, stats: Dict) -> int:
-        """Obtiene o crea un ADM2"""
-        cache_key = (name, ext_id, adm1_id)
-        
-        # Verificar cache
-        if cache_key in cache:
-            return cache[cache_key]
-        
-        # Buscar por ext_id si está disponible
-        if ext_id:
-            # Buscar habilitados
-            existing = self.adm2_service.get_by_ext_id(ext_id, enabled=True)
-            if existing:
-                cache[cache_key] = existing.id
-                return existing.id
-            # Buscar deshabilitados
-            existing = self.adm2_service.get_by_ext_id(ext_id, enabled=False)
-            if existing:
-                cache[cache_key] = existing.id
-                return existing.id
-        
-        # Buscar por nombre y adm1_id
-        existing_by_name = self.adm2_service.get_by_name(name, enabled=True)
-        if existing_by_name and len(existing_by_name) > 0:
-            # Verificar que pertenezca al mismo adm1
-            for adm2 in existing_by_name:
-                if adm2.admin_1_id == adm1_id:
-                    cache[cache_key] = adm2.id
-                    return adm2.id
-        
-        # Buscar deshabilitados
-        existing_by_name = self.adm2_service.get_by_name(name, enabled=False)
-        if existing_by_name and len(existing_by_name) > 0:
-            # Verificar que pertenezca al mismo adm1
-            for adm2 in existing_by_name:
-                if adm2.admin_1_id == adm1_id:
-                    cache[cache_key] = adm2.id
-                    return adm2.id
-        
-        # Crear nuevo ADM2
+            current_app.logger.error(f"Error procesando fila {row_number}: {e}")
+            errors.append((row_number, f"Fila {row_number}: {str(e)}"))
+        return None
+
+    def _process_batch(self, db, batch: List[Tuple[int, Dict]], index: Dict,
+                       country_id: int, stats: Dict, created: Dict) -> None:
+        """Validar un lote de filas, resolver sus referencias y escribirlo"""
+        errors = []
         try:
-            new_adm2 = Admin2Create(
-                name=name,
-                ext_id=ext_id,
-                admin_1_id=adm1_id,
-                visible=True,
-                enable=True
+            if not self._write_in_savepoint(db, batch, index, country_id, errors, created):
+                current_app.logger.warning(
+                    f"Lote de filas {batch[0][0]}-{batch[-1][0]} rechazado por la base de datos; "
+                    f"reintentando fila por fila"
+                )
+                errors = []
+                for item in batch:
+                    self._write_in_savepoint(db, [item], index, country_id, errors, created)
+        finally:
+            # Reportar los errores del lote en el orden de las filas
+            errors.sort(key=lambda error: error[0])
+            stats['errors'].extend(message for _, message in errors)
+            stats['locations_skipped'] += len(errors)
+
+    def _write_in_savepoint(self, db, batch: List[Tuple[int, Dict]], index: Dict,
+                            country_id: int, errors: List[Tuple[int, str]], created: Dict) -> bool:
+        """
+        Escribir filas dentro de un SAVEPOINT
+
+        Si la base de datos las rechaza se deshacen el SAVEPOINT y los cambios a
+        los índices y contadores. Un lote se reporta como fallido para reintentarlo
+        fila por fila; una sola fila se registra como error.
+
+        Returns:
+            bool: False si el lote de varias filas fue rechazado
+        """
+        saved_index = {key: value.copy() for key, value in index.items()}
+        saved_created = dict(created)
+        row_errors = []
+        try:
+            with db.begin_nested():
+                self._write_batch(db, batch, index, country_id, row_errors, created)
+        except SQLAlchemyError as e:
+            index.clear()
+            index.update(saved_index)
+            created.clear()
+            created.update(saved_created)
+            if len(batch) > 1:
+                return False
+            row_number = batch[0][0]
+            reason = getattr(e, 'orig', None) or e
+            current_app.logger.warning(f"Fila {row_number} rechazada por la base de datos: {reason}")
+            row_errors = [(row_number, f"Fila {row_number}: Error al guardar - {reason}")]
+        errors.extend(row_errors)
+        return True
+
+    def _write_batch(self, db, batch: List[Tuple[int, Dict]], index: Dict,
+                     country_id: int, errors: List[Tuple[int, str]], created: Dict) -> None:
+        records = [
+            record for record in (self._parse_row(n, row, errors) for n, row in batch)
+            if record
+        ]
+        if not records:
+            return
+
+        existing_ext_ids = self._existing_location_ext_ids(
+            db, list({r['ext_id'] for r in records} - index['seen_ext_ids'])
+        )
+
+        # Registros pendientes de crear en este lote; las referencias a ellos
+        # son tuplas ('new', clave) que se sustituyen por IDs tras insertarlos
+        pending_sources = {}
+        pending_adm1 = {}
+        pending_adm2 = {}
+        locations = []
+
+        for record in records:
+            row_number = record['row_number']
+            ext_id = record['ext_id']
+
+            if ext_id in existing_ext_ids or ext_id in index['seen_ext_ids']:
+                errors.append((row_number, f"Fila {row_number}: Locación ya existe (ext_id: {ext_id})"))
+                continue
+
+            source_ref, error = self._resolve_source(
+                record['source_name'], record['source_type'], index, pending_sources
             )
-            created = self.adm2_service.create(new_adm2)
-            stats['adm2_created'] += 1
-            cache[cache_key] = created.id
-            current_app.logger.info(f"ADM2 creado: {name} (ext_id: {ext_id})")
-            return created.id
-        except Exception as e:
-            current_app.logger.error(f"Error creando ADM2 '{name}': {e}")
-            return None
-    
-    def _get_or_create_source(self, name: str, source_type: str, cache: Dict, stats: Dict) -> tuple:
+            if error:
+                errors.append((row_number, f"Fila {row_number}: {error}"))
+                continue
+
+            adm1_ref = self._resolve_adm1(record['adm1_name'], record['adm1_ext_id'], index, pending_adm1)
+            adm2_ref = self._resolve_adm2(record['adm2_name'], record['adm2_ext_id'], adm1_ref, index, pending_adm2)
+
+            index['seen_ext_ids'].add(ext_id)
+            locations.append((record, source_ref, adm2_ref))
+
+        if not locations:
+            return
+
+        # Insertar dependencias en orden y reemplazar las referencias pendientes por IDs
+        ids = {}
+        ids.update(self._insert_sources(db, pending_sources, index, created))
+        ids.update(self._insert_adm1(db, pending_adm1, country_id, index, created))
+        ids.update(self._insert_adm2(db, pending_adm2, ids, index, created))
+
+        db.execute(insert(MngLocation), [
+            {
+                'admin_2_id': ids.get(adm2_ref, adm2_ref),
+                'source_id': ids.get(source_ref, source_ref),
+                'name': record['name'],
+                'machine_name': record['machine_name'],
+                'ext_id': record['ext_id'],
+                'latitude': record['latitude'],
+                'longitude': record['longitude'],
+                'altitude': record['altitude'],
+                'enable': True,
+                'visible': True
+            }
+            for record, source_ref, adm2_ref in locations
+        ])
+        created['locations_created'] += len(locations)
+
+    # ==================== RESOLUCIÓN DE REFERENCIAS ====================
+
+    def _resolve_source(self, name: str, source_type: str, index: Dict, pending: Dict) -> Tuple:
         """
-        Obtiene o crea una fuente de datos
-        
+        Obtiene la referencia a una fuente existente o la registra para crearla
+
         Returns:
-            tuple: (source_id, error_message) - error_message es None si no hay error
+            tuple: (source_ref, error_message) - error_message es None si no hay error
         """
-        cache_key = (name, source_type)
-        
-        # Verificar cache
-        if cache_key in cache:
-            return (cache[cache_key], None)
-        
-        # Buscar fuente existente por nombre
-        sources = self.source_service.get_all()
-        for source in sources:
-            if source.name.upper() == name.upper():
-                cache[cache_key] = source.id
-                return (source.id, None)
-        
+        source_ref = index['sources'].get(name)
+        if source_ref is not None:
+            return (source_ref, None)
+
         # Fuente no existe, validar tipo antes de crear
         try:
             source_type_enum = SourceType(source_type.upper())
         except ValueError:
-            # Tipo inválido - retornar error
             valid_types = ', '.join([st.value for st in SourceType])
-            error_msg = f"Tipo de fuente inválido '{source_type}'. Valores válidos: {valid_types}"
-            current_app.logger.error(f"Fuente '{name}': {error_msg}")
-            return (None, error_msg)
-        
-        # Crear fuente con tipo válido
-        try:
-            new_source = SourceCreate(
-                name=name,
-                source_type=source_type_enum,
-                enable=True
-            )
-            created = self.source_service.create(new_source)
-            stats['sources_created'] += 1
-            cache[cache_key] = created.id
-            current_app.logger.info(f"Fuente creada: {name} (tipo: {source_type_enum.value})")
-            return (created.id, None)
-        except Exception as e:
-            error_msg = f"Error creando fuente '{name}': {str(e)}"
-            current_app.logger.error(error_msg)
-            return (None, error_msg)
-    
-    def _get_source_id(self, source_name: str, cache: Dict) -> int:
-        """Obtiene el ID de una fuente por nombre"""
-        if source_name in cache:
-            return cache[source_name]
-        
-        # Buscar todas las fuentes y filtrar por nombre
-        sources = self.source_service.get_all()
-        for source in sources:
-            if source.name.upper() == source_name.upper():
-                cache[source_name] = source.id
-                return source.id
-        
-        return None
+            return (None, f"Tipo de fuente inválido '{source_type}'. Valores válidos: {valid_types}")
+
+        ref = ('new', SourceIndex.normalize(name))
+        pending[ref] = {'name': name, 'source_type': source_type_enum, 'enable': True}
+        index['sources'].add(name, ref)
+        return (ref, None)
+
+    def _resolve_adm1(self, name: str, ext_id: str, index: Dict, pending: Dict):
+        """Obtiene la referencia a un ADM1 (por ext_id y luego por nombre) o lo registra para crearlo"""
+        if ext_id and ext_id in index['adm1_by_ext_id']:
+            return index['adm1_by_ext_id'][ext_id]
+        if name in index['adm1_by_name']:
+            return index['adm1_by_name'][name]
+
+        ref = ('new', name, ext_id)
+        pending[ref] = {'name': name, 'ext_id': ext_id}
+        if ext_id:
+            index['adm1_by_ext_id'][ext_id] = ref
+        index['adm1_by_name'][name] = ref
+        return ref
+
+    def _resolve_adm2(self, name: str, ext_id: str, adm1_ref, index: Dict, pending: Dict):
+        """Obtiene la referencia a un ADM2 (por ext_id y luego por nombre dentro del ADM1) o lo registra para crearlo"""
+        if ext_id and ext_id in index['adm2_by_ext_id']:
+            return index['adm2_by_ext_id'][ext_id]
+        if (name, adm1_ref) in index['adm2_by_name']:
+            return index['adm2_by_name'][(name, adm1_ref)]
+
+        ref = ('new', name, ext_id, adm1_ref)
+        pending[ref] = {'name': name, 'ext_id': ext_id, 'adm1_ref': adm1_ref}
+        if ext_id:
+            index['adm2_by_ext_id'][ext_id] = ref
+        index['adm2_by_name'][(name, adm1_ref)] = ref
+        return ref
+
+    # ==================== INSERCIONES POR LOTE ====================
+
+    def _replace_refs(self, mapping: Dict, ids: Dict) -> None:
+        """Sustituir en un diccionario de índice las referencias pendientes por IDs reales"""
+        for key, value in mapping.items():
+            if value in ids:
+                mapping[key] = ids[value]
+
+    def _insert_sources(self, db, pending: Dict, index: Dict, created: Dict) -> Dict:
+        if not pending:
+            return {}
+        refs = list(pending)
+        result = db.execute(
+            insert(MngSource).returning(MngSource.id, MngSource.name),
+            [pending[ref] for ref in refs]
+        ).all()
+        by_name = {SourceIndex.normalize(row.name): row.id for row in result}
+        ids = {ref: by_name[ref[1]] for ref in refs}
+        index['sources'].replace_refs(ids)
+        created['sources_created'] += len(ids)
+        return ids
+
+    def _insert_adm1(self, db, pending: Dict, country_id: int, index: Dict, created: Dict) -> Dict:
+        if not pending:
+            return {}
+        refs = list(pending)
+        result = db.execute(
+            insert(MngAdmin1).returning(MngAdmin1.id, MngAdmin1.name, MngAdmin1.ext_id),
+            [
+                {'name': pending[ref]['name'], 'ext_id': pending[ref]['ext_id'], 'country_id': country_id, 'enable': True}
+                for ref in refs
+            ]
+        ).all()
+        by_key = {('new', row.name, row.ext_id): row.id for row in result}
+        new_ids = {ref: by_key[ref] for ref in refs}
+        self._replace_refs(index['adm1_by_ext_id'], new_ids)
+        self._replace_refs(index['adm1_by_name'], new_ids)
+        # Las claves de ADM2 por nombre incluyen la referencia a su ADM1: pasarlas al ID real
+        index['adm2_by_name'] = {
+            (name, new_ids.get(adm1_ref, adm1_ref)): ref for (name, adm1_ref), ref in index['adm2_by_name'].items()
+        }
+        created['adm1_created'] += len(new_ids)
+        return new_ids
+
+    def _insert_adm2(self, db, pending: Dict, ids: Dict, index: Dict, created: Dict) -> Dict:
+        if not pending:
+            return {}
+        refs = list(pending)
+        result = db.execute(
+            insert(MngAdmin2).returning(MngAdmin2.id, MngAdmin2.name, MngAdmin2.ext_id, MngAdmin2.admin_1_id),
+            [
+                {
+                    'name': pending[ref]['name'],
+                    'ext_id': pending[ref]['ext_id'],
+                    'admin_1_id': ids.get(pending[ref]['adm1_ref'], pending[ref]['adm1_ref']),
+                    'visible': True,
+                    'enable': True
+                }
+                for ref in refs
+            ]
+        ).all()
+        by_key = {(row.name, row.ext_id, row.admin_1_id): row.id for row in result}
+        new_ids = {
+            ref: by_key[(ref[1], ref[2], ids.get(ref[3], ref[3]))]
+            for ref in refs
+        }
+        self._replace_refs(index['adm2_by_ext_id'], new_ids)
+        self._replace_refs(index['adm2_by_name'], new_ids)
+        created['adm2_created'] += len(new_ids)
+        return new_ids
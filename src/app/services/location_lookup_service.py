@@ -0,0 +1,113 @@
+"""
+Servicio de búsqueda de locaciones para los selects con autocompletado
+"""
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from aclimate_v3_orm.database import get_db
+from aclimate_v3_orm.models import MngLocation, MngAdmin1, MngAdmin2, MngCountry
+from config import Config
+
+
+class LocationLookupService:
+    """
+    Servicio para buscar locaciones por nombre o ID externo sin cargar la tabla completa
+
+    Las búsquedas devuelven pocas filas livianas (LIMIT en SQL). Primero se
+    buscan coincidencias por prefijo, que pueden usar un índice sobre
+    lower(name)/lower(ext_id), y solo si no alcanzan el límite se completan con
+    coincidencias por subcadena.
+    """
+
+    def _base_query(self):
+        return (
+            select(
+                MngLocation.id,
+                MngLocation.name,
+                MngLocation.ext_id,
+                MngAdmin2.name.label('admin2'),
+                MngAdmin1.name.label('admin1'),
+                MngCountry.name.label('country')
+            )
+            .join(MngAdmin2, MngLocation.admin_2_id == MngAdmin2.id)
+            .join(MngAdmin1, MngAdmin2.admin_1_id == MngAdmin1.id)
+            .join(MngCountry, MngAdmin1.country_id == MngCountry.id)
+        )
+
+    @staticmethod
+    def label(name: str, ext_id: Optional[str]) -> str:
+        """Texto de la opción: nombre y, si existe, ID externo para distinguir homónimos"""
+        return f"{name} ({ext_id})" if ext_id else name
+
+    def search(self, query: str = '', country_id: Optional[int] = None,
+               admin1_id: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Buscar locaciones habilitadas
+
+        Args:
+            query: Texto a buscar en el nombre o el ID externo (vacío: primeras por nombre)
+            country_id: Filtrar por país
+            admin1_id: Filtrar por ADM1
+            limit: Máximo de resultados (acotado por LOCATION_SEARCH_MAX_RESULTS)
+
+        Returns:
+            Lista de diccionarios con id, label, name, ext_id, admin2, admin1 y country
+        """
+        limit = min(max(limit or Config.LOCATION_SEARCH_LIMIT, 1), Config.LOCATION_SEARCH_MAX_RESULTS)
+        term = ' '.join((query or '').split()).lower()
+        # Los comodines de LIKE escritos por el usuario se buscan literalmente
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+        stmt = self._base_query().where(MngLocation.enable.is_(True))
+        if country_id:
+            stmt = stmt.where(MngAdmin1.country_id == country_id)
+        if admin1_id:
+            stmt = stmt.where(MngAdmin2.admin_1_id == admin1_id)
+        stmt = stmt.order_by(MngLocation.name, MngLocation.id)
+
+        name = func.lower(MngLocation.name)
+        ext_id = func.lower(MngLocation.ext_id)
+        with get_db() as db:
+            if not term:
+                rows = db.execute(stmt.limit(limit)).all()
+            else:
+                prefix = f"{escaped}%"
+                rows = db.execute(
+                    stmt.where(name.like(prefix, escape='\\') | ext_id.like(prefix, escape='\\')).limit(limit)
+                ).all()
+                if len(rows) < limit:
+                    found = [row.id for row in rows]
+                    substring = f"%{escaped}%"
+                    rows += db.execute(
+                        stmt.where(name.like(substring, escape='\\') | ext_id.like(substring, escape='\\'))
+                        .where(MngLocation.id.notin_(found))
+                        .limit(limit - len(rows))
+                    ).all()
+
+        return [
+            {
+                'id': row.id,
+                'label': self.label(row.name, row.ext_id),
+                'name': row.name,
+                'ext_id': row.ext_id,
+                'admin2': row.admin2,
+                'admin1': row.admin1,
+                'country': row.country
+            }
+            for row in rows
+        ]
+
+    def get_option(self, location_id: Optional[int]) -> Optional[Tuple[int, str]]:
+        """
+        Obtener la opción (id, texto) de una locación, o None si no existe
+
+        Es una consulta de una fila: sirve para mostrar la opción seleccionada
+        y para validar el ID enviado en el formulario.
+        """
+        if not location_id:
+            return None
+        with get_db() as db:
+            row = db.execute(
+                select(MngLocation.id, MngLocation.name, MngLocation.ext_id)
+                .where(MngLocation.id == location_id)
+            ).first()
+        return (row.id, self.label(row.name, row.ext_id)) if row else None
@@ -1,11 +1,138 @@
 from authlib.integrations.flask_client import OAuth
+from authlib.jose import JsonWebKey, JsonWebToken, JoseError
 from flask import current_app, session, url_for, redirect
 from typing import Optional, Dict
+import base64
+import json
+import threading
+import time
 import requests
 import logging
+from app.utils import http_client
+from app.utils.fork import after_fork
 
 logger = logging.getLogger(__name__)
 
+# Algoritmos aceptados para los access tokens firmados por Keycloak
+_jwt = JsonWebToken(['RS256', 'RS384', 'RS512', 'PS256', 'PS384', 'PS512', 'ES256', 'ES384', 'ES512'])
+
+
+class JWKSCache:
+    """Caché en memoria de las llaves públicas (JWKS) del realm, compartida por el proceso"""
+    
+    def __init__(self, ttl: float = 3600, min_refresh_interval: float = 30):
+        """
+        Args:
+            ttl: Segundos antes de volver a descargar el JWKS aunque el kid sea conocido
+            min_refresh_interval: Segundos mínimos entre descargas (forzadas por un kid
+                desconocido o tras una descarga fallida)
+        """
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys = {}
+        self._jwks_uri = None
+        self._fetched_at = 0.0
+        # Último intento de descarga (exitoso o no) y si falló
+        self._attempted_at = 0.0
+        self._failed = False
+        self._lock = threading.Lock()
+    
+    def get_key(self, jwks_uri: str, kid: Optional[str]):
+        """
+        Obtener la llave de firma para un kid, rotando el JWKS si el kid es desconocido
+        
+        Un kid conocido se sigue sirviendo después del TTL: la renovación la hace
+        un solo hilo sin bloquear a los demás y, si falla, se conserva la llave.
+        
+        Raises:
+            requests.exceptions.RequestException: Si el JWKS no se puede descargar
+                (o falló hace menos de `min_refresh_interval`) y el kid no está cacheado
+        """
+        key = self._keys.get(kid) if jwks_uri == self._jwks_uri else None
+        if key is not None:
+            now = time.monotonic()
+            if now - self._fetched_at >= self.ttl and now - self._attempted_at >= self.min_refresh_interval \
+                    and self._lock.acquire(blocking=False):
+                try:
+                    if time.monotonic() - self._fetched_at >= self.ttl:
+                        self._refresh(jwks_uri)
+                except requests.exceptions.RequestException as e:
+                    logger.warning(f"JWKS refresh failed, keeping cached keys: {e}")
+                    return key
+                finally:
+                    self._lock.release()
+                # Renovado: una llave retirada del JWKS ya no se acepta
+                if not self._failed:
+                    return self._keys.get(kid)
+            return key
+        
+        with self._lock:
+            if jwks_uri != self._jwks_uri:
+                self._keys = {}
+                self._jwks_uri = jwks_uri
+                self._fetched_at = 0.0
+                self._attempted_at = 0.0
+                self._failed = False
+            
+            # Otro hilo pudo haberla descargado mientras se esperaba el lock
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            
+            # kid desconocido: refrescar, pero sin martillar Keycloak (con tokens ajenos o caído)
+            if time.monotonic() - self._attempted_at < self.min_refresh_interval:
+                if self._failed:
+                    raise requests.exceptions.ConnectionError("JWKS unavailable (last download failed)")
+                return None
+            
+            self._refresh(jwks_uri)
+            return self._keys.get(kid)
+    
+    def clear(self):
+        """Descartar las llaves cacheadas"""
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = 0.0
+            self._attempted_at = 0.0
+            self._failed = False
+    
+    def _refresh(self, jwks_uri: str):
+        """Descargar el JWKS (se llama con el lock tomado)"""
+        self._attempted_at = time.monotonic()
+        try:
+            response = http_client.get(jwks_uri, timeout=10)
+            response.raise_for_status()
+            jwks = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._failed = True
+            if isinstance(e, requests.exceptions.RequestException):
+                raise
+            raise requests.exceptions.InvalidJSONError(f"Invalid JWKS response: {e}")
+        
+        keys = {}
+        for jwk in jwks.get('keys', []):
+            if jwk.get('use', 'sig') != 'sig':
+                continue
+            try:
+                keys[jwk.get('kid')] = JsonWebKey.import_key(jwk)
+            except Exception as e:
+                logger.warning(f"Skipping unsupported JWKS key {jwk.get('kid')}: {e}")
+        
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._failed = False
+        logger.info(f"JWKS refreshed: {len(keys)} signing key(s) loaded")
+
+
+jwks_cache = JWKSCache()
+
+
+@after_fork
+def _reset_jwks_cache() -> None:
+    """Reemplazar el lock heredado del maestro (las llaves se vuelven a descargar)"""
+    jwks_cache._lock = threading.Lock()
+    jwks_cache.clear()
+
 class OAuthService:
     """Servicio para manejar autenticación OAuth con Keycloak"""
     
@@ -19,6 +146,7 @@ class OAuthService:
         """Inicializar OAuth con la aplicación Flask"""
         try:
             self.oauth.init_app(app)
+            jwks_cache.ttl = app.config.get('JWKS_CACHE_TTL', jwks_cache.ttl)
             
             # Log de configuración
             logger.info(f"Initializing Keycloak OAuth client:")
@@ -120,7 +248,7 @@ class OAuthService:
             if not user_info and 'access_token' in token:
                 userinfo_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM']}/protocol/openid-connect/userinfo"
                 
-                response = requests.get(
+                response = http_client.get(
                     userinfo_url,
                     headers={'Authorization': f"Bearer {token['access_token']}"},
                     timeout=10
@@ -159,7 +287,7 @@ class OAuthService:
             # Intentar obtener roles específicos del cliente
             roles_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/admin/realms/{current_app.config['KEYCLOAK_REALM']}/users/{user_info.get('sub')}/role-mappings"
             
-            response = requests.get(
+            response = http_client.get(
                 roles_url,
                 headers={'Authorization': f"Bearer {access_token}"},
                 timeout=10
@@ -181,11 +309,94 @@ class OAuthService:
         return user_info
     
     def validate_token(self, access_token: str) -> bool:
-        """Validar que el token siga siendo válido"""
+        """
+        Validar que el token siga siendo válido
+        
+        En modo 'local' se verifica la firma contra el JWKS del realm y los claims
+        exp, iss y aud sin salir a la red (salvo para rotar llaves). En modo 'remote'
+        se consulta el endpoint userinfo de Keycloak en cada llamada.
+        """
+        mode = current_app.config.get('TOKEN_VALIDATION_MODE', 'local')
+        
+        if mode == 'local':
+            is_valid = self._validate_token_locally(access_token)
+            if is_valid is not None:
+                return is_valid
+            if not current_app.config.get('TOKEN_VALIDATION_REMOTE_FALLBACK', False):
+                return False
+            logger.info("Falling back to remote token validation")
+        
+        return self._validate_token_remote(access_token)
+    
+    def _validate_token_locally(self, access_token: str) -> Optional[bool]:
+        """
+        Verificar el token localmente
+        
+        Returns:
+            True/False si la verificación es concluyente, None si no se pudo
+            verificar (JWKS inaccesible o token sin formato JWT)
+        """
+        config = current_app.config
+        issuer = f"{config['KEYCLOAK_SERVER_URL']}/realms/{config['KEYCLOAK_REALM']}"
+        jwks_uri = f"{issuer}/protocol/openid-connect/certs"
+        
+        try:
+            header_segment = access_token.split('.')[0]
+            header = json.loads(base64.urlsafe_b64decode(header_segment + '=' * (-len(header_segment) % 4)))
+        except Exception:
+            logger.warning("Access token is not a JWT, cannot validate locally")
+            return None
+        
+        try:
+            key = jwks_cache.get_key(jwks_uri, header.get('kid'))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Could not fetch JWKS from {jwks_uri}: {e}")
+            return None
+        
+        if key is None:
+            logger.warning(f"No JWKS key found for kid {header.get('kid')}")
+            return False
+        
+        try:
+            claims = _jwt.decode(
+                access_token,
+                key,
+                claims_options={
+                    'iss': {'essential': True, 'value': issuer},
+                    'exp': {'essential': True},
+                }
+            )
+            claims.validate(leeway=config.get('TOKEN_VALIDATION_LEEWAY', 30))
+        except JoseError as e:
+            logger.info(f"Access token rejected: {e}")
+            return False
+        
+        if not self._audience_matches(claims):
+            logger.info(f"Access token rejected: unexpected audience {claims.get('aud')}")
+            return False
+        
+        return True
+    
+    def _audience_matches(self, claims: Dict) -> bool:
+        """Comprobar aud contra KEYCLOAK_TOKEN_AUDIENCE o, por defecto, contra el client id"""
+        audience = claims.get('aud') or []
+        if isinstance(audience, str):
+            audience = [audience]
+        
+        expected = current_app.config.get('KEYCLOAK_TOKEN_AUDIENCE')
+        if expected:
+            return expected in audience
+        
+        # Keycloak emite aud='account' salvo que haya un audience mapper; el cliente queda en azp
+        client_id = current_app.config['KEYCLOAK_CLIENT_ID']
+        return client_id in audience or claims.get('azp') == client_id
+    
+    def _validate_token_remote(self, access_token: str) -> bool:
+        """Validar el token consultando el endpoint userinfo de Keycloak"""
         try:
             userinfo_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM']}/protocol/openid-connect/userinfo"
             
-            response = requests.get(
+            response = http_client.get(
                 userinfo_url,
                 headers={'Authorization': f'Bearer {access_token}'},
                 timeout=10
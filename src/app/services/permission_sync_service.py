@@ -0,0 +1,150 @@
+"""
+Servicio de sincronización de la matriz de permisos (tabla user_access)
+"""
+from typing import Dict, Iterable, Mapping, Set, Tuple
+from flask import current_app
+from sqlalchemy import and_, bindparam, delete, insert, select, tuple_, update
+from aclimate_v3_orm.database import get_db
+from aclimate_v3_orm.enums import Modules
+from aclimate_v3_orm.models import UserAccess
+
+# Columnas CRUD de cada acceso
+PERMISSION_FIELDS = ('create', 'read', 'update', 'delete')
+
+# Clave de un acceso dentro de la matriz: (country_id, valor del módulo)
+AccessKey = Tuple[int, str]
+
+
+class PermissionSyncResult:
+    """Cantidad de accesos creados, modificados, eliminados y sin cambios"""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.created or self.updated or self.deleted)
+
+    @property
+    def configured(self) -> int:
+        """Accesos que quedan asignados después de sincronizar"""
+        return self.created + self.updated + self.unchanged
+
+
+class PermissionSyncService:
+    """
+    Servicio para guardar la matriz de permisos de un usuario aplicando solo las diferencias
+
+    Compara los accesos actuales con los enviados y ejecuta como mucho un
+    INSERT, un UPDATE (por lotes) y un DELETE, en la misma transacción: el
+    usuario nunca queda sin permisos a mitad del guardado y si algo falla no
+    se aplica ningún cambio.
+    """
+
+    def sync(self, user_id: int, role_id: int, country_ids: Iterable[int],
+             permissions: Mapping[AccessKey, Mapping[str, bool]]) -> PermissionSyncResult:
+        """
+        Sincronizar los accesos del usuario en los países indicados
+
+        Args:
+            user_id: ID del usuario en la BD local
+            role_id: Rol con el que se guardan los accesos
+            country_ids: Países que cubre la matriz; los accesos de otros países no se tocan
+            permissions: Accesos deseados, (country_id, módulo) -> {'create': bool, ...}
+
+        Returns:
+            PermissionSyncResult con los cambios aplicados
+        """
+        table = UserAccess.__table__
+        columns = table.c
+        country_ids = list(country_ids)
+        desired = {
+            key: {field: bool(flags.get(field)) for field in PERMISSION_FIELDS}
+            for key, flags in permissions.items()
+            if key[0] in country_ids
+        }
+        result = PermissionSyncResult()
+        if not country_ids:
+            return result
+
+        with get_db() as db:
+            rows = db.execute(
+                select(table)
+                .where(columns.user_id == user_id, columns.country_id.in_(country_ids))
+                .with_for_update()
+            ).mappings().all()
+
+            current: Dict[AccessKey, Mapping] = {}
+            to_delete: Set[AccessKey] = set()
+            for row in rows:
+                key = (row['country_id'], self._module_value(row['module']))
+                if key in current:
+                    # Filas repetidas de un mismo país/módulo: se reemplazan por una sola
+                    to_delete.add(key)
+                current[key] = row
+
+            to_insert = [key for key in desired if key not in current]
+            to_update = [
+                key for key in desired
+                if key in current and key not in to_delete and (
+                    current[key]['role_id'] != role_id
+                    or any(current[key][field] != desired[key][field] for field in PERMISSION_FIELDS)
+                )
+            ]
+            to_delete.update(key for key in current if key not in desired)
+            # Las filas repetidas que siguen deseadas se eliminan y se vuelven a insertar
+            to_insert += [key for key in to_delete if key in desired]
+            result.unchanged = len(desired) - len(to_insert) - len(to_update)
+
+            if to_delete:
+                db.execute(
+                    delete(table).where(
+                        columns.user_id == user_id,
+                        tuple_(columns.country_id, columns.module).in_(
+                            [(country_id, Modules(module)) for country_id, module in to_delete]
+                        )
+                    )
+                )
+            if to_update:
+                db.execute(
+                    update(table)
+                    .where(and_(
+                        columns.user_id == bindparam('p_user_id'),
+                        columns.country_id == bindparam('p_country_id'),
+                        columns.module == bindparam('p_module')
+                    ))
+                    .values({'role_id': bindparam('p_role_id'),
+                             **{field: bindparam(f'p_{field}') for field in PERMISSION_FIELDS}}),
+                    [
+                        {'p_user_id': user_id, 'p_country_id': key[0], 'p_module': Modules(key[1]),
+                         'p_role_id': role_id,
+                         **{f'p_{field}': desired[key][field] for field in PERMISSION_FIELDS}}
+                        for key in to_update
+                    ]
+                )
+            if to_insert:
+                db.execute(
+                    insert(table),
+                    [
+                        {'user_id': user_id, 'country_id': key[0], 'module': Modules(key[1]),
+                         'role_id': role_id, **desired[key]}
+                        for key in to_insert
+                    ]
+                )
+            db.commit()
+
+        result.created = len(to_insert)
+        result.updated = len(to_update)
+        result.deleted = len(to_delete)
+        current_app.logger.info(
+            f"Permissions synced for user {user_id}: {result.created} created, "
+            f"{result.updated} updated, {result.deleted} deleted, {result.unchanged} unchanged"
+        )
+        return result
+
+    @staticmethod
+    def _module_value(module) -> str:
+        return module.value if isinstance(module, Modules) else str(module)
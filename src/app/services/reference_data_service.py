@@ -0,0 +1,146 @@
+"""
+Servicio de datos de referencia para las listas de opciones de los formularios
+"""
+import os
+from typing import Callable, Iterable, List, Tuple
+from flask import request
+from flask_login import current_user
+from aclimate_v3_orm.services import (
+    MngAdmin1Service, MngClimateMeasureService, MngCountryIndicatorService, MngCountryService,
+    MngCropService, MngCultivarService, MngIndicatorCategoryService, MngIndicatorService,
+    MngPhenologicalStageService, MngSeasonService, MngSoilService, MngSourceService, MngStressService
+)
+from config import Config
+from app.utils.cache import VersionedCache
+
+# Entidades con versión propia
+COUNTRY = 'country'
+ADMIN1 = 'adm1'
+SOURCE = 'source'
+CROP = 'crop'
+CULTIVAR = 'cultivar'
+SOIL = 'soil'
+SEASON = 'season'
+INDICATOR = 'indicator'
+INDICATOR_CATEGORY = 'indicator_category'
+COUNTRY_INDICATOR = 'country_indicator'
+CLIMATE_MEASURE = 'climate_measure'
+STRESS = 'stress'
+PHENOLOGICAL_STAGE = 'phenological_stage'
+
+_cache = VersionedCache(
+    versions_folder=os.path.join(Config.UPLOAD_FOLDER, 'reference_versions'),
+    ttl=Config.REFERENCE_CACHE_TTL
+)
+
+
+class ReferenceDataService:
+    """
+    Servicio para obtener las opciones (id, nombre) de los SelectField
+
+    Las listas se guardan en memoria como tuplas livianas y solo se vuelven a
+    consultar cuando cambia la versión de su entidad, es decir, después de una
+    escritura (ver `bump` e `invalidate_on_write`).
+    """
+
+    def __init__(self):
+        self.country_service = MngCountryService()
+        self.adm1_service = MngAdmin1Service()
+        self.source_service = MngSourceService()
+        self.crop_service = MngCropService()
+        self.cultivar_service = MngCultivarService()
+        self.soil_service = MngSoilService()
+        self.season_service = MngSeasonService()
+        self.indicator_service = MngIndicatorService()
+        self.category_service = MngIndicatorCategoryService()
+        self.country_indicator_service = MngCountryIndicatorService()
+        self.measure_service = MngClimateMeasureService()
+        self.stress_service = MngStressService()
+        self.stage_service = MngPhenologicalStageService()
+
+    def _choices(self, entity: str, key: str, load: Callable[[], Iterable],
+                 label: Callable = lambda obj: obj.name) -> List[Tuple[int, str]]:
+        choices = _cache.get_or_load(entity, key, lambda: tuple((obj.id, label(obj)) for obj in load()))
+        # Copia: las rutas agregan opciones vacías a la lista
+        return list(choices)
+
+    def _all(self, service, enabled_only: bool) -> Callable[[], Iterable]:
+        return service.get_all_enable if enabled_only else service.get_all
+
+    def bump(self, *entities: str) -> None:
+        """Invalidar las listas de las entidades después de una escritura"""
+        _cache.bump(*entities)
+
+    # ==================== GEOGRAFÍA ====================
+
+    def countries(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        return self._choices(COUNTRY, f'enabled={enabled_only}', self._all(self.country_service, enabled_only))
+
+    def admin1(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        if enabled_only:
+            load = lambda: self.adm1_service.get_all(filters={"enable": True})
+        else:
+            load = self.adm1_service.get_all
+        return self._choices(ADMIN1, f'enabled={enabled_only}', load)
+
+    def sources(self) -> List[Tuple[int, str]]:
+        return self._choices(SOURCE, 'all', self.source_service.get_all)
+
+    # ==================== CULTIVOS ====================
+
+    def crops(self) -> List[Tuple[int, str]]:
+        return self._choices(CROP, 'all', self.crop_service.get_all)
+
+    def cultivars(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        return self._choices(CULTIVAR, f'enabled={enabled_only}', self._all(self.cultivar_service, enabled_only))
+
+    def soils(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        return self._choices(SOIL, f'enabled={enabled_only}', self._all(self.soil_service, enabled_only))
+
+    def season_ids(self) -> List[int]:
+        """IDs de las temporadas habilitadas (el formulario de setup las muestra por ID)"""
+        return [season_id for season_id, _ in
+                self._choices(SEASON, 'enabled=True', self.season_service.get_all_enable, label=lambda s: s.id)]
+
+    def stresses(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        return self._choices(STRESS, f'enabled={enabled_only}', self._all(self.stress_service, enabled_only))
+
+    def phenological_stages(self, enabled_only: bool = False) -> List[Tuple[int, str]]:
+        return self._choices(PHENOLOGICAL_STAGE, f'enabled={enabled_only}',
+                             self._all(self.stage_service, enabled_only))
+
+    # ==================== INDICADORES Y CLIMA ====================
+
+    def indicators(self) -> List[Tuple[int, str]]:
+        return self._choices(INDICATOR, 'all', self.indicator_service.get_all)
+
+    def indicator_categories(self) -> List[Tuple[int, str]]:
+        return self._choices(INDICATOR_CATEGORY, 'all', self.category_service.get_all)
+
+    def country_indicators(self) -> List[Tuple[int, str]]:
+        return self._choices(COUNTRY_INDICATOR, 'all', self.country_indicator_service.get_all,
+                             label=lambda ci: f"{ci.country.name} - {ci.indicator.name}")
+
+    def climate_measures(self) -> List[Tuple[int, str]]:
+        return self._choices(CLIMATE_MEASURE, 'all', self.measure_service.get_all,
+                             label=lambda m: f"{m.name} ({m.short_name})")
+
+
+def invalidate_on_write(bp, *entities: str) -> None:
+    """
+    Invalidar las listas de `entities` después de cada escritura del blueprint
+
+    Una escritura exitosa termina en una redirección: los POST (crear, editar,
+    acciones masivas) y las rutas GET de eliminar/reactivar. Las vistas y los
+    formularios con errores responden 200 y no cambian la versión.
+    """
+    @bp.after_request
+    def _bump_reference_versions(response):
+        if response.status_code in (301, 302, 303) and current_user.is_authenticated and _is_write_request():
+            _cache.bump(*entities)
+        return response
+
+
+def _is_write_request() -> bool:
+    view_name = (request.endpoint or '').rsplit('.', 1)[-1]
+    return request.method == 'POST' or view_name.startswith(('delete_', 'reset_'))
@@ -0,0 +1,134 @@
+"""
+Token de servicio de Keycloak (client credentials) compartido por todo el proceso
+
+Todas las instancias de KeycloakAPIService (las de UserService, RoleService,
+las rutas, las altas masivas) usan el mismo token. Se renueva antes de que
+venza: el primer hilo que entra en la ventana de renovación pide el token
+nuevo mientras los demás siguen usando el vigente. Si el token ya venció, un
+solo hilo lo pide y el resto espera ese resultado. Las descargas y su latencia
+se exponen en /metrics.
+"""
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+from config import Config
+from app.utils import http_client
+from app.utils.fork import after_fork
+from app.utils.instrumentation import KEYCLOAK_TOKEN_FETCHES, KEYCLOAK_TOKEN_FETCH_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Motivos de una solicitud
+REASON_INITIAL = 'initial'
+REASON_EXPIRED = 'expired'
+REASON_PROACTIVE = 'proactive'
+
+
+class ServiceTokenManager:
+    """Caché del token de servicio, segura entre hilos y de vuelo único"""
+
+    def __init__(self):
+        # (token, renovar_desde, vence_en) se reemplaza como una sola tupla
+        self._state: Tuple[Optional[str], float, float] = (None, 0.0, 0.0)
+        self._failed_at = 0.0
+        self._attempts = 0
+        self._lock = threading.Lock()
+
+    def get_token(self) -> Optional[str]:
+        """
+        Obtener el token de servicio vigente, pidiéndolo a Keycloak si hace falta
+
+        Returns:
+            El access token, o None si Keycloak no lo entregó
+        """
+        token, refresh_at, expires_at = self._state
+        now = time.time()
+        if token and now < expires_at:
+            # Renovación anticipada: solo un hilo la hace; los demás no esperan. Tras un fallo se
+            # sigue usando el token vigente y no se reintenta antes de SERVICE_TOKEN_RETRY_INTERVAL
+            if now >= refresh_at and now - self._failed_at >= Config.SERVICE_TOKEN_RETRY_INTERVAL \
+                    and self._lock.acquire(blocking=False):
+                try:
+                    now = time.time()
+                    if self._state[1] <= now and now - self._failed_at >= Config.SERVICE_TOKEN_RETRY_INTERVAL:
+                        self._fetch(REASON_PROACTIVE)
+                finally:
+                    self._lock.release()
+                return self._state[0] or token
+            return token
+
+        # Sin token vigente: un solo hilo lo pide y los demás esperan su resultado
+        attempts = self._attempts
+        with self._lock:
+            token, _, expires_at = self._state
+            if token and time.time() < expires_at:
+                return token
+            if self._attempts != attempts:
+                # Otro hilo lo acaba de intentar sin éxito mientras esperábamos
+                return None
+            if time.time() - self._failed_at < Config.SERVICE_TOKEN_RETRY_INTERVAL:
+                return None
+            return self._fetch(REASON_EXPIRED if token else REASON_INITIAL)
+
+    def invalidate(self, token: Optional[str] = None) -> None:
+        """
+        Descartar el token (ej. Keycloak lo rechazó antes de su vencimiento)
+
+        Args:
+            token: Token rechazado; si otro hilo ya lo reemplazó, el nuevo se conserva
+        """
+        if token is None or self._state[0] == token:
+            self._state = (None, 0.0, 0.0)
+
+    def _fetch(self, reason: str) -> Optional[str]:
+        """Pedir un token nuevo a Keycloak (se llama con el lock tomado)"""
+        self._attempts += 1
+        token_url = (
+            f"{Config.KEYCLOAK_SERVER_URL}/realms/{Config.KEYCLOAK_REALM}/protocol/openid-connect/token"
+        )
+        data = {
+            'grant_type': 'client_credentials',
+            'client_id': Config.KEYCLOAK_CLIENT_ID,
+            'client_secret': Config.KEYCLOAK_CLIENT_SECRET
+        }
+
+        logger.info(f"Requesting service token ({reason}) - Realm: {Config.KEYCLOAK_REALM}, "
+                    f"Client: {Config.KEYCLOAK_CLIENT_ID}")
+        started = time.perf_counter()
+        try:
+            response = http_client.post(token_url, data=data, timeout=30)
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.status_code} - {response.text}")
+            token_data = response.json()
+            token = token_data['access_token']
+        except Exception as e:
+            KEYCLOAK_TOKEN_FETCH_DURATION.observe(time.perf_counter() - started)
+            KEYCLOAK_TOKEN_FETCHES.inc(reason=reason, result='error')
+            self._failed_at = time.time()
+            logger.error(f"Failed to get service token: {e}")
+            return None
+
+        KEYCLOAK_TOKEN_FETCH_DURATION.observe(time.perf_counter() - started)
+        KEYCLOAK_TOKEN_FETCHES.inc(reason=reason, result='success')
+
+        issued_at = time.time()
+        lifetime = float(token_data.get('expires_in', 300))
+        expires_at = issued_at + max(lifetime - Config.SERVICE_TOKEN_EXPIRY_SKEW, 0)
+        # Renovar antes de vencer: con el margen configurado, sin pasar de la mitad de la vida del token
+        refresh_at = issued_at + max(lifetime - Config.SERVICE_TOKEN_REFRESH_BEFORE, lifetime / 2)
+        self._state = (token, min(refresh_at, expires_at), expires_at)
+        self._failed_at = 0.0
+        logger.info("Service token obtained successfully")
+        return token
+
+
+# Instancia del proceso, compartida por todos los KeycloakAPIService
+service_token_manager = ServiceTokenManager()
+
+
+@after_fork
+def _reset_after_fork() -> None:
+    """Reemplazar el lock heredado del maestro (el token heredado sigue siendo válido)"""
+    service_token_manager._lock = threading.Lock()
@@ -0,0 +1,371 @@
+"""
+Servicio de alta de usuarios en Keycloak y en la base de datos local
+
+Cada alta es una saga de pasos idempotentes (Keycloak → BD → permisos) con
+reintentos y backoff exponencial. Si el usuario quedó creado en Keycloak pero
+no se pudo registrar en la BD, se compensa eliminándolo de Keycloak. Las altas
+masivas desde CSV se ejecutan en segundo plano y su progreso se persiste como
+JSON para que cualquier worker de gunicorn pueda consultarlo.
+"""
+import csv
+import io
+import os
+import re
+import time
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional
+from flask import current_app
+from config import Config
+from app.utils.jobs import (
+    JobExecutor, JobStore, STATUS_QUEUED, STATUS_RUNNING, STATUS_COMPLETED, STATUS_FAILED
+)
+from app.services.keycloak_api_service import KeycloakAPIService
+from app.services.service_token_manager import service_token_manager
+from app.services.permission_sync_service import PermissionSyncService
+from app.services.user_service import UserService
+
+# Estados de cada usuario
+ITEM_PENDING = 'pending'
+ITEM_CREATED = 'created'
+# El nombre de usuario ya existía en Keycloak: no se crea ni se vincula
+ITEM_EXISTING = 'existing'
+ITEM_INVALID = 'invalid'
+ITEM_FAILED = 'failed'
+ITEM_COMPENSATED = 'compensated'
+
+# Módulos con lectura asignados a los países indicados en el CSV (igual que al editar un usuario)
+DEFAULT_READ_MODULES = ('GEOGRAPHIC', 'CLIMATE_DATA', 'CROP_DATA', 'INDICATORS_DATA', 'STRESS_DATA', 'PHENOLOGICAL_STAGE')
+
+CSV_FIELDS = ('username', 'email', 'first_name', 'last_name', 'password', 'role', 'countries')
+REQUIRED_CSV_FIELDS = ('username', 'email', 'first_name', 'last_name', 'password')
+
+_EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+_executor = JobExecutor(Config.PROVISIONING_JOB_WORKERS, 'user-provisioning')
+
+
+class ProvisioningError(Exception):
+    """Un paso de la saga falló después de agotar los reintentos"""
+
+    def __init__(self, step: str, message: str):
+        super().__init__(f"{step}: {message}")
+        self.step = step
+
+
+class UsernameTakenError(ProvisioningError):
+    """El nombre de usuario ya pertenece a una cuenta de Keycloak que no creó esta saga (no se reintenta)"""
+
+    def __init__(self, username: str):
+        super().__init__('keycloak', f"El nombre de usuario '{username}' ya existe en Keycloak")
+
+
+class UserProvisioningService:
+    """
+    Servicio para dar de alta usuarios (uno o por lotes desde CSV) como una saga
+
+    Los pasos son idempotentes, de modo que reintentar un alta no duplica nada:
+    antes de crear en Keycloak se busca el usuario por nombre, y antes de crear
+    en la BD se busca por ID de Keycloak. Una cuenta de Keycloak solo se
+    reutiliza si la creó un intento anterior de esta saga (apareció después de
+    intentar crearla y tiene el mismo email); si el nombre ya estaba tomado el
+    alta se rechaza. Solo se compensa (se elimina de Keycloak) un usuario que
+    creó esta misma saga.
+
+    Las contraseñas nunca se escriben en disco: viajan en memoria hasta el hilo
+    que ejecuta el trabajo. Las altas masivas duran más que un access token de
+    sesión, así que no usan el del administrador sino el token de servicio
+    (client credentials) del proceso, renovado antes de vencer; la cuenta de
+    servicio del cliente necesita permiso para crear y eliminar usuarios.
+    """
+
+    def __init__(self, jobs_folder: Optional[str] = None):
+        self.jobs = JobStore(
+            folder=jobs_folder or os.path.join(Config.UPLOAD_FOLDER, 'provisioning_jobs'),
+            stale_after=Config.PROVISIONING_JOB_STALE_AFTER,
+            queued_expire=Config.PROVISIONING_JOB_QUEUED_EXPIRE,
+            retention=Config.PROVISIONING_JOB_RETENTION,
+            stale_error='El alta de usuarios se interrumpió antes de terminar.'
+        )
+        self.user_service = UserService()
+        self.keycloak_api = KeycloakAPIService()
+        self.permission_sync = PermissionSyncService()
+
+    # ==================== SAGA ====================
+
+    def _retry(self, step: str, action: Callable[[int], Optional[object]]):
+        """
+        Ejecutar un paso con reintentos y backoff exponencial
+
+        `action` recibe el número de intento (desde 0) y devuelve un resultado
+        no vacío si tuvo éxito.
+        """
+        error = 'sin respuesta'
+        for attempt in range(Config.PROVISIONING_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(Config.PROVISIONING_BACKOFF * 2 ** (attempt - 1))
+            try:
+                result = action(attempt)
+                if result:
+                    return result
+                error = 'sin respuesta'
+            except ProvisioningError:
+                raise
+            except Exception as e:
+                error = str(e)
+            current_app.logger.warning(f"Provisioning step '{step}' failed (attempt {attempt + 1}): {error}")
+        raise ProvisioningError(step, error)
+
+    def provision(self, item: Dict, password: str, token: str, role_id: int,
+                  country_ids: Iterable[int] = (), enabled: bool = True) -> Dict:
+        """
+        Dar de alta un usuario en Keycloak y en la BD (y asignar permisos de lectura)
+
+        Args:
+            item: Registro del alta con username, email, first_name y last_name;
+                se completa con keycloak_id, db_id, status y error
+            password: Contraseña inicial
+            token: Token del administrador para la API de usuarios
+            role_id: Rol en la BD local
+            country_ids: Países con acceso de lectura a los módulos por defecto
+            enabled: Si el usuario queda habilitado
+
+        Returns:
+            El mismo `item` actualizado
+        """
+        item.setdefault('keycloak_id', None)
+        item.setdefault('keycloak_created', False)
+        item.setdefault('db_id', None)
+        item['error'] = None
+
+        # 1. Keycloak: reutilizar solo el usuario que creó un intento anterior cuya respuesta se perdió
+        if not item['keycloak_id']:
+            def keycloak_step(attempt: int):
+                existing = self.keycloak_api.find_user_by_username(item['username'])
+                if existing:
+                    # En el primer intento no pudo crearlo esta saga; después, solo si coincide el email
+                    same_email = (existing.get('email') or '').lower() == item['email'].lower()
+                    if attempt > 0 and same_email:
+                        return existing['id'], True
+                    raise UsernameTakenError(item['username'])
+                result = self.keycloak_api.create_user(
+                    token=token,
+                    username=item['username'],
+                    email=item['email'],
+                    password=password,
+                    first_name=item['first_name'],
+                    last_name=item['last_name'],
+                    enabled=enabled
+                )
+                return (result['user_id'], True) if result and result.get('user_id') else None
+
+            try:
+                item['keycloak_id'], item['keycloak_created'] = self._retry('keycloak', keycloak_step)
+            except UsernameTakenError as e:
+                item['status'] = ITEM_EXISTING
+                item['error'] = str(e)
+                return item
+            except ProvisioningError as e:
+                item['status'] = ITEM_FAILED
+                item['error'] = str(e)
+                return item
+
+        # 2. BD local: reutilizar el registro si ya existe para este ID de Keycloak
+        try:
+            if not item['db_id']:
+                existing = self.user_service.get_by_keycloak_id(item['keycloak_id'])
+                if existing:
+                    item['db_id'] = existing['id']
+                    item['status'] = ITEM_CREATED
+                else:
+                    created = self._retry('database', lambda attempt: self.user_service.create(
+                        keycloak_id=item['keycloak_id'], role_id=role_id, enabled=enabled
+                    ))
+                    item['db_id'] = created['id']
+                    item['status'] = ITEM_CREATED
+        except ProvisioningError as e:
+            self._compensate(item, token, str(e))
+            return item
+
+        # 3. Permisos: un fallo aquí no deshace el alta (se pueden asignar después)
+        country_ids = list(country_ids)
+        if country_ids and item['status'] == ITEM_CREATED:
+            permissions = {
+                (country_id, module): {'read': True}
+                for country_id in country_ids for module in DEFAULT_READ_MODULES
+            }
+            try:
+                self._retry('permissions', lambda attempt: self.permission_sync.sync(
+                    item['db_id'], role_id, country_ids, permissions
+                ))
+            except ProvisioningError as e:
+                item['error'] = str(e)
+        return item
+
+    def _compensate(self, item: Dict, token: str, error: str) -> None:
+        """Eliminar de Keycloak el usuario creado por esta saga si la BD falló"""
+        item['error'] = error
+        if not item['keycloak_created']:
+            item['status'] = ITEM_FAILED
+            return
+        try:
+            self._retry('compensation', lambda attempt: self.keycloak_api.delete_user(token, item['keycloak_id']))
+            item['status'] = ITEM_COMPENSATED
+            item['keycloak_id'] = None
+            item['keycloak_created'] = False
+        except ProvisioningError as e:
+            item['status'] = ITEM_FAILED
+            item['error'] = f"{error}; no se pudo eliminar de Keycloak ({item['keycloak_id']}): {e}"
+            current_app.logger.error(f"Compensation failed for Keycloak user {item['keycloak_id']}: {e}")
+
+    # ==================== ALTA MASIVA DESDE CSV ====================
+
+    def parse_csv(self, stream: BinaryIO, roles: List[Dict], countries: List[Dict],
+                  default_role_id: Optional[int] = None) -> List[Dict]:
+        """
+        Leer y validar las filas del CSV de usuarios
+
+        Columnas: username, email, first_name, last_name, password y, opcionales,
+        role (nombre o ID; si falta se usa `default_role_id`) y countries
+        (nombres separados por ';').
+
+        Returns:
+            Lista de filas con su registro (`item`), la contraseña, el rol y los
+            países; las filas inválidas quedan con estado `invalid`
+
+        Raises:
+            ValueError: Si el archivo no tiene las columnas requeridas o supera el máximo de filas
+        """
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        headers = {(name or '').strip().lower() for name in reader.fieldnames or []}
+        missing = [name for name in REQUIRED_CSV_FIELDS if name not in headers]
+        if missing:
+            raise ValueError(f"Faltan columnas requeridas: {', '.join(missing)}")
+
+        role_ids = {str(role['id']): role['id'] for role in roles}
+        role_ids.update({role['name'].strip().lower(): role['id'] for role in roles})
+        country_ids = {country['name'].strip().lower(): country['id'] for country in countries}
+
+        rows = []
+        seen = set()
+        for line, raw in enumerate(reader, start=2):
+            if len(rows) >= Config.PROVISIONING_MAX_ROWS:
+                raise ValueError(f"El archivo supera el máximo de {Config.PROVISIONING_MAX_ROWS} usuarios")
+            values = {(key or '').strip().lower(): (value or '').strip() for key, value in raw.items()}
+            if not any(values.values()):
+                continue
+
+            item = {
+                'line': line,
+                'username': values.get('username', ''),
+                'email': values.get('email', ''),
+                'first_name': values.get('first_name', ''),
+                'last_name': values.get('last_name', ''),
+                'status': ITEM_PENDING,
+                'error': None
+            }
+            errors = [f"{name} es obligatorio" for name in REQUIRED_CSV_FIELDS if not values.get(name)]
+            if item['username'] and not 3 <= len(item['username']) <= 50:
+                errors.append('username debe tener entre 3 y 50 caracteres')
+            if item['email'] and not _EMAIL_PATTERN.match(item['email']):
+                errors.append('email no es válido')
+            if item['username'].lower() in seen:
+                errors.append('username repetido en el archivo')
+            seen.add(item['username'].lower())
+
+            role_value = values.get('role', '').lower()
+            role_id = role_ids.get(role_value) if role_value else default_role_id
+            if not role_id:
+                errors.append(f"rol '{values.get('role', '')}' no existe" if role_value else 'rol es obligatorio')
+
+            row_countries = []
+            for name in filter(None, (part.strip() for part in values.get('countries', '').split(';'))):
+                if name.lower() in country_ids:
+                    row_countries.append(country_ids[name.lower()])
+                else:
+                    errors.append(f"país '{name}' no existe")
+
+            if errors:
+                item['status'] = ITEM_INVALID
+                item['error'] = '; '.join(errors)
+            rows.append({
+                'item': item,
+                'password': values.get('password', ''),
+                'role_id': role_id,
+                'country_ids': row_countries
+            })
+        return rows
+
+    def submit(self, rows: List[Dict], filename: Optional[str] = None,
+               username: Optional[str] = None) -> str:
+        """
+        Encolar el alta de las filas leídas con `parse_csv`
+
+        Args:
+            rows: Filas validadas (las inválidas se registran sin procesarse)
+            filename: Nombre del archivo subido
+            username: Usuario que solicita el alta
+
+        Returns:
+            ID del trabajo creado
+        """
+        job_id = self.jobs.new_id()
+        job = {
+            'id': job_id,
+            'status': STATUS_QUEUED,
+            'filename': filename,
+            'username': username,
+            'items': [row['item'] for row in rows],
+            'rows_total': len(rows),
+            'rows_processed': 0,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        self.jobs.save(job)
+
+        app = current_app._get_current_object()
+        _executor.submit(self._run, app, job, rows)
+        current_app.logger.info(f"Alta masiva de usuarios encolada: {job_id} ({len(rows)} filas)")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Obtener el registro de un trabajo (con el resumen por estado) o None si no existe"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        summary = {}
+        for item in job['items']:
+            summary[item['status']] = summary.get(item['status'], 0) + 1
+        job['summary'] = summary
+        return job
+
+    def _run(self, app, job: Dict, rows: List[Dict]) -> None:
+        """Ejecutar el alta masiva en un hilo del pool, un usuario a la vez (con el token de servicio)"""
+        with app.app_context():
+            job['status'] = STATUS_RUNNING
+            job['started_at'] = time.time()
+            self.jobs.save(job)
+
+            try:
+                for index, row in enumerate(rows):
+                    if row['item']['status'] == ITEM_PENDING:
+                        # Se pide por fila: el gestor entrega un token vigente durante todo el lote
+                        token = service_token_manager.get_token()
+                        if token:
+                            self.provision(row['item'], row['password'], token, row['role_id'], row['country_ids'])
+                        else:
+                            row['item']['status'] = ITEM_FAILED
+                            row['item']['error'] = 'Token de servicio de Keycloak no disponible'
+                    job['rows_processed'] = index + 1
+                    self.jobs.save(job)
+                job['status'] = STATUS_COMPLETED
+            except Exception as e:
+                app.logger.error(f"Error en el alta masiva {job['id']}: {e}")
+                job['error'] = str(e)
+                job['status'] = STATUS_FAILED
+            finally:
+                job['finished_at'] = time.time()
+                self.jobs.save(job)
+
+            app.logger.info(f"Alta masiva de usuarios {job['id']} finalizada: {job['status']}")
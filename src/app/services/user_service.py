@@ -85,31 +85,36 @@ class UserService:
                 # Convertir a schemas
                 users_read = [UserRead.model_validate(user) for user in users]
             
+            # Enriquecer con datos de Keycloak en un solo lote
+            keycloak_users, keycloak_errors = self.keycloak_api.get_users_by_ids(
+                user.keycloak_ext_id for user in users_read
+            )
+            
             normalized_users = []
             
             for user in users_read:
                 user_dict = self._user_to_dict(user)
+                keycloak_user = keycloak_users.get(user.keycloak_ext_id)
                 
-                # Enriquecer con datos de Keycloak
-                try:
-                    keycloak_user = self.keycloak_api.get_user_by_id(user.keycloak_ext_id)
-                    if keycloak_user:
-                        user_dict.update({
-                            'username': keycloak_user.get('username'),
-                            'email': keycloak_user.get('email'),
-                            'first_name': keycloak_user.get('firstName'),
-                            'last_name': keycloak_user.get('lastName'),
-                            'enabled': keycloak_user.get('enabled', True)
-                        })
-                except Exception as e:
-                    current_app.logger.warning(f"Could not fetch Keycloak data for user {user.id}: {e}")
-                    # Si no se puede obtener de Keycloak, poner valores por defecto
+                if keycloak_user:
+                    user_dict.update({
+                        'username': keycloak_user.get('username'),
+                        'email': keycloak_user.get('email'),
+                        'first_name': keycloak_user.get('firstName'),
+                        'last_name': keycloak_user.get('lastName'),
+                        'enabled': keycloak_user.get('enabled', True),
+                        'keycloak_error': None
+                    })
+                else:
+                    error = keycloak_errors.get(user.keycloak_ext_id, 'Usuario sin ID de Keycloak')
+                    current_app.logger.warning(f"Could not fetch Keycloak data for user {user.id}: {error}")
                     user_dict.update({
-                        'username': f'user_{user.id}',
+                        'username': None,
                         'email': None,
                         'first_name': None,
                         'last_name': None,
-                        'enabled': user.enable
+                        'enabled': user.enable,
+                        'keycloak_error': error
                     })
                 
                 normalized_users.append(user_dict)
@@ -309,7 +314,7 @@ class UserService:
         enabled: bool = True
     ) -> Optional[Dict]:
         """
-        Crear usuario completo: primero en Keycloak, luego en BD local
+        Crear usuario completo: primero en Keycloak, luego en BD local (con compensación)
         
         Args:
             username: Nombre de usuario
@@ -322,61 +327,46 @@ class UserService:
         
         Returns:
             Dict con información del usuario creado o None si falla
+        
+        Raises:
+            ValueError: Si el nombre de usuario ya existe en Keycloak
         """
         token = self._get_current_user_token()
         if not token:
             current_app.logger.error("No access token available for Keycloak API")
             return None
         
-        try:
-            # 1. Crear usuario en Keycloak
-            current_app.logger.info(f"Creating user in Keycloak: {username}")
-            keycloak_result = self.keycloak_api.create_user(
-                token=token,
-                username=username,
-                email=email,
-                password=password,
-                first_name=first_name,
-                last_name=last_name,
-                enabled=enabled
-            )
-            
-            if not keycloak_result or 'user_id' not in keycloak_result:
-                current_app.logger.error("Failed to create user in Keycloak")
-                return None
-            
-            keycloak_user_id = keycloak_result['user_id']
-            current_app.logger.info(f"User created in Keycloak with ID: {keycloak_user_id}")
-            
-            # 2. Crear usuario en BD local
-            current_app.logger.info(f"Creating user in local database")
-            db_user = self.create(
-                keycloak_id=keycloak_user_id,
-                role_id=role_id,
-                enabled=enabled
-            )
-            
-            if not db_user:
-                current_app.logger.error("Failed to create user in local database")
-                # TODO: Considerar rollback - eliminar usuario de Keycloak
-                return None
-            
-            current_app.logger.info(f"User created successfully: {username}")
-            
-            return {
-                'keycloak_id': keycloak_user_id,
-                'db_id': db_user['id'],
-                'username': username,
-                'email': email,
-                'first_name': first_name,
-                'last_name': last_name,
-                'role_id': role_id,
-                'enabled': enabled
-            }
-            
-        except Exception as e:
-            current_app.logger.error(f"Error creating complete user: {e}")
+        # Saga idempotente Keycloak → BD: si la BD falla, el usuario se elimina de Keycloak
+        from app.services.user_provisioning_service import UserProvisioningService, ITEM_CREATED, ITEM_EXISTING
+        
+        item = {
+            'username': username,
+            'email': email,
+            'first_name': first_name,
+            'last_name': last_name
+        }
+        UserProvisioningService().provision(item, password, token, role_id, enabled=enabled)
+        
+        if item['status'] == ITEM_EXISTING:
+            # Conflicto: la ruta lo informa como error de validación
+            raise ValueError(f"El nombre de usuario '{username}' ya existe")
+        
+        if item['status'] != ITEM_CREATED:
+            current_app.logger.error(f"Error creating complete user {username}: {item['status']} - {item['error']}")
             return None
+        
+        current_app.logger.info(f"User created successfully: {username}")
+        
+        return {
+            'keycloak_id': item['keycloak_id'],
+            'db_id': item['db_id'],
+            'username': username,
+            'email': email,
+            'first_name': first_name,
+            'last_name': last_name,
+            'role_id': role_id,
+            'enabled': enabled
+        }
     
     def update_complete_user(
         self,
@@ -24,19 +24,20 @@ export function setupBulkActions(config = {}) {
 
   // Obtener elementos
   const selectAll = document.getElementById(selectAllId);
-  const checkboxes = document.querySelectorAll(`.${rowCheckboxClass}`);
   const bulkDisable = document.getElementById(disableBtnId);
   const bulkRecover = document.getElementById(recoverBtnId);
   const form = document.getElementById(formId);
   const actionInput = document.getElementById(actionInputId);
 
   // Salir si faltan elementos esenciales
-  if (!selectAll || !checkboxes.length || !bulkDisable || !bulkRecover || !form || !actionInput) {
+  if (!selectAll || !bulkDisable || !bulkRecover || !form || !actionInput) {
     console.warn('Elementos de bulk actions no encontrados');
     return;
   }
 
+  // Las filas pueden cargarse después (listados paginados): consultar siempre el DOM actual
   function getVisibleCheckboxes() {
+    const checkboxes = form.querySelectorAll(`.${rowCheckboxClass}`);
     return Array.from(checkboxes).filter(cb => {
       const row = cb.closest('tr');
       if (!row) {
@@ -82,11 +83,11 @@ export function setupBulkActions(config = {}) {
     });
   }
 
-  // Eventos para checkboxes individuales
-  checkboxes.forEach(cb => {
-    cb.addEventListener('change', () => {
+  // Eventos para checkboxes individuales (delegados en el formulario)
+  form.addEventListener('change', (e) => {
+    if (e.target.classList.contains(rowCheckboxClass)) {
       updateSelectionState();
-    });
+    }
   });
 
   document.addEventListener('bulk-selection-refresh', () => {
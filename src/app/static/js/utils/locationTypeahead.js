@@ -0,0 +1,111 @@
+// static/js/utils/locationTypeahead.js
+// Autocompletado para selects de locaciones: las opciones se buscan en el
+// servidor (/api/locations/search) en lugar de renderizar todas las locaciones.
+export function setupLocationTypeahead(config = {}) {
+  // Configuración predeterminada
+  const defaultConfig = {
+    selectId: 'location_id',
+    searchInputId: 'locationSearch',
+    countrySelectId: null,
+    searchUrl: '/api/locations/search',
+    minLength: 2,
+    delay: 250,
+    noResultsText: 'Sin resultados'
+  };
+
+  const {
+    selectId,
+    searchInputId,
+    countrySelectId,
+    searchUrl,
+    minLength,
+    delay,
+    noResultsText
+  } = { ...defaultConfig, ...config };
+
+  const select = document.getElementById(selectId);
+  const searchInput = document.getElementById(searchInputId);
+  const countrySelect = countrySelectId ? document.getElementById(countrySelectId) : null;
+
+  if (!select || !searchInput) {
+    console.warn('Elementos del autocompletado de locaciones no encontrados');
+    return;
+  }
+
+  let timer = null;
+  let requestId = 0;
+
+  function optionText(location) {
+    const place = [location.admin2, location.admin1, location.country].filter(Boolean).join(', ');
+    return place ? `${location.label} - ${place}` : location.label;
+  }
+
+  function renderOptions(locations) {
+    const selected = select.value;
+    const selectedOption = selected ? select.querySelector(`option[value="${CSS.escape(selected)}"]`) : null;
+
+    select.innerHTML = '';
+    // Conservar la locación elegida aunque no esté entre los resultados
+    if (selectedOption && !locations.some(location => String(location.id) === selected)) {
+      select.appendChild(selectedOption);
+    }
+    locations.forEach(location => {
+      select.appendChild(new Option(optionText(location), location.id));
+    });
+    if (!select.options.length) {
+      const empty = new Option(noResultsText, '');
+      empty.disabled = true;
+      select.appendChild(empty);
+    }
+    if (selected) {
+      select.value = selected;
+    }
+  }
+
+  function search() {
+    const query = searchInput.value.trim();
+    const countryId = countrySelect ? countrySelect.value : '';
+    if (query.length < minLength && !countryId) {
+      return;
+    }
+
+    const params = new URLSearchParams({ q: query });
+    if (countryId) {
+      params.set('country_id', countryId);
+    }
+
+    // Descartar respuestas de búsquedas anteriores que lleguen tarde
+    const currentRequest = ++requestId;
+    fetch(`${searchUrl}?${params}`, { headers: { 'Accept': 'application/json' } })
+      .then(response => {
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+        return response.json();
+      })
+      .then(locations => {
+        if (currentRequest === requestId) {
+          renderOptions(locations);
+        }
+      })
+      .catch(error => console.error('Error buscando locaciones:', error));
+  }
+
+  function scheduleSearch() {
+    clearTimeout(timer);
+    timer = setTimeout(search, delay);
+  }
+
+  searchInput.addEventListener('input', scheduleSearch);
+  // Evitar que Enter envíe el formulario mientras se busca
+  searchInput.addEventListener('keydown', event => {
+    if (event.key === 'Enter') {
+      event.preventDefault();
+      clearTimeout(timer);
+      search();
+    }
+  });
+  if (countrySelect) {
+    countrySelect.addEventListener('change', search);
+  }
+}
@@ -15,7 +15,11 @@ export function initTableSearch(config) {
         searchColumns,
         filterConfigs,
         rowCheckboxSelector = '.select-row',
-        clearSelectionOnHide = true
+        clearSelectionOnHide = true,
+        server = null,
+        serverUrl = window.location.pathname,
+        loadMoreId = 'listLoadMore',
+        totalCountId = 'listTotalCount'
     } = config;
 
     // Elementos DOM
@@ -25,7 +29,7 @@ export function initTableSearch(config) {
     const noResults = document.getElementById(noResultsId);
     const resultsCount = document.getElementById(resultsCountId);
     const tableBody = document.getElementById(tableBodyId);
-    const rows = tableBody.querySelectorAll('tr');
+    let rows = tableBody.querySelectorAll('tr');
     const filtersMenu = document.querySelector(`#${filtersButtonId} + .dropdown-menu`);
 
     // Estado
@@ -155,14 +159,15 @@ export function initTableSearch(config) {
         
         let menuHTML = '';
         
-        filterConfigs.forEach(filterConfig => {
+        activeFilterConfigs().forEach(filterConfig => {
             // Cabecera del filtro
             menuHTML += `<li><h6 class="dropdown-header">${filterConfig.label}</h6></li>`;
             
             // Obtener valores únicos para este filtro
-            const uniqueValues = new Map();
+            const uniqueValues = server ? facetValues(filterConfig) : new Map();
             
             rows.forEach(row => {
+                if (server) return;
                 const value = filterConfig.getValue(row);
                 if (value && !uniqueValues.has(value)) {
                     uniqueValues.set(value, filterConfig.getDisplayValue ? 
@@ -194,6 +199,11 @@ export function initTableSearch(config) {
                     </li>
                 `;
             });
+
+            // El servidor recortó la lista de valores: el resto se encuentra con la búsqueda
+            if (server && (server.facets_truncated || []).includes(filterConfig.name)) {
+                menuHTML += `<li><span class="dropdown-item-text small text-muted">${filtersButton.dataset.truncatedText}</span></li>`;
+            }
         });
         
         // Botón para limpiar filtros
@@ -224,7 +234,7 @@ export function initTableSearch(config) {
                 }
                 
                 updateFiltersDisplay();
-                applyFilters();
+                refresh();
             });
         });
         
@@ -234,10 +244,182 @@ export function initTableSearch(config) {
             activeFilters = {};
             filtersMenu.querySelectorAll('.form-check-input').forEach(cb => cb.checked = false);
             updateFiltersDisplay();
-            applyFilters();
+            refresh();
+        });
+    }
+
+    // ==================== MODO SERVIDOR ====================
+    // Con `server` (metadata de la página renderizada) la búsqueda, los filtros,
+    // el orden y la paginación se resuelven en el servidor pidiendo la variante
+    // JSON del listado; las filas recibidas reemplazan o se agregan al tbody.
+
+    let searchTimer = null;
+    let requestId = 0;
+
+    /**
+     * Filtros disponibles: en modo servidor solo los que el servidor acepta
+     */
+    function activeFilterConfigs() {
+        if (!server) return filterConfigs;
+        return filterConfigs.filter(f => server.facets && server.facets[f.name]);
+    }
+
+    /**
+     * Opciones de un filtro a partir de las facetas del servidor. Las
+     * configuraciones existentes leen el valor desde una fila, así que se les
+     * pasa una fila sintética que devuelve el valor de la faceta.
+     */
+    function facetValues(filterConfig) {
+        const values = new Map();
+        (server.facets[filterConfig.name] || []).forEach(value => {
+            const text = String(value);
+            const valueRow = {
+                dataset: new Proxy({}, { get: () => text }),
+                querySelector: () => ({ textContent: text })
+            };
+            values.set(text, filterConfig.getDisplayValue ?
+                String(filterConfig.getDisplayValue(valueRow) || text) : text);
+        });
+        return values;
+    }
+
+    /**
+     * Construye la URL de la variante JSON con el estado actual
+     */
+    function buildQuery(page, asJson) {
+        const params = new URLSearchParams();
+        const searchTerm = searchInput.value.trim();
+        if (asJson) params.set('format', 'json');
+        if (page > 1) params.set('page', page);
+        if (searchTerm) params.set('q', searchTerm);
+        if (server.sort) params.set('sort', server.sort);
+        if (server.per_page) params.set('per_page', server.per_page);
+        for (const [filterName, filterSet] of Object.entries(activeFilters)) {
+            filterSet.forEach(value => params.append(`f_${filterName}`, value));
+        }
+        return params.toString();
+    }
+
+    /**
+     * Pide una página al servidor; `append` agrega las filas en lugar de reemplazarlas
+     */
+    function fetchPage(page, append = false) {
+        const currentRequest = ++requestId;
+        return fetch(`${serverUrl}?${buildQuery(page, true)}`, {
+            headers: { 'Accept': 'application/json' }
+        })
+            .then(response => {
+                if (!response.ok) throw new Error(response.statusText);
+                return response.json();
+            })
+            .then(data => {
+                // Ignorar respuestas de búsquedas ya reemplazadas
+                if (currentRequest !== requestId) return;
+                if (append) {
+                    tableBody.insertAdjacentHTML('beforeend', data.html);
+                } else {
+                    tableBody.innerHTML = data.html;
+                }
+                Object.assign(server, data, { facets: server.facets });
+                rows = tableBody.querySelectorAll('tr');
+                renderServerResults();
+            })
+            .catch(error => console.error('Error al cargar el listado:', error));
+    }
+
+    /**
+     * Actualiza conteos, resaltado y el botón "cargar más" tras una respuesta
+     */
+    function renderServerResults() {
+        const searchTerm = searchInput.value.trim();
+        if (searchTerm) {
+            rows.forEach(row => {
+                searchColumns.forEach(column => {
+                    row.querySelectorAll(column.selector).forEach(cell => highlightText(cell, escapeRegExp(searchTerm)));
+                });
+            });
+        }
+
+        updateResultsUI(searchTerm, rows.length);
+        const totalCount = document.getElementById(totalCountId);
+        if (totalCount) totalCount.textContent = server.total;
+        const loadMore = document.getElementById(loadMoreId);
+        if (loadMore) {
+            loadMore.style.display = server.has_next ? '' : 'none';
+            loadMore.href = `${serverUrl}?${buildQuery(server.page + 1, false)}`;
+        }
+        updateSortIndicators();
+
+        document.dispatchEvent(new CustomEvent('bulk-selection-refresh'));
+    }
+
+    function escapeRegExp(text) {
+        return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+    }
+
+    /**
+     * Marca la columna de orden activa en los encabezados con data-sort
+     */
+    function updateSortIndicators() {
+        tableContainer.querySelectorAll('th[data-sort]').forEach(th => {
+            const key = th.dataset.sort;
+            th.querySelector('.sort-indicator')?.remove();
+            if (server.sort === key || server.sort === `-${key}`) {
+                const icon = server.sort.startsWith('-') ? 'fa-sort-down' : 'fa-sort-up';
+                th.insertAdjacentHTML('beforeend', ` <i class="fas ${icon} sort-indicator"></i>`);
+            }
         });
     }
 
+    /**
+     * Configura los eventos del modo servidor
+     */
+    function setupServerMode() {
+        if (server.filters) {
+            for (const [filterName, values] of Object.entries(server.filters)) {
+                activeFilters[filterName] = new Set(values.map(String));
+                values.forEach(value => {
+                    const checkbox = filtersMenu?.querySelector(
+                        `.form-check-input[data-filter="${filterName}"][value="${CSS.escape(String(value))}"]`);
+                    if (checkbox) checkbox.checked = true;
+                });
+            }
+            updateFiltersDisplay();
+        }
+        if (server.q) searchInput.value = server.q;
+
+        const loadMore = document.getElementById(loadMoreId);
+        if (loadMore) {
+            loadMore.addEventListener('click', e => {
+                e.preventDefault();
+                fetchPage(server.page + 1, true);
+            });
+        }
+
+        tableContainer.querySelectorAll('th[data-sort]').forEach(th => {
+            th.style.cursor = 'pointer';
+            th.addEventListener('click', () => {
+                const key = th.dataset.sort;
+                server.sort = server.sort === key ? `-${key}` : key;
+                fetchPage(1);
+            });
+        });
+
+        renderServerResults();
+    }
+
+    /**
+     * Aplica búsqueda y filtros: en el servidor (con espera) o sobre las filas cargadas
+     */
+    function refresh() {
+        if (!server) {
+            applyFilters();
+            return;
+        }
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => fetchPage(1), 300);
+    }
+
     // Inicialización
     if (searchInput && filtersButton && tableContainer) {
         // Configurar elementos
@@ -248,10 +430,14 @@ export function initTableSearch(config) {
         generateFilterControls();
         
         // Event listeners
-        searchInput.addEventListener('input', applyFilters);
+        searchInput.addEventListener('input', refresh);
         
         // Aplicar filtros iniciales
-        applyFilters();
+        if (server) {
+            setupServerMode();
+        } else {
+            applyFilters();
+        }
     } else {
         console.error('Required elements not found:', {
             searchInput, 
@@ -2,6 +2,7 @@ import requests
 from flask import current_app, session
 from flask_login import current_user
 from config import Config
+from app.utils import http_client
 
 class APIClient:
     """Cliente para hacer peticiones autenticadas a la API"""
@@ -23,7 +24,7 @@ class APIClient:
     def get(self, endpoint, params=None):
         """Petición GET autenticada"""
         try:
-            response = requests.get(
+            response = http_client.get(
                 f"{self.base_url}{endpoint}",
                 headers=self._get_headers(),
                 params=params,
@@ -37,7 +38,7 @@ class APIClient:
     def post(self, endpoint, data=None):
         """Petición POST autenticada"""
         try:
-            response = requests.post(
+            response = http_client.post(
                 f"{self.base_url}{endpoint}",
                 headers=self._get_headers(),
                 json=data,
@@ -51,7 +52,7 @@ class APIClient:
     def put(self, endpoint, data=None):
         """Petición PUT autenticada"""
         try:
-            response = requests.put(
+            response = http_client.put(
                 f"{self.base_url}{endpoint}",
                 headers=self._get_headers(),
                 json=data,
@@ -65,7 +66,7 @@ class APIClient:
     def delete(self, endpoint):
         """Petición DELETE autenticada"""
         try:
-            response = requests.delete(
+            response = http_client.delete(
                 f"{self.base_url}{endpoint}",
                 headers=self._get_headers(),
                 timeout=10
@@ -0,0 +1,170 @@
+"""
+Acciones masivas (deshabilitar, recuperar, eliminar) de los listados
+
+`run_bulk_action` aplica la acción sobre el modelo de un servicio del ORM con
+una sola sentencia `UPDATE ... WHERE id IN (...)` (o `DELETE`) dentro de una
+transacción y devuelve el resultado de cada ID. Para servicios que no son
+tablas locales (Keycloak, API) `run_bulk_action_each` llama al servicio por ID
+con el mismo formato de resultado.
+"""
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+from flask import current_app, flash
+from flask_babel import _
+from sqlalchemy import delete, select, update
+from aclimate_v3_orm.database import get_db
+
+# Acciones soportadas: (operación, valor de `enable`)
+BULK_ACTIONS = {
+    'disable': ('update', False),
+    'recover': ('update', True),
+    'delete': ('delete', None)
+}
+
+# Resultado por ID
+OUTCOME_UPDATED = 'updated'
+OUTCOME_UNCHANGED = 'unchanged'
+OUTCOME_NOT_FOUND = 'not_found'
+OUTCOME_INVALID_ID = 'invalid_id'
+OUTCOME_FAILED = 'failed'
+
+
+class BulkResult:
+    """Resultado de una acción masiva: el desenlace de cada ID enviado"""
+
+    def __init__(self, action: Optional[str], recognized: bool):
+        self.action = action
+        self.recognized = recognized
+        self.outcomes: Dict = {}
+
+    def ids_with(self, *outcomes: str) -> List:
+        return [item_id for item_id, outcome in self.outcomes.items() if outcome in outcomes]
+
+    @property
+    def count(self) -> int:
+        """Registros que quedaron en el estado pedido (incluye los que ya lo estaban)"""
+        return len(self.ids_with(OUTCOME_UPDATED, OUTCOME_UNCHANGED))
+
+    @property
+    def failed(self) -> List:
+        return self.ids_with(OUTCOME_NOT_FOUND, OUTCOME_INVALID_ID, OUTCOME_FAILED)
+
+
+def parse_ids(raw_ids: Iterable, result: BulkResult, as_int: bool = True) -> List:
+    """Convertir los IDs del formulario, registrando los inválidos y sin repetir"""
+    ids = []
+    for raw_id in raw_ids:
+        try:
+            item_id = int(raw_id) if as_int else str(raw_id).strip()
+        except (TypeError, ValueError):
+            result.outcomes[raw_id] = OUTCOME_INVALID_ID
+            continue
+        if item_id == '':
+            result.outcomes[raw_id] = OUTCOME_INVALID_ID
+        elif item_id not in result.outcomes:
+            ids.append(item_id)
+            result.outcomes[item_id] = None
+    return ids
+
+
+def run_bulk_action(service, action: Optional[str], raw_ids: Iterable,
+                    actions: Union[Sequence[str], Mapping[str, str]] = ('disable', 'recover')) -> BulkResult:
+    """
+    Aplicar una acción masiva sobre el modelo de un servicio del ORM
+
+    Se consultan los IDs existentes y se actualizan (o eliminan) en una sola
+    sentencia, todo en la misma transacción: si algo falla no se aplica ningún
+    cambio y todos los IDs quedan como fallidos.
+
+    Args:
+        service: Servicio del ORM (Mng*Service); se usa su modelo
+        action: Acción pedida
+        raw_ids: IDs recibidos del formulario (selected_ids)
+        actions: Acciones que admite el listado ('disable', 'recover', 'delete'), o un
+            diccionario acción del formulario -> acción a aplicar (ej. {'disable': 'delete'})
+
+    Returns:
+        BulkResult con el desenlace de cada ID (vacío si la acción no existe)
+    """
+    if not isinstance(actions, Mapping):
+        actions = {name: name for name in actions}
+    result = BulkResult(action, recognized=actions.get(action) in BULK_ACTIONS)
+    if not result.recognized:
+        return result
+
+    operation, enable = BULK_ACTIONS[actions[action]]
+    model = service.model
+    ids = parse_ids(raw_ids, result)
+    if not ids:
+        return result
+
+    try:
+        with get_db() as db:
+            columns = (model.id, model.enable) if operation == 'update' else (model.id,)
+            existing = db.execute(select(*columns).where(model.id.in_(ids)).with_for_update()).all()
+
+            if operation == 'update':
+                to_change = [row.id for row in existing if row.enable != enable]
+                if to_change:
+                    db.execute(
+                        update(model).where(model.id.in_(to_change)).values(enable=enable)
+                        .execution_options(synchronize_session=False)
+                    )
+            else:
+                to_change = [row.id for row in existing]
+                if to_change:
+                    db.execute(
+                        delete(model).where(model.id.in_(to_change))
+                        .execution_options(synchronize_session=False)
+                    )
+            db.commit()
+    except Exception as e:
+        current_app.logger.error(f"Error en la acción masiva '{action}' sobre {model.__name__}: {e}")
+        for item_id in ids:
+            result.outcomes[item_id] = OUTCOME_FAILED
+        return result
+
+    changed = set(to_change)
+    found = {row.id for row in existing}
+    for item_id in ids:
+        if item_id in changed:
+            result.outcomes[item_id] = OUTCOME_UPDATED
+        elif item_id in found:
+            result.outcomes[item_id] = OUTCOME_UNCHANGED
+        else:
+            result.outcomes[item_id] = OUTCOME_NOT_FOUND
+    return result
+
+
+def run_bulk_action_each(action: Optional[str], raw_ids: Iterable,
+                         handlers: Dict[str, Callable], as_int: bool = True) -> BulkResult:
+    """
+    Aplicar una acción masiva llamando a un servicio externo por cada ID
+
+    Args:
+        action: Acción pedida
+        raw_ids: IDs recibidos del formulario
+        handlers: Función por acción soportada, (id) -> bool de éxito
+        as_int: Convertir los IDs a entero (False para IDs de Keycloak)
+    """
+    result = BulkResult(action, recognized=action in handlers)
+    if not result.recognized:
+        return result
+
+    handler = handlers[action]
+    for item_id in parse_ids(raw_ids, result, as_int=as_int):
+        try:
+            result.outcomes[item_id] = OUTCOME_UPDATED if handler(item_id) else OUTCOME_FAILED
+        except Exception as e:
+            current_app.logger.error(f"Error en la acción masiva '{action}' sobre {item_id}: {e}")
+            result.outcomes[item_id] = OUTCOME_FAILED
+    return result
+
+
+def flash_bulk_failures(result: BulkResult) -> None:
+    """Informar los IDs que no se pudieron procesar"""
+    if not result.recognized or not result.failed:
+        return
+    ids = ', '.join(str(item_id) for item_id in result.failed[:20])
+    if len(result.failed) > 20:
+        ids += ', ...'
+    flash(_('%(count)s registro(s) no se pudieron procesar: %(ids)s', count=len(result.failed), ids=ids), 'danger')
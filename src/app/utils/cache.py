@@ -0,0 +1,153 @@
+"""
+Cachés en memoria locales al proceso (compartidas por los hilos de un worker)
+"""
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from app.utils.fork import after_fork
+
+# Todas las cachés del proceso, para vaciarlas en cada worker después de un fork
+_instances = weakref.WeakSet()
+
+
+class TTLCache:
+    """Caché LRU acotada con expiración por tiempo (TTL) y segura para hilos"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        Args:
+            maxsize: Número máximo de entradas antes de descartar la menos usada
+            ttl: Segundos de vida de cada entrada (0 o negativo desactiva la caché)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Obtener un valor vigente o `default` si no existe o expiró"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Guardar un valor, descartando las entradas más antiguas si se supera `maxsize`"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Eliminar una entrada y devolver su valor"""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[1] if item else default
+
+    def clear(self) -> None:
+        """Vaciar la caché"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class VersionedCache:
+    """
+    Caché de valores agrupados por entidad e invalidados por un contador de versión
+
+    La versión de cada entidad es un archivo en una carpeta compartida: `bump`
+    lo reemplaza y así invalida la caché de todos los workers de gunicorn. Cada
+    lectura solo consulta sus metadatos (os.stat), sin ir a la base de datos.
+    """
+
+    def __init__(self, versions_folder: str, ttl: float = 300):
+        """
+        Args:
+            versions_folder: Carpeta de los archivos de versión
+            ttl: Segundos máximos de vida de un valor aunque su versión no cambie
+                (cubre escrituras hechas fuera de la aplicación)
+        """
+        self.versions_folder = versions_folder
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+        _instances.add(self)
+
+    def _version_path(self, entity: str) -> str:
+        return os.path.join(self.versions_folder, f"{entity}.version")
+
+    def version(self, entity: str) -> Tuple[int, int]:
+        """Versión actual de una entidad ((0, 0) si nunca se modificó)"""
+        try:
+            stat = os.stat(self._version_path(entity))
+        except OSError:
+            return (0, 0)
+        # El reemplazo atómico cambia el inodo aunque la resolución de mtime sea gruesa
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def bump(self, *entities: str) -> None:
+        """Invalidar los valores de las entidades en todos los workers"""
+        os.makedirs(self.versions_folder, exist_ok=True)
+        for entity in entities:
+            path = self._version_path(entity)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(str(time.time_ns()))
+            os.replace(tmp_path, path)
+        with self._lock:
+            for key in [key for key in self._data if key[0] in entities]:
+                del self._data[key]
+
+    def get_or_load(self, entity: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Obtener el valor de (entidad, clave), cargándolo con `loader` si no
+        existe, expiró o la entidad cambió de versión
+        """
+        version = self.version(entity)
+        with self._lock:
+            item = self._data.get((entity, key))
+        if item is not None and item[0] == version and item[1] > time.monotonic():
+            return item[2]
+
+        # La versión se leyó antes de cargar: un bump concurrente fuerza otra recarga
+        value = loader()
+        with self._lock:
+            self._data[(entity, key)] = (version, time.monotonic() + self.ttl, value)
+        return value
+
+    def clear(self) -> None:
+        """Vaciar la caché local del proceso"""
+        with self._lock:
+            self._data.clear()
+
+
+@after_fork
+def _reset_after_fork() -> None:
+    """Vaciar las cachés heredadas del maestro y reemplazar sus locks"""
+    for cache in list(_instances):
+        cache._lock = threading.Lock()
+        cache._data.clear()
+
+
+_MISSING = object()
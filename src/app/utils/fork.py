@@ -0,0 +1,44 @@
+"""
+Reinicialización del estado del proceso después de un fork (gunicorn --preload)
+
+Con `--preload` el proceso maestro importa la aplicación una sola vez y los
+workers la comparten copy-on-write. Lo que no sobrevive al fork se rehace en
+cada worker desde el hook `post_fork` (ver gunicorn.conf.py):
+
+- el pool de conexiones del engine de SQLAlchemy (sus sockets son del maestro),
+- las sesiones HTTP salientes (http_client),
+- las cachés en memoria y sus locks,
+- los pools de hilos de las tareas en segundo plano (los hilos no se heredan).
+
+Cada módulo registra su propia función con `after_fork`.
+"""
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+_callbacks: List[Callable[[], None]] = []
+
+
+def after_fork(callback: Callable[[], None]) -> Callable[[], None]:
+    """Registrar una función a ejecutar en cada worker después del fork (usable como decorador)"""
+    if callback not in _callbacks:
+        _callbacks.append(callback)
+    return callback
+
+
+def _dispose_engine() -> None:
+    """Descartar las conexiones heredadas sin cerrarlas (siguen siendo del maestro)"""
+    from aclimate_v3_orm.database import get_db
+
+    with get_db() as db:
+        db.get_bind().dispose(close=False)
+
+
+def reinit_after_fork() -> None:
+    """Ejecutar en el worker recién creado todas las reinicializaciones registradas"""
+    for callback in [_dispose_engine] + _callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Post-fork reinitialization failed in {callback.__qualname__}: {e}")
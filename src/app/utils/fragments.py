@@ -0,0 +1,51 @@
+"""
+Caché de fragmentos de plantilla compartidos por usuarios con los mismos permisos
+
+El menú lateral y las tarjetas de módulos del panel solo dependen de los
+permisos por módulo del usuario y del idioma, así que se renderizan una vez por
+firma de permisos e idioma y el HTML se reutiliza entre usuarios y peticiones.
+Un cambio de permisos produce otra firma (el principal se reconstruye) y un
+cambio en la plantilla (recarga de Jinja) descarta el fragmento guardado.
+
+Los fragmentos cacheados no deben usar datos propios del usuario (nombre,
+países) ni consultar permisos de un país concreto.
+"""
+from typing import Tuple
+
+from flask import current_app, render_template, request
+from flask_babel import get_locale
+from flask_login import current_user
+from markupsafe import Markup
+
+from config import Config
+from app.utils.cache import TTLCache
+
+# (plantilla, idioma, raíz de la app, firma de permisos) → (Template, HTML)
+_fragments = TTLCache(maxsize=Config.FRAGMENT_CACHE_MAXSIZE, ttl=Config.FRAGMENT_CACHE_TTL)
+
+
+def permission_signature() -> Tuple:
+    """Firma de los permisos por módulo del usuario actual (vacía si no hay sesión)"""
+    if not current_user.is_authenticated:
+        return ()
+    index = getattr(current_user, 'permission_index', None)
+    return index.signature if index is not None else ()
+
+
+def cached_fragment(template_name: str) -> Markup:
+    """Renderizar un fragmento o reutilizar el ya renderizado para la misma firma e idioma"""
+    template = current_app.jinja_env.get_template(template_name)
+    key = (template_name, str(get_locale()), request.script_root, permission_signature())
+    entry = _fragments.get(key)
+    # Con TEMPLATES_AUTO_RELOAD, Jinja devuelve otro objeto si el archivo cambió
+    if entry is not None and entry[0] is template:
+        return entry[1]
+
+    html = Markup(render_template(template))
+    _fragments.set(key, (template, html))
+    return html
+
+
+def clear() -> None:
+    """Descartar todos los fragmentos del proceso"""
+    _fragments.clear()
@@ -0,0 +1,158 @@
+"""
+Capa HTTP saliente compartida: una requests.Session con pool de conexiones por host
+
+Todas las llamadas a la API y a Keycloak pasan por aquí para reutilizar las
+conexiones TCP/TLS (keep-alive) entre peticiones dentro de cada worker. Los
+bloques `count_calls()` acumulan cuántas llamadas se hicieron y su tiempo.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Iterator, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import Config
+from app.utils.fork import after_fork
+
+_sessions: Dict[Tuple[str, str, bool], requests.Session] = {}
+_lock = threading.Lock()
+_active_counters = contextvars.ContextVar('http_call_counters', default=())
+
+
+class CallCounter:
+    """Llamadas HTTP salientes hechas dentro de un bloque `count_calls()`"""
+
+    def __init__(self):
+        self.count = 0
+        # Segundos acumulados (las llamadas en paralelo suman su tiempo)
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.duration += elapsed
+
+
+@contextmanager
+def count_calls() -> Iterator[CallCounter]:
+    """
+    Contar las llamadas HTTP salientes hechas dentro del bloque
+
+    Los hilos auxiliares solo se cuentan si se ejecutan con una copia del
+    contexto de quien abrió el bloque (contextvars.copy_context()).
+    """
+    counter = CallCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
+
+
+_RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def _build_session(retry: bool = True) -> requests.Session:
+    """Crear una sesión con pool de conexiones y, si `retry`, reintentos con backoff"""
+    retry = Retry(
+        total=Config.HTTP_RETRIES,
+        connect=Config.HTTP_RETRIES,
+        read=Config.HTTP_RETRIES,
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        # Solo métodos de lectura: un DELETE o PUT reintentado tras un timeout de lectura
+        # pudo haberse aplicado ya (ej. un 404 al reintentar un borrado exitoso)
+        allowed_methods=_RETRY_METHODS,
+        raise_on_status=False
+    ) if retry else Retry(total=0, raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # La sesión se comparte entre usuarios: nunca guardar cookies de las respuestas
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url: str, retry: bool = True) -> requests.Session:
+    """Obtener (o crear) la sesión asociada al host de la URL (con o sin reintentos)"""
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc, retry)
+
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _build_session(retry)
+                _sessions[key] = session
+    return session
+
+
+def request(method: str, url: str, retry: bool = True, **kwargs) -> requests.Response:
+    """
+    Realizar una petición usando el pool del host (misma firma que requests.request)
+
+    Con `retry=False` se hace un solo intento, sin backoff (ej. sondas de disponibilidad).
+    """
+    kwargs.setdefault('timeout', Config.HTTP_TIMEOUT)
+    counters = _active_counters.get()
+    if not counters:
+        return get_session(url, retry).request(method, url, **kwargs)
+
+    started = time.perf_counter()
+    try:
+        return get_session(url, retry).request(method, url, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - started
+        for counter in counters:
+            counter.record(elapsed)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request('GET', url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request('POST', url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return request('PUT', url, **kwargs)
+
+
+def patch(url: str, **kwargs) -> requests.Response:
+    return request('PATCH', url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return request('DELETE', url, **kwargs)
+
+
+def close_all() -> None:
+    """Cerrar y descartar todas las sesiones"""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+@after_fork
+def _reset_after_fork() -> None:
+    """Descartar las sesiones heredadas del maestro (sus sockets no son de este proceso)"""
+    global _lock
+    _lock = threading.Lock()
+    _sessions.clear()
@@ -0,0 +1,135 @@
+"""
+Instrumentación por petición: tiempo total, SQL y llamadas HTTP salientes
+
+`init_app` registra hooks que, para cada petición, miden el tiempo de pared,
+las sentencias SQL (cantidad y tiempo, vía eventos del engine) y las llamadas
+a Keycloak y a la API (cantidad y tiempo, vía `http_client`). El resultado se
+envía en la cabecera `Server-Timing`, en una línea de log estructurada (JSON)
+y en las métricas por blueprint que expone /metrics.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from flask import Flask, g, request
+
+from config import Config
+from app.utils import http_client, metrics
+from app.utils.sql_counter import count_statements
+
+logger = logging.getLogger('app.requests')
+
+REQUEST_DURATION = metrics.Histogram(
+    'aclimate_admin_request_duration_seconds',
+    'Tiempo de respuesta de las peticiones por blueprint',
+    labelnames=('blueprint', 'method'),
+    buckets=Config.REQUEST_LATENCY_BUCKETS
+)
+SQL_STATEMENTS = metrics.Counter(
+    'aclimate_admin_sql_statements_total', 'Sentencias SQL ejecutadas por blueprint', labelnames=('blueprint',)
+)
+SQL_DURATION = metrics.Counter(
+    'aclimate_admin_sql_duration_seconds_total', 'Tiempo en sentencias SQL por blueprint', labelnames=('blueprint',)
+)
+HTTP_CALLS = metrics.Counter(
+    'aclimate_admin_http_calls_total', 'Llamadas HTTP salientes (Keycloak, API) por blueprint',
+    labelnames=('blueprint',)
+)
+HTTP_DURATION = metrics.Counter(
+    'aclimate_admin_http_duration_seconds_total', 'Tiempo en llamadas HTTP salientes por blueprint',
+    labelnames=('blueprint',)
+)
+# Token de servicio de Keycloak (ver app.services.service_token_manager)
+KEYCLOAK_TOKEN_FETCHES = metrics.Counter(
+    'aclimate_admin_keycloak_token_fetches_total',
+    'Solicitudes del token de servicio a Keycloak por motivo y resultado',
+    labelnames=('reason', 'result')
+)
+KEYCLOAK_TOKEN_FETCH_DURATION = metrics.Histogram(
+    'aclimate_admin_keycloak_token_fetch_seconds',
+    'Tiempo de las solicitudes del token de servicio a Keycloak',
+    buckets=Config.REQUEST_LATENCY_BUCKETS
+)
+
+
+class RequestMetrics:
+    """Mediciones de la petición en curso (guardadas en `g`)"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stack = ExitStack()
+        self.sql = self._stack.enter_context(count_statements())
+        self.http = self._stack.enter_context(http_client.count_calls())
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def close(self) -> None:
+        self._stack.close()
+
+
+def _blueprint_label() -> str:
+    return request.blueprint or request.endpoint or 'unmatched'
+
+
+def _server_timing(elapsed: float, measures: RequestMetrics) -> str:
+    return ', '.join([
+        f'app;dur={elapsed * 1000:.1f}',
+        f'db;dur={measures.sql.duration * 1000:.1f};desc="{measures.sql.count} SQL"',
+        f'http;dur={measures.http.duration * 1000:.1f};desc="{measures.http.count} HTTP"'
+    ])
+
+
+def _before_request():
+    g.request_metrics = RequestMetrics()
+
+
+def _after_request(response):
+    measures = g.pop('request_metrics', None)
+    if measures is None:
+        return response
+
+    elapsed = measures.elapsed
+    blueprint = _blueprint_label()
+    REQUEST_DURATION.observe(elapsed, blueprint=blueprint, method=request.method)
+    SQL_STATEMENTS.inc(measures.sql.count, blueprint=blueprint)
+    SQL_DURATION.inc(measures.sql.duration, blueprint=blueprint)
+    HTTP_CALLS.inc(measures.http.count, blueprint=blueprint)
+    HTTP_DURATION.inc(measures.http.duration, blueprint=blueprint)
+
+    if Config.SERVER_TIMING_HEADER:
+        response.headers['Server-Timing'] = _server_timing(elapsed, measures)
+    if Config.REQUEST_LOG_ENABLED:
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'blueprint': blueprint,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'sql_count': measures.sql.count,
+            'sql_ms': round(measures.sql.duration * 1000, 1),
+            'http_count': measures.http.count,
+            'http_ms': round(measures.http.duration * 1000, 1)
+        }))
+    measures.close()
+    return response
+
+
+def _teardown_request(exc):
+    # Si after_request no llegó a ejecutarse, igual liberar los contadores
+    measures = g.pop('request_metrics', None)
+    if measures is not None:
+        measures.close()
+
+
+def init_app(app: Flask) -> None:
+    """Registrar la instrumentación de peticiones en la aplicación"""
+    if not Config.REQUEST_METRICS_ENABLED:
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
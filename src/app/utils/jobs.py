@@ -0,0 +1,200 @@
+"""
+Trabajos en segundo plano con su registro persistido como JSON
+
+Lo comparten las importaciones de locaciones y las altas masivas de usuarios:
+`JobStore` guarda cada trabajo en un archivo de una carpeta común, de modo que
+cualquier worker de gunicorn puede responder las consultas de progreso aunque
+el trabajo se ejecute en otro, y `JobExecutor` es el pool de hilos del proceso
+que los ejecuta.
+"""
+import json
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from app.utils.fork import after_fork
+
+# Estados posibles de un trabajo
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+_executors = weakref.WeakSet()
+
+
+def _read_boot_id() -> Optional[str]:
+    try:
+        with open('/proc/sys/kernel/random/boot_id', encoding='ascii') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """Instante de arranque del proceso (campo 22 de /proc/<pid>/stat), o None si no se puede leer"""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='ascii') as f:
+            # El nombre del comando va entre paréntesis y puede contener espacios
+            return f.read().rsplit(')', 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+
+
+_HOST = socket.gethostname()
+_BOOT_ID = _read_boot_id()
+
+
+def current_owner() -> Dict:
+    """Identificar al proceso actual: host, arranque del sistema, pid y arranque del proceso"""
+    pid = os.getpid()
+    return {'host': _HOST, 'boot_id': _BOOT_ID, 'pid': pid, 'started': _process_start(pid)}
+
+
+def owner_is_gone(owner: Optional[Dict]) -> bool:
+    """
+    Saber si el proceso dueño de un trabajo ya no existe
+
+    Solo se puede afirmar en el mismo host: el sistema se reinició (otro boot id),
+    el pid no existe o lo reutiliza otro proceso (otro instante de arranque).
+    En otro host se devuelve False.
+    """
+    if not owner or owner.get('host') != _HOST:
+        return False
+    if owner.get('boot_id') != _BOOT_ID:
+        return True
+    pid = owner.get('pid')
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, TypeError):
+        pass
+    started = owner.get('started')
+    return started is not None and _process_start(pid) not in (started, None)
+
+
+class JobExecutor:
+    """Pool de hilos del proceso, creado en el primer uso (también después de un fork)"""
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        _executors.add(self)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.thread_name_prefix
+                    )
+        return self._executor.submit(fn, *args)
+
+    def _reset(self) -> None:
+        self._executor = None
+        self._lock = threading.Lock()
+
+
+@after_fork
+def _reset_executors() -> None:
+    """Los hilos de los pools no se heredan en el fork: crear otros en el primer uso"""
+    for executor in list(_executors):
+        executor._reset()
+
+
+class JobStore:
+    """
+    Registros de trabajos en una carpeta, un archivo JSON por trabajo
+
+    Args:
+        folder: Carpeta de los registros (compartida por los workers del host)
+        stale_after: Segundos sin avances tras los que un trabajo en ejecución
+            se da por interrumpido (ej. el worker se reinició)
+        queued_expire: Segundos tras los que un trabajo que sigue encolado se da
+            por perdido. Es un límite holgado: los encolados no avanzan mientras
+            esperan un hilo libre
+        retention: Segundos que se conservan los archivos sin cambios antes de borrarlos
+        stale_error: Mensaje de error de un trabajo interrumpido
+
+    Cada registro guarda el proceso que lo ejecuta (`owner`): si ese proceso ya no
+    existe, el trabajo encolado o en ejecución se da por interrumpido sin esperar
+    a los límites anteriores.
+    """
+
+    def __init__(self, folder: str, stale_after: int, queued_expire: int, retention: int, stale_error: str):
+        self.folder = folder
+        self.stale_after = stale_after
+        self.queued_expire = queued_expire
+        self.retention = retention
+        self.stale_error = stale_error
+
+    def path(self, job_id: str, extension: str = 'json') -> str:
+        return os.path.join(self.folder, f"{job_id}.{extension}")
+
+    def new_id(self) -> str:
+        """Preparar la carpeta (borrando registros vencidos) y generar el ID de un trabajo nuevo"""
+        os.makedirs(self.folder, exist_ok=True)
+        self.prune()
+        return uuid.uuid4().hex
+
+    def save(self, job: Dict) -> None:
+        """Guardar el registro del trabajo de forma atómica (el primer guardado registra al dueño)"""
+        job.setdefault('owner', current_owner())
+        job['updated_at'] = time.time()
+        tmp_path = f"{self.path(job['id'])}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path(job['id']))
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        """Leer el registro tal como está guardado, o None si no existe"""
+        if not job_id or not _JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            with open(self.path(job_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Leer el registro marcando como fallido un trabajo pendiente que ya no va a terminar"""
+        job = self.load(job_id)
+        if job is None:
+            return None
+        if self._is_lost(job):
+            job['status'] = STATUS_FAILED
+            job['error'] = self.stale_error
+        # El proceso dueño es un detalle interno: no se expone en las consultas de progreso
+        job.pop('owner', None)
+        return job
+
+    def _is_lost(self, job: Dict) -> bool:
+        if job['status'] == STATUS_RUNNING:
+            limit = self.stale_after
+        elif job['status'] == STATUS_QUEUED:
+            limit = self.queued_expire
+        else:
+            return False
+        return time.time() - job['updated_at'] > limit or owner_is_gone(job.get('owner'))
+
+    def prune(self) -> None:
+        """Borrar los archivos de la carpeta sin cambios en más de `retention` segundos"""
+        limit = time.time() - self.retention
+        for entry in os.scandir(self.folder):
+            try:
+                if entry.stat().st_mtime < limit:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,42 @@
+"""
+Servicios creados en el primer uso en lugar de al importar el módulo de rutas
+"""
+import threading
+from typing import Any, Callable
+
+
+class LazyService:
+    """
+    Proxy que crea la instancia del servicio la primera vez que se usa
+
+    Los módulos de rutas declaran sus servicios a nivel de módulo; con este
+    proxy, importar el blueprint (al arrancar cada worker) no construye los
+    servicios del ORM ni sus dependencias hasta la primera petición que los
+    necesita.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        if self._instance is None:
+            return f"<LazyService {getattr(self._factory, '__name__', self._factory)} (sin crear)>"
+        return repr(self._instance)
@@ -0,0 +1,267 @@
+"""
+Métricas en memoria del worker, expuestas en formato de texto de Prometheus
+
+Cada worker de gunicorn lleva sus propios contadores e histogramas. Con
+METRICS_DIR (gunicorn.conf.py lo define por defecto) cada worker vuelca su
+registro a un archivo de esa carpeta cada METRICS_FLUSH_INTERVAL segundos, y
+/metrics, lo atienda el worker que lo atienda, suma los archivos de todos: los
+contadores no dependen del worker que recibió la consulta. Los archivos de
+workers terminados se conservan para que los contadores nunca retrocedan.
+Sin METRICS_DIR cada worker expone solo lo suyo, con la etiqueta `pid`.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+from app.utils.fork import after_fork
+
+# Límites por defecto (segundos) de los histogramas de latencia
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics: List['_Metric'] = []
+_collectors: List[Callable[[], Iterable[str]]] = []
+_registry_lock = threading.Lock()
+
+# Archivo del proceso en METRICS_DIR y pid que arrancó el hilo de volcado
+_process_file: Optional[str] = None
+_flusher_pid: Optional[int] = None
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, object], pid: bool = True) -> str:
+    """Etiquetas de una muestra ({a="1",b="2"}), por defecto con la del proceso incluida"""
+    if pid:
+        labels = {**labels, 'pid': os.getpid()}
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _metrics.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _labels(self, key: Tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+    def snapshot(self) -> List:
+        """Valores actuales como [[etiquetas, valor], ...] (serializable en JSON)"""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def reset(self) -> None:
+        """Descartar los valores y el lock heredados del maestro"""
+        self._lock = threading.Lock()
+        self._values = {}
+
+
+class Counter(_Metric):
+    """Contador acumulado por combinación de etiquetas"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        _ensure_flusher()
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    @staticmethod
+    def merge(values: Dict[Tuple, float], entries: List) -> None:
+        for key, value in entries:
+            key = tuple(key)
+            values[key] = values.get(key, 0) + value
+
+    def render(self, values: Optional[Dict[Tuple, float]] = None) -> List[str]:
+        """Líneas del contador: las de este worker (con `pid`) o los valores sumados de todos"""
+        pid = values is None
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        return self.header() + [
+            f'{self.name}{format_labels(self._labels(key), pid)} {value}' for key, value in values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Histograma acumulado (buckets, suma y conteo) por combinación de etiquetas"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiqueta: [conteo por bucket..., conteo total, suma]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        _ensure_flusher()
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(key), list(series)] for key, series in self._values.items()]
+
+    @staticmethod
+    def merge(values: Dict[Tuple, List[float]], entries: List) -> None:
+        for key, series in entries:
+            key = tuple(key)
+            current = values.get(key)
+            if current is None:
+                values[key] = list(series)
+            elif len(current) == len(series):
+                values[key] = [a + b for a, b in zip(current, series)]
+
+    def render(self, values: Optional[Dict[Tuple, List[float]]] = None) -> List[str]:
+        """Líneas del histograma: las de este worker (con `pid`) o los valores sumados de todos"""
+        pid = values is None
+        if values is None:
+            with self._lock:
+                values = {key: list(series) for key, series in self._values.items()}
+        lines = self.header()
+        for key, series in values.items():
+            labels = self._labels(key)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{format_labels({**labels, "le": bound}, pid)} {count}')
+            lines.append(f'{self.name}_bucket{format_labels({**labels, "le": "+Inf"}, pid)} {series[-2]}')
+            lines.append(f'{self.name}_count{format_labels(labels, pid)} {series[-2]}')
+            lines.append(f'{self.name}_sum{format_labels(labels, pid)} {series[-1]}')
+        return lines
+
+
+# ==================== REGISTRO COMPARTIDO ENTRE WORKERS ====================
+
+def flush() -> None:
+    """Escribir el registro del proceso en su archivo de METRICS_DIR (reemplazo atómico)"""
+    global _process_file
+    if not Config.METRICS_DIR:
+        return
+    with _registry_lock:
+        metrics = list(_metrics)
+        if _process_file is None:
+            # Un archivo por proceso (no por pid, que puede reutilizarse tras reiniciar un worker)
+            _process_file = os.path.join(Config.METRICS_DIR, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+        path = _process_file
+    data = {metric.name: metric.snapshot() for metric in metrics}
+    try:
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(Config.METRICS_FLUSH_INTERVAL)
+        flush()
+
+
+def _ensure_flusher() -> None:
+    """Arrancar (una vez por proceso) el hilo que vuelca el registro a METRICS_DIR"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid() or not Config.METRICS_DIR:
+        return
+    with _registry_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+    atexit.register(flush)
+
+
+def _aggregate(metrics: List[_Metric]) -> Dict[str, Dict]:
+    """Sumar por serie los registros de todos los procesos en METRICS_DIR"""
+    by_name = {metric.name: metric for metric in metrics}
+    totals: Dict[str, Dict] = {metric.name: {} for metric in metrics}
+    try:
+        entries = list(os.scandir(Config.METRICS_DIR))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, values in data.items():
+            metric = by_name.get(name)
+            if metric is not None:
+                metric.merge(totals[name], values)
+    return totals
+
+
+@after_fork
+def _reset_after_fork() -> None:
+    """Cada worker empieza con un registro vacío y su propio archivo (lo del maestro no se cuenta N veces)"""
+    global _registry_lock, _process_file, _flusher_pid
+    _registry_lock = threading.Lock()
+    _process_file = None
+    _flusher_pid = None
+    for metric in _metrics:
+        metric.reset()
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> None:
+    """
+    Registrar una función que genera líneas de métricas al momento de exponerlas
+
+    Sirve para valores que ya lleva otro componente (ej. contadores propios de
+    un servicio) sin duplicarlos en un Counter.
+    """
+    with _registry_lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+
+def render() -> str:
+    """Todas las métricas en formato de texto de Prometheus (sumadas entre workers con METRICS_DIR)"""
+    with _registry_lock:
+        metrics = list(_metrics)
+        collectors = list(_collectors)
+    totals = None
+    if Config.METRICS_DIR:
+        # Incluir el estado actual de este worker, no el del último volcado
+        flush()
+        totals = _aggregate(metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render(totals[metric.name] if totals is not None else None))
+    for collector in collectors:
+        lines.extend(collector())
+    return '\n'.join(lines) + '\n'
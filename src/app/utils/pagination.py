@@ -0,0 +1,362 @@
+"""
+Paginación, ordenamiento y filtrado en SQL para las vistas de listado
+
+Cada blueprint declara un `ListQuery` con las columnas que se pueden buscar,
+filtrar y ordenar (como rutas con puntos sobre las relaciones del modelo, ej.
+'admin_2.admin_1.country.name') y las relaciones que usa su plantilla, y la
+vista de listado llama a `render_list`, que aplica los parámetros de la
+petición en la base de datos y responde con la página HTML o, con
+`?format=json`, con las filas renderizadas para que `tableSearch.js` las cargue
+de forma incremental.
+"""
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app, jsonify, render_template, request, url_for
+from flask_babel import lazy_gettext
+from sqlalchemy import String, cast, func, or_, select
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from aclimate_v3_orm.database import get_db
+
+from app.utils.sql_counter import count_statements
+from config import Config
+
+# Valores de filtro codificados, tal como los muestran las plantillas
+STATUS_VALUES = {'active': True, 'inactive': False}
+YES_NO_VALUES = {lazy_gettext('Sí'): True, lazy_gettext('No'): False}
+
+
+class ListQueryBudgetExceeded(RuntimeError):
+    """Un listado emitió más sentencias SQL de las permitidas (carga perezosa por fila)"""
+
+
+class ListParams:
+    """Parámetros de listado leídos de la query string"""
+
+    def __init__(self, page: int = 1, per_page: Optional[int] = None, sort: Optional[str] = None,
+                 search: str = '', filters: Optional[Dict[str, List[str]]] = None):
+        self.page = max(page, 1)
+        self.per_page = min(max(per_page or Config.LIST_PAGE_SIZE, 1), Config.LIST_MAX_PAGE_SIZE)
+        self.sort = sort
+        self.search = search.strip()
+        self.filters = filters or {}
+
+    @classmethod
+    def from_request(cls, args=None) -> 'ListParams':
+        """
+        Construir los parámetros desde `request.args`
+
+        Acepta: page, per_page, sort (ej. 'name' o '-name' para descendente),
+        q (búsqueda) y f_<filtro> (repetible, ej. f_country=Colombia&f_country=Perú).
+        """
+        args = request.args if args is None else args
+        filters = {
+            key[2:]: [value for value in args.getlist(key) if value != '']
+            for key in args if key.startswith('f_')
+        }
+        return cls(
+            page=args.get('page', 1, type=int) or 1,
+            per_page=args.get('per_page', type=int),
+            sort=args.get('sort') or None,
+            search=args.get('q', ''),
+            filters={key: values for key, values in filters.items() if values}
+        )
+
+
+class Page:
+    """Resultado paginado de un `ListQuery`"""
+
+    def __init__(self, items: List, total: int, params: ListParams, facets: Optional[Dict] = None,
+                 facets_truncated: Sequence[str] = ()):
+        self.items = items
+        self.total = total
+        self.page = params.page
+        self.per_page = params.per_page
+        self.params = params
+        self.facets = facets
+        self.facets_truncated = list(facets_truncated)
+
+    @property
+    def pages(self) -> int:
+        return max(math.ceil(self.total / self.per_page), 1)
+
+    @property
+    def has_prev(self) -> bool:
+        return self.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.pages
+
+    def page_url(self, page: int) -> str:
+        """URL de otra página conservando búsqueda, filtros y orden (enlaces sin JavaScript)"""
+        args = request.args.to_dict(flat=False)
+        args.pop('format', None)
+        args['page'] = page
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    def to_dict(self) -> Dict:
+        """Metadatos de la página (sin los elementos) para JSON y la configuración de tableSearch.js"""
+        data = {
+            'page': self.page,
+            'per_page': self.per_page,
+            'pages': self.pages,
+            'total': self.total,
+            'count': len(self.items),
+            'has_next': self.has_next,
+            'sort': self.params.sort,
+            'q': self.params.search,
+            'filters': self.params.filters
+        }
+        if self.facets is not None:
+            data['facets'] = self.facets
+            # Filtros con más de FACET_LIMIT valores: solo se enviaron los primeros
+            data['facets_truncated'] = self.facets_truncated
+        return data
+
+
+class ListQuery:
+    """
+    Especificación de un listado paginado sobre el modelo de un servicio del ORM
+
+    Args:
+        service: Servicio del ORM (Mng*Service); se usa su modelo
+        search: Rutas de columnas en las que busca el parámetro `q` (ILIKE)
+        sort: Claves de ordenamiento aceptadas y su ruta de columna
+        filters: Filtros aceptados. El valor es la ruta de la columna o una tupla
+            (ruta, {valor_parámetro: valor_sql}) para valores codificados, ej. estado
+        default_sort: Clave de ordenamiento por defecto (prefijo '-' para descendente)
+        load: Relaciones que usa la plantilla (rutas con puntos, ej.
+            'admin_2.admin_1.country'). Se cargan exactamente estas; si se omite,
+            se cargan las relaciones de las rutas de búsqueda, orden y filtros
+        where: Función opcional (modelo) -> condición fija del listado
+    """
+
+    # Número máximo de valores distintos devueltos por filtro
+    FACET_LIMIT = 500
+
+    def __init__(self, service, search: Sequence[str] = (), sort: Optional[Dict[str, str]] = None,
+                 filters: Optional[Dict[str, Any]] = None, default_sort: str = 'id',
+                 load: Optional[Sequence[str]] = None, where: Optional[Callable] = None):
+        self.service = service
+        self.search = list(search)
+        self.sort = dict(sort or {})
+        self.filters = dict(filters or {})
+        self.default_sort = default_sort
+        self.load = None if load is None else list(load)
+        self.where = where
+
+    @property
+    def model(self):
+        return self.service.model
+
+    # ==================== CONSTRUCCIÓN DE LA CONSULTA ====================
+
+    def _resolve(self, path: str, joins: Dict[str, Any]):
+        """
+        Convertir una ruta 'rel.rel.columna' en la columna SQL, registrando los
+        joins (externos, con alias por ruta) necesarios en `joins`
+        """
+        *relations, column = path.split('.')
+        entity = self.model
+        prefix = ''
+        for relation in relations:
+            prefix = f"{prefix}.{relation}" if prefix else relation
+            attribute = getattr(entity, relation)
+            if prefix not in joins:
+                joins[prefix] = (aliased(attribute.property.mapper.class_), attribute)
+            entity = joins[prefix][0]
+        return getattr(entity, column)
+
+    def _apply_joins(self, stmt, joins: Dict[str, Any]):
+        for alias, attribute in joins.values():
+            stmt = stmt.outerjoin(alias, attribute.of_type(alias))
+        return stmt
+
+    def _load_paths(self) -> List[str]:
+        if self.load is not None:
+            return self.load
+        paths = set()
+        for path in self.search + list(self.sort.values()) + [self._filter_path(f) for f in self.filters.values()]:
+            relations = path.split('.')[:-1]
+            if relations:
+                paths.add('.'.join(relations))
+        return sorted(paths)
+
+    def _load_options(self) -> List:
+        """
+        Cargar por adelantado las relaciones de la plantilla: JOIN para las
+        relaciones a uno y una consulta `IN` por colección, sin cargas
+        perezosas por fila
+        """
+        options = []
+        for path in self._load_paths():
+            option = None
+            entity = self.model
+            for relation in path.split('.'):
+                attribute = getattr(entity, relation)
+                if attribute.property.uselist:
+                    option = selectinload(attribute) if option is None else option.selectinload(attribute)
+                else:
+                    option = joinedload(attribute) if option is None else option.joinedload(attribute)
+                entity = attribute.property.mapper.class_
+            options.append(option)
+        return options
+
+    @staticmethod
+    def _filter_path(spec) -> str:
+        return spec[0] if isinstance(spec, tuple) else spec
+
+    @staticmethod
+    def _mapping(spec) -> Dict[str, Any]:
+        # Las claves pueden ser textos traducibles: resolverlas en el idioma de la petición
+        return {str(key): value for key, value in spec[1].items()}
+
+    def _conditions(self, params: ListParams, joins: Dict[str, Any]) -> List:
+        conditions = []
+        if self.where is not None:
+            conditions.append(self.where(self.model))
+
+        if params.search and self.search:
+            # Los comodines de LIKE escritos por el usuario se buscan literalmente
+            escaped = params.search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            conditions.append(or_(*[
+                cast(self._resolve(path, joins), String).ilike(pattern, escape='\\') for path in self.search
+            ]))
+
+        for name, values in params.filters.items():
+            spec = self.filters.get(name)
+            if spec is None:
+                continue
+            column = self._resolve(self._filter_path(spec), joins)
+            if isinstance(spec, tuple):
+                mapping = self._mapping(spec)
+                values = [mapping[value] for value in values if value in mapping]
+                if not values:
+                    continue
+            conditions.append(column.in_(values))
+        return conditions
+
+    def _order_by(self, params: ListParams, joins: Dict[str, Any]) -> List:
+        sort = params.sort if params.sort and params.sort.lstrip('-') in self.sort else self.default_sort
+        descending = sort.startswith('-')
+        key = sort.lstrip('-')
+        column = self._resolve(self.sort.get(key, key), joins)
+        order = [column.desc() if descending else column.asc()]
+        # Desempate estable para que las páginas no se solapen
+        order.append(self.model.id.desc() if descending else self.model.id.asc())
+        return order
+
+    # ==================== EJECUCIÓN ====================
+
+    def paginate(self, params: ListParams, with_facets: bool = False, db=None) -> Page:
+        """
+        Ejecutar el listado: una consulta de conteo y una de la página
+
+        Con `db` se usa esa sesión y los objetos quedan asociados a ella (las
+        relaciones que falten en `load` se cargan de forma perezosa y cuentan en
+        el presupuesto de sentencias). Sin `db` se abre una sesión propia y los
+        objetos se separan de ella al terminar.
+        """
+        joins = {}
+        conditions = self._conditions(params, joins)
+        order = self._order_by(params, joins)
+
+        stmt = self._apply_joins(select(self.model), joins).where(*conditions)
+        count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+        page_stmt = stmt.options(*self._load_options()).order_by(*order)\
+            .limit(params.per_page).offset((params.page - 1) * params.per_page)
+
+        if db is None:
+            with get_db() as db:
+                page = self._execute(db, count_stmt, page_stmt, params, with_facets)
+                # Separar de la sesión para usarlos fuera de ella
+                db.expunge_all()
+            return page
+        return self._execute(db, count_stmt, page_stmt, params, with_facets)
+
+    def _execute(self, db, count_stmt, page_stmt, params: ListParams, with_facets: bool) -> Page:
+        total = db.scalar(count_stmt) or 0
+        items = list(db.scalars(page_stmt).unique())
+        facets, truncated = self._facets(db) if with_facets else (None, [])
+        return Page(items, total, params, facets, truncated)
+
+    def _facets(self, db) -> Tuple[Dict[str, List], List[str]]:
+        """
+        Valores disponibles para cada filtro (independientes de la página actual)
+        y nombres de los filtros recortados a FACET_LIMIT valores
+        """
+        facets = {}
+        truncated = []
+        for name, spec in self.filters.items():
+            if isinstance(spec, tuple):
+                facets[name] = list(self._mapping(spec))
+                continue
+            joins = {}
+            column = self._resolve(spec, joins)
+            stmt = self._apply_joins(select(column).select_from(self.model), joins)
+            if self.where is not None:
+                stmt = stmt.where(self.where(self.model))
+            # Un valor de más indica que la lista se recortó
+            stmt = stmt.where(column.isnot(None)).distinct().order_by(column).limit(self.FACET_LIMIT + 1)
+            values = list(db.scalars(stmt))
+            if len(values) > self.FACET_LIMIT:
+                values = values[:self.FACET_LIMIT]
+                truncated.append(name)
+            # Los enums se exponen por su valor, igual que en las plantillas
+            facets[name] = [getattr(value, 'value', value) for value in values]
+        return facets, truncated
+
+
+def wants_json() -> bool:
+    """La petición pide la variante JSON del listado"""
+    return request.args.get('format') == 'json'
+
+
+def render_list(template: str, rows_template: str, list_query: ListQuery, items_name: str, **context):
+    """
+    Responder una vista de listado paginada
+
+    Renderiza `template` con la página actual en `items_name` y su metadata en
+    `list_page`. Con `?format=json` responde solo las filas (`rows_template`) y
+    la metadata, para la carga incremental desde tableSearch.js.
+    """
+    params = ListParams.from_request()
+    json_response = wants_json()
+
+    # La plantilla se renderiza con la sesión abierta: una relación que falte en `load`
+    # se carga de forma perezosa por fila y esas sentencias entran en el conteo
+    with get_db() as db, count_statements() as statements:
+        page = list_query.paginate(params, with_facets=not json_response or request.args.get('facets') == '1', db=db)
+
+        context[items_name] = page.items
+        context['list_page'] = page
+        if json_response:
+            data = page.to_dict()
+            data['html'] = render_template(rows_template, **context)
+            response = jsonify(data)
+        else:
+            response = render_template(template, **context)
+
+    _check_statement_budget(template, statements)
+    return response
+
+
+def _check_statement_budget(template: str, statements) -> None:
+    """
+    Verificar que el listado no emitió más sentencias SQL de las esperadas
+
+    Un número mayor indica relaciones que la plantilla carga de forma perezosa
+    por cada fila (falta agregarlas en `load`). En modo debug se lanza un error;
+    en producción solo se registra una advertencia.
+    """
+    limit = current_app.config.get('LIST_SQL_STATEMENT_LIMIT', Config.LIST_SQL_STATEMENT_LIMIT)
+    if not limit or statements.count <= limit:
+        return
+
+    message = (f"El listado {template} ejecutó {statements.count} sentencias SQL "
+               f"(límite {limit}); revise las relaciones en `load` del ListQuery")
+    if current_app.debug or current_app.config.get('LIST_SQL_STATEMENT_CHECK'):
+        raise ListQueryBudgetExceeded(message + ":\n" + "\n".join(statements.statements))
+    current_app.logger.warning(message)
@@ -0,0 +1,147 @@
+"""
+Creación del esquema de la BD como paso explícito, protegida por una versión
+
+`create_tables()` del ORM revisa toda la metadata contra PostgreSQL; hacerlo
+en cada worker al arrancar alarga los reinicios. El comando `flask init-db`
+lo ejecuta una sola vez por despliegue y registra la versión del ORM aplicada
+en la tabla `admin_schema_version`; si esa versión ya está aplicada no hace
+nada. Al arrancar, cada worker solo lee esa fila para avisar si falta el paso.
+
+Como el contenedor ejecuta `init-db` en cada arranque, varias réplicas pueden
+hacerlo a la vez: en PostgreSQL el paso se serializa con un advisory lock de
+transacción y la versión se registra con un upsert, así que las réplicas que
+esperaron encuentran la versión aplicada y no hacen nada.
+"""
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Optional
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from aclimate_v3_orm.database import get_db
+from aclimate_v3_orm.database.base import create_tables
+from config import Config
+
+SCHEMA_COMPONENT = 'aclimate_v3_orm'
+# Clave (arbitraria y fija) del advisory lock que serializa `init-db` entre réplicas
+SCHEMA_LOCK_KEY = 7_210_533_401
+
+schema_version_table = Table(
+    'admin_schema_version', MetaData(),
+    Column('component', String(64), primary_key=True),
+    Column('version', String(64), nullable=False),
+    Column('applied_at', DateTime(timezone=True), nullable=False)
+)
+
+
+def expected_version() -> str:
+    """Versión instalada del ORM, que define el esquema esperado"""
+    try:
+        return metadata.version(SCHEMA_COMPONENT)
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def applied_version() -> Optional[str]:
+    """Versión registrada por el último `flask init-db` (None si nunca se ejecutó)"""
+    try:
+        with get_db() as db:
+            return db.execute(
+                select(schema_version_table.c.version)
+                .where(schema_version_table.c.component == SCHEMA_COMPONENT)
+            ).scalar()
+    except SQLAlchemyError:
+        # La tabla aún no existe
+        return None
+
+
+def _record_version(db, version: str) -> None:
+    """Registrar la versión aplicada (upsert en PostgreSQL y SQLite)"""
+    values = dict(component=SCHEMA_COMPONENT, version=version, applied_at=datetime.now(timezone.utc))
+    dialect = db.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(schema_version_table).values(**values)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[schema_version_table.c.component],
+            set_={'version': stmt.excluded.version, 'applied_at': stmt.excluded.applied_at}
+        ))
+        return
+    db.execute(schema_version_table.delete().where(schema_version_table.c.component == SCHEMA_COMPONENT))
+    db.execute(schema_version_table.insert().values(**values))
+
+
+def ensure_schema(force: bool = False) -> bool:
+    """
+    Crear las tablas si la versión aplicada no es la esperada
+
+    En PostgreSQL se toma un advisory lock de transacción antes de revisar la
+    versión: si otra réplica está creando el esquema, se espera a que termine
+    y se vuelve a leer la versión ya con el lock tomado.
+
+    Args:
+        force: Ejecutar create_tables aunque la versión ya esté aplicada
+
+    Returns:
+        True si se ejecutó create_tables
+    """
+    version = expected_version()
+    if not force and applied_version() == version:
+        return False
+
+    with get_db() as db:
+        if db.get_bind().dialect.name == 'postgresql':
+            # Se libera al confirmar o revertir la transacción
+            db.execute(select(func.pg_advisory_xact_lock(SCHEMA_LOCK_KEY)))
+        schema_version_table.create(db.connection(), checkfirst=True)
+        applied = db.execute(
+            select(schema_version_table.c.version)
+            .where(schema_version_table.c.component == SCHEMA_COMPONENT)
+        ).scalar()
+        if not force and applied == version:
+            db.commit()
+            return False
+
+        create_tables()
+        _record_version(db, version)
+        db.commit()
+    return True
+
+
+def check_schema(app: Flask) -> None:
+    """Avisar en el log si el esquema no corresponde a la versión instalada del ORM"""
+    try:
+        applied = applied_version()
+    except Exception as e:
+        app.logger.warning(f"Could not check the database schema version: {e}")
+        return
+    version = expected_version()
+    if applied != version:
+        app.logger.warning(
+            f"Database schema version is {applied or 'not recorded'}, expected {version}: run 'flask init-db'"
+        )
+
+
+@click.command('init-db')
+@click.option('--force', is_flag=True, help='Ejecutar create_tables aunque la versión ya esté aplicada.')
+@with_appcontext
+def init_db_command(force: bool) -> None:
+    """Crear las tablas de la BD (una vez por despliegue, antes de iniciar los workers)"""
+    if ensure_schema(force=force):
+        click.echo(f"Esquema creado/actualizado (aclimate_v3_orm {expected_version()})")
+    else:
+        click.echo(f"El esquema ya está en la versión {expected_version()}; nada que hacer")
+
+
+def init_app(app: Flask) -> None:
+    """Registrar `flask init-db` y, según la configuración, crear o verificar el esquema al arrancar"""
+    app.cli.add_command(init_db_command)
+    if Config.DB_CREATE_TABLES_ON_STARTUP:
+        ensure_schema()
+    elif Config.DB_SCHEMA_CHECK_ON_STARTUP:
+        check_schema(app)
@@ -0,0 +1,296 @@
+"""
+Sesiones guardadas en el servidor: la cookie solo lleva un ID opaco
+
+Con la sesión de cookie de Flask cada petición envía (y verifica con HMAC) los
+tokens de Keycloak y los datos del usuario, varios KB cerca del límite de los
+navegadores. `init_app` reemplaza la interfaz de sesión por una que guarda el
+contenido en un backend (LRU del proceso, archivos o Redis) bajo un ID
+aleatorio. Como el ID no cambia al modificar la sesión, renovar un token
+actualiza la misma entrada; solo `regenerate()` (al iniciar sesión) emite uno
+nuevo.
+
+Es opcional (SESSION_BACKEND; por defecto 'cookie'): las sesiones en archivos
+se pierden con el contenedor si SESSION_FILE_DIR no está en un volumen
+persistente, y con varias réplicas requieren un volumen compartido o sesiones
+fijas; Redis no tiene esas restricciones.
+"""
+import os
+import re
+import secrets
+from abc import ABC, abstractmethod
+import threading
+import time
+from typing import Optional
+
+from flask import Flask, session
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+
+from config import Config
+from app.utils.cache import TTLCache
+
+_SID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{43}$')
+
+
+class ServerSideSession(SecureCookieSession):
+    """Sesión cuyo contenido vive en el backend, identificada por `sid`"""
+
+    def __init__(self, initial=None, sid: Optional[str] = None):
+        super().__init__(initial)
+        self.sid = sid
+        self.rotate = False
+
+    def regenerate(self) -> None:
+        """Emitir un ID nuevo al guardar (evita fijación de sesión al iniciar sesión)"""
+        self.rotate = True
+        self.modified = True
+
+
+# ==================== BACKENDS ====================
+
+class SessionBackend(ABC):
+    """Almacén de sesiones serializadas por ID"""
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[str]:
+        """Contenido de la sesión, o None si no existe o venció"""
+
+    @abstractmethod
+    def set(self, sid: str, data: str, ttl: int) -> None:
+        """Guardar la sesión por `ttl` segundos"""
+
+    @abstractmethod
+    def delete(self, sid: str) -> None:
+        """Eliminar la sesión (sin error si no existe)"""
+
+    def touch(self, sid: str, ttl: int) -> None:
+        """Extender la vida de una sesión sin cambiar su contenido"""
+        data = self.get(sid)
+        if data is not None:
+            self.set(sid, data, ttl)
+
+
+class MemorySessionBackend(SessionBackend):
+    """LRU del proceso: rápido, pero cada worker de gunicorn tiene el suyo (usar con un solo worker)"""
+
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, sid: str) -> Optional[str]:
+        return self._cache.get(sid)
+
+    def set(self, sid: str, data: str, ttl: int) -> None:
+        self._cache.set(sid, data, ttl=ttl)
+
+    def delete(self, sid: str) -> None:
+        self._cache.pop(sid)
+
+
+class FileSystemSessionBackend(SessionBackend):
+    """Un archivo por sesión en una carpeta compartida por los workers del host"""
+
+    # Escrituras entre limpiezas de sesiones expiradas
+    PRUNE_EVERY = 500
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, sid: str) -> str:
+        return os.path.join(self.folder, f"{sid}.session")
+
+    def get(self, sid: str) -> Optional[str]:
+        path = self._path(sid)
+        try:
+            # La fecha de modificación del archivo es su vencimiento
+            if os.stat(path).st_mtime <= time.time():
+                self.delete(sid)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, sid: str, data: str, ttl: int) -> None:
+        path = self._path(sid)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        expires_at = time.time() + ttl
+        os.utime(tmp_path, (expires_at, expires_at))
+        os.replace(tmp_path, path)
+        self._maybe_prune()
+
+    def delete(self, sid: str) -> None:
+        try:
+            os.remove(self._path(sid))
+        except OSError:
+            pass
+
+    def touch(self, sid: str, ttl: int) -> None:
+        expires_at = time.time() + ttl
+        try:
+            os.utime(self._path(sid), (expires_at, expires_at))
+        except OSError:
+            pass
+
+    def _maybe_prune(self) -> None:
+        with self._lock:
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY:
+                return
+        now = time.time()
+        for entry in os.scandir(self.folder):
+            try:
+                if entry.name.endswith('.session') and entry.stat().st_mtime <= now:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class RedisSessionBackend(SessionBackend):
+    """Redis (o un servidor compatible) compartido por todos los workers y réplicas; requiere el paquete `redis`"""
+
+    def __init__(self, url: str, prefix: str = 'aclimate_admin:session:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_BACKEND=redis requiere el paquete 'redis' (pip install redis)") from e
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid: str) -> Optional[str]:
+        data = self._client.get(self.prefix + sid)
+        return data.decode('utf-8') if data is not None else None
+
+    def set(self, sid: str, data: str, ttl: int) -> None:
+        self._client.set(self.prefix + sid, data, ex=ttl)
+
+    def delete(self, sid: str) -> None:
+        self._client.delete(self.prefix + sid)
+
+    def touch(self, sid: str, ttl: int) -> None:
+        self._client.expire(self.prefix + sid, ttl)
+
+
+# ==================== INTERFAZ DE SESIÓN ====================
+
+class ServerSideSessionInterface(SessionInterface):
+    """Interfaz de sesión de Flask que guarda el contenido en un `SessionBackend`"""
+
+    serializer = session_json_serializer
+    session_class = ServerSideSession
+
+    def __init__(self, backend: SessionBackend):
+        self.backend = backend
+
+    def _ttl(self, app: Flask, session: ServerSideSession) -> int:
+        if session.permanent:
+            return int(app.permanent_session_lifetime.total_seconds())
+        return Config.SESSION_TTL
+
+    def open_session(self, app: Flask, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID_PATTERN.match(sid):
+            return self.session_class()
+
+        try:
+            data = self.backend.get(sid)
+        except Exception as e:
+            app.logger.error(f"Error reading session from store: {e}")
+            data = None
+        if data is None:
+            return self.session_class()
+        try:
+            return self.session_class(self.serializer.loads(data), sid=sid)
+        except ValueError:
+            return self.session_class()
+
+    def save_session(self, app: Flask, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        # Sesión vaciada (ej. logout): borrar la entrada y la cookie
+        if not session:
+            if session.modified and session.sid:
+                self._store(app, 'deleting', self.backend.delete, session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        ttl = self._ttl(app, session)
+        if session.sid and not session.modified:
+            # Sin cambios: renovar el vencimiento (por inactividad, también en las no permanentes);
+            # la cookie solo lleva fecha de vencimiento en las permanentes
+            if app.config['SESSION_REFRESH_EACH_REQUEST']:
+                touched = self._store(app, 'refreshing', self.backend.touch, session.sid, ttl)
+                if touched and session.permanent:
+                    self._set_cookie(app, session, response)
+            return
+
+        if session.rotate and session.sid:
+            # Si falla, la entrada anterior vence sola por su TTL
+            self._store(app, 'deleting', self.backend.delete, session.sid)
+            session.sid = None
+        is_new = session.sid is None
+        if is_new:
+            session.sid = secrets.token_urlsafe(32)
+        # Sin guardar no se envía la cookie: la petición termina, pero sus cambios de sesión se pierden
+        if not self._store(app, 'writing', self.backend.set, session.sid,
+                           self.serializer.dumps(dict(session)), ttl):
+            return
+        if is_new or session.permanent:
+            self._set_cookie(app, session, response)
+
+    def _store(self, app: Flask, action: str, operation, *args) -> bool:
+        """Ejecutar una operación del backend registrando el error en vez de propagarlo"""
+        try:
+            operation(*args)
+            return True
+        except Exception as e:
+            app.logger.error(f"Error {action} session in store: {e}")
+            return False
+
+    def _set_cookie(self, app: Flask, session: ServerSideSession, response) -> None:
+        response.set_cookie(
+            self.get_cookie_name(app),
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=self.get_cookie_domain(app),
+            path=self.get_cookie_path(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def regenerate_session() -> None:
+    """Cambiar el ID de la sesión actual al guardarla (sin efecto con sesiones de cookie)"""
+    if isinstance(session, ServerSideSession):
+        session.regenerate()
+
+
+def create_backend(name: str) -> SessionBackend:
+    """Backend de sesiones según su nombre en SESSION_BACKEND"""
+    if name == 'memory':
+        return MemorySessionBackend(Config.SESSION_MEMORY_MAXSIZE)
+    if name == 'filesystem':
+        return FileSystemSessionBackend(Config.SESSION_FILE_DIR)
+    if name == 'redis':
+        return RedisSessionBackend(Config.SESSION_REDIS_URL)
+    raise ValueError(f"SESSION_BACKEND no soportado: {name}")
+
+
+def init_app(app: Flask) -> None:
+    """Guardar las sesiones en el servidor según SESSION_BACKEND ('cookie' conserva la sesión de Flask)"""
+    if Config.SESSION_BACKEND == 'cookie':
+        return
+    app.session_interface = ServerSideSessionInterface(create_backend(Config.SESSION_BACKEND))
+    app.logger.info(f"Server-side sessions enabled ({Config.SESSION_BACKEND})")
@@ -0,0 +1,84 @@
+"""
+Conteo (y tiempo) de las sentencias SQL emitidas dentro de un bloque
+
+Se registran listeners sobre la clase `Engine` de SQLAlchemy (cubren el
+engine del ORM sin necesidad de importarlo) y cada bloque `count_statements()`
+acumula las sentencias ejecutadas en su mismo contexto (hilo o petición), de
+modo que los trabajos en segundo plano no se mezclan con la petición actual.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_active_counters = contextvars.ContextVar('sql_statement_counters', default=())
+_install_lock = threading.Lock()
+_installed = False
+
+
+class StatementCounter:
+    """Sentencias SQL ejecutadas dentro de un bloque `count_statements()`"""
+
+    # Sentencias conservadas para el diagnóstico (el conteo no tiene límite)
+    MAX_RECORDED = 50
+
+    def __init__(self):
+        self.count = 0
+        # Segundos acumulados en la ejecución de las sentencias
+        self.duration = 0.0
+        self.statements: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if len(self.statements) < self.MAX_RECORDED:
+            self.statements.append(statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counters = _active_counters.get()
+    if not counters:
+        return
+    for counter in counters:
+        counter.record(statement)
+    # Las sentencias de una conexión son secuenciales: basta un inicio por conexión
+    conn.info['sql_counter_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('sql_counter_started', None)
+    counters = _active_counters.get()
+    if not counters or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for counter in counters:
+        counter.duration += elapsed
+
+
+def install() -> None:
+    """Registrar los listeners de conteo (idempotente)"""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            _installed = True
+
+
+@contextmanager
+def count_statements() -> Iterator[StatementCounter]:
+    """
+    Contar las sentencias SQL ejecutadas dentro del bloque
+
+    Los bloques se pueden anidar: cada contador ve las sentencias de su bloque.
+    """
+    install()
+    counter = StatementCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
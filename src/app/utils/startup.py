@@ -0,0 +1,70 @@
+"""
+Tiempos de arranque de la aplicación por fase (imports, extensiones, blueprints)
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from app.utils import metrics
+
+
+class StartupTimer:
+    """Acumula la duración de cada fase de `create_app` para reportarla al final"""
+
+    def __init__(self, started: Optional[float] = None):
+        """
+        Args:
+            started: Inicio del arranque (perf_counter); por defecto, ahora
+        """
+        self.started = time.perf_counter() if started is None else started
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter() - started
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self, slowest: int = 5) -> str:
+        """Texto para el log: total, fases principales y los imports más lentos"""
+        main = [f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.phases.items()
+                if not name.startswith('import ')]
+        imports = sorted(
+            ((name, seconds) for name, seconds in self.phases.items() if name.startswith('import ')),
+            key=lambda item: item[1], reverse=True
+        )[:slowest]
+        text = f"App startup took {self.total * 1000:.0f}ms ({', '.join(main)})"
+        if imports:
+            text += '; slowest imports: ' + ', '.join(
+                f"{name[len('import '):]}={seconds * 1000:.0f}ms" for name, seconds in imports
+            )
+        return text
+
+    def metric_lines(self) -> List[str]:
+        """Duración de cada fase como métrica de Prometheus (se expone en /metrics)"""
+        name = 'aclimate_admin_startup_phase_seconds'
+        lines = [f'# HELP {name} Duración de cada fase del arranque del worker', f'# TYPE {name} gauge']
+        lines.extend(
+            f'{name}{metrics.format_labels({"phase": phase})} {seconds}' for phase, seconds in self.phases.items()
+        )
+        return lines
+
+
+_published: Optional[StartupTimer] = None
+
+
+def _render_published() -> List[str]:
+    return _published.metric_lines() if _published is not None else []
+
+
+def publish(timer: StartupTimer) -> None:
+    """Exponer en /metrics los tiempos del último arranque del proceso"""
+    global _published
+    _published = timer
+    metrics.register_collector(_render_published)
@@ -7,9 +7,20 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Esquema de la BD: se crea con `flask init-db` (una vez por despliegue); al arrancar cada worker
+    # solo se verifica la versión aplicada. Activar la creación al arrancar solo en desarrollo
+    DB_CREATE_TABLES_ON_STARTUP = os.environ.get('DB_CREATE_TABLES_ON_STARTUP', 'false').lower() == 'true'
+    DB_SCHEMA_CHECK_ON_STARTUP = os.environ.get('DB_SCHEMA_CHECK_ON_STARTUP', 'true').lower() == 'true'
+
     # Configuración de la API
     API_BASE_URL = os.environ.get('API_BASE_URL') or 'http://127.0.0.1:8000'
 
+    # Cliente HTTP saliente (API y Keycloak): pool de conexiones por host y reintentos
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+    HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10))
+    HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+    HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.3))
+
     # Configuración de internacionalización
     LANGUAGES = {
         'es_CO': {
@@ -29,6 +40,22 @@ class Config:
     KEYCLOAK_REALM = os.environ.get('KEYCLOAK_REALM', 'aclimate')
     KEYCLOAK_CLIENT_ID = os.environ.get('KEYCLOAK_CLIENT_ID', 'aclimate_admin')
     KEYCLOAK_CLIENT_SECRET = os.environ.get('KEYCLOAK_CLIENT_SECRET', 'your-client-secret')
+
+    # Validación de access tokens: 'local' (firma JWKS + exp/iss/aud) o 'remote' (userinfo)
+    TOKEN_VALIDATION_MODE = os.environ.get('TOKEN_VALIDATION_MODE', 'local')
+    # Si la validación local no es concluyente (JWKS inaccesible), consultar userinfo
+    TOKEN_VALIDATION_REMOTE_FALLBACK = os.environ.get('TOKEN_VALIDATION_REMOTE_FALLBACK', 'false').lower() == 'true'
+    TOKEN_VALIDATION_LEEWAY = int(os.environ.get('TOKEN_VALIDATION_LEEWAY', 30))
+    # Audiencia esperada en el claim aud (vacío: se acepta el client id en aud o azp)
+    KEYCLOAK_TOKEN_AUDIENCE = os.environ.get('KEYCLOAK_TOKEN_AUDIENCE', '')
+    JWKS_CACHE_TTL = int(os.environ.get('JWKS_CACHE_TTL', 3600))
+    # Máximo de consultas concurrentes a la API Admin de Keycloak (ej. listado de usuarios)
+    KEYCLOAK_MAX_WORKERS = int(os.environ.get('KEYCLOAK_MAX_WORKERS', 8))
+    # Token de servicio (client credentials) compartido por el proceso: segundos antes del vencimiento en que
+    # se renueva por adelantado, margen de seguridad contra el vencimiento real y espera tras un fallo
+    SERVICE_TOKEN_REFRESH_BEFORE = int(os.environ.get('SERVICE_TOKEN_REFRESH_BEFORE', 60))
+    SERVICE_TOKEN_EXPIRY_SKEW = int(os.environ.get('SERVICE_TOKEN_EXPIRY_SKEW', 10))
+    SERVICE_TOKEN_RETRY_INTERVAL = float(os.environ.get('SERVICE_TOKEN_RETRY_INTERVAL', 2))
     
     # OAuth URLs
     @property
@@ -53,8 +80,82 @@ class Config:
         'ORYZA': {"Rice"}
     }
 
+    # Listados paginados en el servidor: filas por página y máximo permitido en ?per_page=
+    LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', 50))
+    LIST_MAX_PAGE_SIZE = int(os.environ.get('LIST_MAX_PAGE_SIZE', 500))
+    # Máximo de sentencias SQL por render de listado (0 desactiva); en debug o con el chequeo activo se lanza un error
+    LIST_SQL_STATEMENT_LIMIT = int(os.environ.get('LIST_SQL_STATEMENT_LIMIT', 10))
+    LIST_SQL_STATEMENT_CHECK = os.environ.get('LIST_SQL_STATEMENT_CHECK', 'false').lower() == 'true'
+
+    # Importación de locaciones: filas validadas y escritas por lote
+    LOCATION_IMPORT_BATCH_SIZE = int(os.environ.get('LOCATION_IMPORT_BATCH_SIZE', 1000))
+    # Importaciones en segundo plano: hilos por worker, segundos sin avance para dar por interrumpida una en
+    # ejecución, segundos que puede seguir encolada y segundos que se conservan los registros antes de borrarlos
+    IMPORT_JOB_WORKERS = int(os.environ.get('IMPORT_JOB_WORKERS', 2))
+    IMPORT_JOB_STALE_AFTER = int(os.environ.get('IMPORT_JOB_STALE_AFTER', 600))
+    IMPORT_JOB_QUEUED_EXPIRE = int(os.environ.get('IMPORT_JOB_QUEUED_EXPIRE', 6 * 3600))
+    IMPORT_JOB_RETENTION = int(os.environ.get('IMPORT_JOB_RETENTION', 7 * 24 * 3600))
+
+    # Alta de usuarios (Keycloak + BD): intentos por paso, segundos base del backoff exponencial,
+    # hilos por worker para las altas masivas y máximo de filas por CSV
+    PROVISIONING_MAX_ATTEMPTS = int(os.environ.get('PROVISIONING_MAX_ATTEMPTS', 3))
+    PROVISIONING_BACKOFF = float(os.environ.get('PROVISIONING_BACKOFF', 0.5))
+    PROVISIONING_JOB_WORKERS = int(os.environ.get('PROVISIONING_JOB_WORKERS', 1))
+    PROVISIONING_MAX_ROWS = int(os.environ.get('PROVISIONING_MAX_ROWS', 1000))
+    # Altas masivas: segundos sin avance para dar por interrumpida una en ejecución, segundos que puede seguir
+    # encolada y segundos que se conservan sus registros
+    PROVISIONING_JOB_STALE_AFTER = int(os.environ.get('PROVISIONING_JOB_STALE_AFTER', 600))
+    PROVISIONING_JOB_QUEUED_EXPIRE = int(os.environ.get('PROVISIONING_JOB_QUEUED_EXPIRE', 6 * 3600))
+    PROVISIONING_JOB_RETENTION = int(os.environ.get('PROVISIONING_JOB_RETENTION', 7 * 24 * 3600))
+
+    # Búsqueda de locaciones para autocompletado: resultados por defecto y máximo permitido en ?limit=
+    LOCATION_SEARCH_LIMIT = int(os.environ.get('LOCATION_SEARCH_LIMIT', 20))
+    LOCATION_SEARCH_MAX_RESULTS = int(os.environ.get('LOCATION_SEARCH_MAX_RESULTS', 50))
+
+    # Caché de listas de opciones (id, nombre): segundos máximos de vida aunque no haya escrituras
+    REFERENCE_CACHE_TTL = int(os.environ.get('REFERENCE_CACHE_TTL', 300))
+
     # Configurar carpeta para subidas
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'conf_files')
 
+    # Sesiones: 'cookie' (por defecto: todo el contenido en la cookie firmada), 'memory' (LRU del proceso, solo
+    # con un worker), 'filesystem' (compartida por los workers del host: SESSION_FILE_DIR debe estar en un volumen
+    # persistente, y con varias réplicas compartido por todas o con sesiones fijas) o 'redis' (requiere el paquete redis)
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie').lower()
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR') or os.path.join(UPLOAD_FOLDER, 'sessions')
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL', 'redis://localhost:6379/0')
+    SESSION_MEMORY_MAXSIZE = int(os.environ.get('SESSION_MEMORY_MAXSIZE', 10000))
+    # Segundos de vida en el almacén de una sesión no permanente sin actividad (cada petición la renueva)
+    SESSION_TTL = int(os.environ.get('SESSION_TTL', 8 * 3600))
+
     # Health check token (optional) — protects /health and /ready endpoints
-    HEALTH_TOKEN = os.environ.get('HEALTH_TOKEN', '')
\ No newline at end of file
+    HEALTH_TOKEN = os.environ.get('HEALTH_TOKEN', '')
+    # Readiness probe: seconds each check result is reused, and optional Keycloak/API reachability checks
+    READINESS_CACHE_TTL = float(os.environ.get('READINESS_CACHE_TTL', 5))
+    READINESS_CHECK_KEYCLOAK = os.environ.get('READINESS_CHECK_KEYCLOAK', 'false').lower() == 'true'
+    READINESS_CHECK_API = os.environ.get('READINESS_CHECK_API', 'false').lower() == 'true'
+    READINESS_HTTP_TIMEOUT = float(os.environ.get('READINESS_HTTP_TIMEOUT', 2))
+    # Upper bound (seconds) for the database check; an unreachable server or exhausted pool reports not ready
+    READINESS_DB_TIMEOUT = float(os.environ.get('READINESS_DB_TIMEOUT', 3))
+
+    # Instrumentación por petición: tiempo, SQL y HTTP saliente (cabecera Server-Timing, log JSON y /metrics)
+    REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'true').lower() == 'true'
+    REQUEST_LOG_ENABLED = os.environ.get('REQUEST_LOG_ENABLED', 'true').lower() == 'true'
+    # Carpeta donde cada worker vuelca sus métricas para que /metrics las sume (vacío: cada worker expone
+    # solo las suyas) y segundos entre volcados. gunicorn.conf.py la define por defecto
+    METRICS_DIR = os.environ.get('METRICS_DIR', '')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    # Límites (segundos) del histograma de latencia por blueprint, separados por comas
+    REQUEST_LATENCY_BUCKETS = tuple(
+        float(bound) for bound in
+        os.environ.get('REQUEST_LATENCY_BUCKETS', '0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10').split(',')
+    )
+
+    # Caché de fragmentos (menú lateral, tarjetas del panel) por firma de permisos e idioma: entradas y segundos de vida
+    FRAGMENT_CACHE_MAXSIZE = int(os.environ.get('FRAGMENT_CACHE_MAXSIZE', 256))
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 3600))
+
+    # Caché de usuarios autenticados (por worker) para el user_loader de Flask-Login
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAXSIZE = int(os.environ.get('USER_CACHE_MAXSIZE', 1024))
\ No newline at end of file
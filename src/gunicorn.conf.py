@@ -0,0 +1,62 @@
+"""
+Configuración de Gunicorn para producción
+
+Uso (desde la raíz del repositorio): gunicorn -c src/gunicorn.conf.py
+
+Con `preload_app` el maestro importa la aplicación (Flask, ORM, authlib) una
+sola vez y los workers la comparten copy-on-write; `post_fork` rehace en cada
+worker lo que no sobrevive al fork (engine de SQLAlchemy, sesiones HTTP,
+cachés y pools de hilos, ver app/utils/fork.py).
+
+La app pasa casi todo el tiempo esperando a PostgreSQL, Keycloak y la API, así
+que por defecto usa workers `gthread`: cada worker atiende varias peticiones
+en hilos. Con GUNICORN_WORKER_CLASS=sync se vuelve a un hilo por worker.
+
+Las métricas de los workers se suman en /metrics a través de archivos en
+METRICS_DIR (por defecto en /dev/shm), que se vacía al arrancar el maestro.
+"""
+import os
+import tempfile
+
+# Antes de importar la app: la configuración lee METRICS_DIR al cargarse
+_shm = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(_shm, 'aclimate_admin_metrics'))
+
+wsgi_app = 'run:app'
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '3003')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+# 'gthread' (hilos por worker) o 'sync' (un hilo por worker)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Hilos por worker (solo con gthread)
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Importar la app en el maestro antes de crear los workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+accesslog = '-'
+errorlog = '-'
+forwarded_allow_ips = '*'
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
+def on_starting(server):
+    """Descartar las métricas de una ejecución anterior"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for entry in os.scandir(metrics_dir):
+        if entry.name.endswith(('.json', '.tmp')):
+            os.remove(entry.path)
+
+
+def post_fork(server, worker):
+    """Rehacer en el worker el estado que no sobrevive al fork"""
+    if not preload_app:
+        return
+    from app.utils.fork import reinit_after_fork
+
+    reinit_after_fork()
+    server.log.info(f"Worker {worker.pid}: engine, HTTP sessions, caches and executors reinitialized after fork")
@@ -0,0 +1,264 @@
+"""
+Prueba de concurrencia del panel con workers de hilos (gunicorn gthread).
+Ejecutar desde: src/
+
+Reutiliza el servidor de Keycloak/API de prueba y la siembra de datos de
+benchmark.py, y verifica dos cosas:
+
+1. token_single_flight: muchos hilos, cada uno con su propio
+   KeycloakAPIService, piden a la vez el token de servicio sin token en caché
+   y luego dentro de la ventana de renovación anticipada; en cada fase
+   Keycloak debe recibir una sola petición y todos los hilos deben obtener
+   el token.
+2. threaded_workers: levanta gunicorn con gunicorn.conf.py (preload, gthread)
+   y lanza peticiones concurrentes autenticadas a listados, permisos y
+   búsquedas; todas deben responder 200. Una redirección (ej. al login si
+   los workers no aceptan la cookie de sesión), un 4xx, un 5xx o un error de
+   conexión cuentan como fallo.
+
+Termina con código 1 si alguna verificación falla y escribe el resumen en JSON.
+
+Ejemplos:
+    python stress.py
+    python stress.py --workers 2 --threads 8 --concurrency 32 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import benchmark
+from benchmark import BENCH_TOKEN, StubHandler, login, seed, start_stub_server
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# ==================== TOKEN DE SERVICIO ====================
+
+def check_token_single_flight(app, threads: int) -> dict:
+    """Pedir el token de servicio desde `threads` hilos a la vez: sin token y en la ventana de renovación"""
+    from app.services.keycloak_api_service import KeycloakAPIService
+    from app.services.service_token_manager import service_token_manager
+
+    def burst() -> tuple:
+        barrier = threading.Barrier(threads)
+        tokens = []
+
+        def worker():
+            # Instancias distintas, como UserService y RoleService: el token es del proceso
+            service = KeycloakAPIService()
+            with app.app_context():
+                barrier.wait()
+                tokens.append(service._get_service_token())
+
+        StubHandler.token_requests = 0
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        return StubHandler.token_requests, tokens.count(BENCH_TOKEN)
+
+    service_token_manager.invalidate()
+    initial_requests, initial_ok = burst()
+
+    # Token vigente pero dentro de la ventana de renovación anticipada
+    token, _, expires_at = service_token_manager._state
+    service_token_manager._state = (token, time.time() - 1, expires_at)
+    proactive_requests, proactive_ok = burst()
+
+    ok = (initial_requests == 1 and initial_ok == threads
+          and proactive_requests == 1 and proactive_ok == threads)
+    return {
+        'case': 'token_single_flight',
+        'threads': threads,
+        'token_requests': initial_requests,
+        'tokens_ok': initial_ok,
+        'proactive_token_requests': proactive_requests,
+        'proactive_tokens_ok': proactive_ok,
+        'ok': ok
+    }
+
+
+# ==================== WORKERS DE HILOS ====================
+
+def start_gunicorn(port: int, workers: int, threads: int, log_path: str) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(port), GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+               GUNICORN_WORKER_CLASS='gthread', GUNICORN_PRELOAD='true')
+    log = open(log_path, 'w')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(SRC_DIR, 'gunicorn.conf.py')],
+        cwd=SRC_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def wait_ready(base_url: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_threaded_workers(base_url: str, cookie: dict, paths: list, total: int, concurrency: int) -> dict:
+    """Lanzar `total` peticiones repartidas entre `paths` desde `concurrency` hilos cliente (se espera 200)"""
+    local = threading.local()
+    statuses = Counter()
+    failures = Counter()
+    lock = threading.Lock()
+
+    def call(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+            session.cookies.update(cookie)
+        path = paths[i % len(paths)]
+        try:
+            response = session.get(f'{base_url}{path}', timeout=30, allow_redirects=False)
+            key = f'{path.split("?")[0]} {response.status_code}'
+            with lock:
+                statuses[key] += 1
+                if response.status_code != 200:
+                    failures[key] += 1
+        except requests.RequestException as e:
+            with lock:
+                failures[f'{path} {type(e).__name__}'] += 1
+
+    StubHandler.token_requests = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'case': 'threaded_workers',
+        'requests': total,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+        'status_codes': dict(statuses),
+        'failures': dict(failures),
+        'token_requests': StubHandler.token_requests,
+        'ok': not failures
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de concurrencia con workers gthread')
+    parser.add_argument('--database-url', help='Base de datos (por defecto, SQLite temporal)')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de gunicorn')
+    parser.add_argument('--threads', type=int, default=8, help='Hilos por worker')
+    parser.add_argument('--concurrency', type=int, default=32, help='Hilos cliente concurrentes')
+    parser.add_argument('--requests', type=int, default=1000, help='Peticiones totales al servidor')
+    parser.add_argument('--token-threads', type=int, default=32, help='Hilos del caso token_single_flight')
+    parser.add_argument('--locations', type=int, default=500, help='Locaciones sembradas')
+    parser.add_argument('--users', type=int, default=20, help='Usuarios sembrados')
+    parser.add_argument('--stub-latency-ms', type=float, default=20, help='Latencia simulada de Keycloak/API')
+    parser.add_argument('--startup-timeout', type=float, default=60, help='Segundos máximos para que gunicorn arranque')
+    parser.add_argument('--output', help='Archivo JSON de salida (por defecto, stdout)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='aclimate-stress-')
+    server, stub_url = start_stub_server(args.stub_latency_ms)
+    database_url = args.database_url or f'sqlite:///{os.path.join(workdir, "stress.db")}'
+
+    # La configuración se lee del entorno al importar la app; gunicorn hereda el mismo entorno.
+    # Las sesiones van a archivos para que la sesión creada aquí sea válida en los workers.
+    os.environ.update({
+        'DATABASE_URL': database_url,
+        'KEYCLOAK_SERVER_URL': stub_url,
+        'KEYCLOAK_REALM': benchmark.REALM,
+        'API_BASE_URL': stub_url,
+        'TOKEN_VALIDATION_MODE': 'remote',
+        'REQUEST_LOG_ENABLED': 'false',
+        'LIST_SQL_STATEMENT_CHECK': 'false',
+        'DB_CREATE_TABLES_ON_STARTUP': 'true',
+        'SESSION_BACKEND': 'filesystem',
+        'SESSION_FILE_DIR': os.path.join(workdir, 'sessions')
+    })
+    import logging
+    from app import create_app
+
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tag = uuid.uuid4().hex[:6]
+    with app.app_context():
+        data = seed(args.locations, args.users, tag)
+
+    results = [check_token_single_flight(app, args.token_threads)]
+
+    client = app.test_client()
+    login(client)
+    cookie_name = app.config['SESSION_COOKIE_NAME']
+    cookie = {cookie_name: client.get_cookie(cookie_name).value}
+
+    paths = [
+        '/location',
+        '/location?page=2&sort=-name',
+        '/user',
+        f'/user/{data["admin_user_id"]}/permissions',
+        f'/api/locations/search?q=bench&country_id={data["country_id"]}',
+        '/home',
+        '/ready'
+    ]
+
+    port = free_port()
+    log_path = os.path.join(workdir, 'gunicorn.log')
+    process = start_gunicorn(port, args.workers, args.threads, log_path)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        if not wait_ready(base_url, args.startup_timeout):
+            results.append({'case': 'threaded_workers', 'ok': False, 'error': f'gunicorn no arrancó (ver {log_path})'})
+        else:
+            print(f'Ejecutando {args.requests} peticiones contra {base_url}...', file=sys.stderr)
+            results.append(run_threaded_workers(base_url, cookie, paths, args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        server.shutdown()
+
+    report = {
+        'meta': {
+            'workers': args.workers,
+            'threads': args.threads,
+            'database': database_url.split(':', 1)[0],
+            'stub_latency_ms': args.stub_latency_ms,
+            'gunicorn_log': log_path
+        },
+        'results': results,
+        'ok': all(result.get('ok') for result in results)
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f'Resultados en {args.output}', file=sys.stderr)
+    else:
+        print(output)
+    sys.exit(0 if report['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()